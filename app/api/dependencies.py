@@ -2,18 +2,39 @@
 
 import sqlite3
 from typing import Iterator, Dict, Any, Optional
-from app.models.db import open_conn
-from app.core.security import decode_access_token
+from app.models.db import get_pool
+from app.core.config import settings
+from app.repositories.base import Repositories
+from app.repositories.sqlite_backend import SqliteRepositories
+from app.repositories import memory_backend
+from app.services.session_service import decode_token
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2AuthorizationCodeBearer
 
 #
 # ZÁKLADNÍ ZÁVISLOSTI
 #
-def get_db_conn() -> Iterator[sqlite3.Connection]:
-    with open_conn() as conn:
-        conn.row_factory = sqlite3.Row
-        yield conn
+def get_repositories() -> Iterator[Repositories]:
+    if settings.REPOSITORY_BACKEND == "memory":
+        repos = memory_backend.MemoryRepositories(memory_backend.get_store())
+        try:
+            yield repos
+            repos.commit()
+        except Exception:
+            repos.rollback()
+            raise
+        return
+
+    # Připojení se získá až při prvním dotazu: odmítnuté (401/403) a z cache obsloužené požadavky DB nepotřebují
+    repos = SqliteRepositories(pool=get_pool())
+    try:
+        yield repos
+        repos.commit()
+    except sqlite3.Error:
+        repos.rollback()
+        raise
+    finally:
+        repos.release()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
@@ -32,7 +53,7 @@ async def get_current_user_payload(request: Request) -> Dict[str, Any]:
         )
     
     try:
-        payload = decode_access_token(token)
+        payload = decode_token(token)
         if 'sub' not in payload:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,7 +75,7 @@ async def get_current_user_optional(request: Request) -> Optional[Dict[str, Any]
         return None
     
     try:
-        payload = decode_access_token(token)
+        payload = decode_token(token)
         if 'sub' not in payload:
             return None 
         return payload
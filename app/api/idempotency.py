@@ -0,0 +1,108 @@
+# app/api/idempotency.py
+
+import asyncio
+import functools
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from starlette.responses import RedirectResponse, Response
+from app.core.config import settings
+
+FIELD_NAME = "idempotency_key"
+
+Key = Tuple[str, Any, str]
+# Výsledek formuláře je vždy přesměrování: (stavový kód, adresa)
+Outcome = Tuple[int, str]
+
+
+def new_token() -> str:
+    """Token do skrytého pole formuláře; každé vykreslení formuláře dostane nový."""
+    return secrets.token_urlsafe(16)
+
+
+#
+# ÚLOŽIŠTĚ VÝSLEDKŮ (paměť workeru, krátká platnost)
+#
+class IdempotencyStore:
+    """Přístup jen ze smyčky událostí, zámek proto není potřeba."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Položky jdou v pořadí vložení, a tedy i vypršení (platnost je pro všechny stejná)
+        self._entries: "OrderedDict[Key, Tuple[float, Union[Outcome, asyncio.Future]]]" = OrderedDict()
+
+    def _purge(self, now: float) -> None:
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def get(self, key: Key) -> Optional[Union[Outcome, asyncio.Future]]:
+        self._purge(time.monotonic())
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def start(self, key: Key) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (time.monotonic() + self.ttl, future)
+        return future
+
+    def finish(self, key: Key, future: asyncio.Future, outcome: Optional[Outcome]) -> None:
+        if outcome is None:
+            self._entries.pop(key, None)
+        else:
+            self._entries[key] = (time.monotonic() + self.ttl, outcome)
+            self._entries.move_to_end(key)
+        future.set_result(outcome)
+
+
+_store = IdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_ENTRIES)
+
+
+def _outcome(response: Response) -> Optional[Outcome]:
+    location = response.headers.get("location")
+    if location is None or not 300 <= response.status_code < 400:
+        return None
+    return response.status_code, location
+
+def _replay(outcome: Outcome) -> RedirectResponse:
+    return RedirectResponse(url=outcome[1], status_code=outcome[0])
+
+
+#
+# DEKORÁTOR ENDPOINTU (formulář posílá FIELD_NAME, payload určuje uživatele)
+#
+def idempotent(form: str) -> Callable:
+    """
+    Opakované odeslání formuláře se stejným tokenem vrátí původní přesměrování
+    bez nové práce. Endpoint musí mít parametr idempotency_key (Form) a payload.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            token = kwargs.get(FIELD_NAME)
+            payload: Dict[str, Any] = kwargs.get("payload") or {}
+            if not token:
+                return await endpoint(*args, **kwargs)
+
+            key = (form, payload.get("id"), token)
+            previous = _store.get(key)
+            if isinstance(previous, asyncio.Future):
+                # Původní požadavek ještě běží: počkat na jeho výsledek
+                previous = await asyncio.shield(previous)
+            if previous is not None:
+                return _replay(previous)
+
+            future = _store.start(key)
+            outcome = None
+            try:
+                response = await endpoint(*args, **kwargs)
+                outcome = _outcome(response)
+                return response
+            finally:
+                _store.finish(key, future, outcome)
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+# app/api/middleware.py
+
+import logging
+import threading
+import time
+import uuid
+from fastapi import FastAPI, Request
+from starlette.concurrency import run_in_threadpool
+from app.core import metrics, profiling
+from app.core.log import request_id_var
+from app.core.config import settings
+from app.models import query_log
+from app.services.session_service import decode_token
+
+access_logger = logging.getLogger("app.access")
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "_profile"
+
+
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "__unmatched__")
+    if request.url.path.startswith("/static"):
+        return "/static"
+    return "__unmatched__"
+
+def _profile_requested(request: Request) -> bool:
+    if request.headers.get(PROFILE_HEADER) != "1" and request.query_params.get(PROFILE_QUERY_PARAM) != "1":
+        return False
+    token = request.cookies.get("access_token")
+    if not token:
+        return False
+    try:
+        return decode_token(token).get('is_super_admin') == 1
+    except ValueError:
+        return False
+
+
+def setup_middleware(app: FastAPI):
+
+    #
+    # PROFILOVÁNÍ POŽADAVKU NA VYŽÁDÁNÍ (X-Profile: 1 nebo ?_profile=1, jen Super Admin)
+    #
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next):
+        if not _profile_requested(request):
+            return await call_next(request)
+        if not profiling.try_acquire():
+            metrics.PROFILES_TOTAL.inc(("rate_limited",))
+            response = await call_next(request)
+            response.headers[PROFILE_HEADER] = "rate-limited"
+            return response
+
+        name = profiling.profile_name(request.method, request.url.path)
+        sampler = profiling.StackSampler(
+            threading.get_ident(), settings.PROFILE_INTERVAL_MS / 1000, settings.PROFILE_MAX_SECONDS
+        )
+        started = time.perf_counter()
+        sampler.start()
+        status_code = 500
+
+        async def finish() -> None:
+            samples = sampler.stop()
+            profiling.release()
+            meta = {
+                "method": request.method,
+                "path": request.url.path,
+                "route": _route_label(request),
+                "status": status_code,
+                "request_id": request_id_var.get(),
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "interval_ms": settings.PROFILE_INTERVAL_MS,
+                "truncated_time": sampler.truncated,
+            }
+            try:
+                path = await run_in_threadpool(profiling.save_profile, name, samples, meta)
+                metrics.PROFILES_TOTAL.inc(("saved",))
+                logger.info("Profil požadavku uložen.", extra={"profile": path, **meta})
+            except OSError:
+                metrics.PROFILES_TOTAL.inc(("failed",))
+                logger.exception("Profil požadavku se nepodařilo uložit.", extra={"profile": name})
+
+        try:
+            response = await call_next(request)
+        except BaseException:
+            await finish()
+            raise
+        status_code = response.status_code
+        response.headers[PROFILE_HEADER] = name + profiling.PROFILE_SUFFIX
+
+        # Tělo se odesílá až po návratu call_next (streamované šablony); profil končí s posledním blokem
+        body_iterator = response.body_iterator
+
+        async def profiled_body():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                await finish()
+
+        response.body_iterator = profiled_body()
+        return response
+
+    #
+    # METRIKY POŽADAVKŮ (latence, stavové kódy, souběžnost, čas v DB)
+    #
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        stats = metrics.begin_request()
+        if settings.SQL_INSTRUMENTATION:
+            query_log.begin_request()
+        metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            route = _route_label(request)
+            metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+            metrics.HTTP_REQUEST_DURATION.observe(elapsed, (request.method, route))
+            metrics.HTTP_REQUESTS_TOTAL.inc((request.method, route, str(status_code)))
+            metrics.DB_QUERIES_PER_REQUEST.observe(stats.db_queries, (route,))
+            metrics.DB_TIME_PER_REQUEST.observe(stats.db_seconds, (route,))
+            if settings.SQL_INSTRUMENTATION:
+                query_log.end_request(request.method, route)
+            access_logger.info(
+                "%s %s %s", request.method, request.url.path, status_code,
+                extra={
+                    "method": request.method,
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "db_queries": stats.db_queries,
+                    "db_ms": round(stats.db_seconds * 1000, 3),
+                }
+            )
+
+    #
+    # KORELAČNÍ ID POŽADAVKU (vnější middleware, platí i pro metriky a logy výše)
+    #
+    @app.middleware("http")
+    async def request_id_middleware(request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        token = request_id_var.set(request_id[:64])
+        try:
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id[:64]
+            return response
+        finally:
+            request_id_var.reset(token)
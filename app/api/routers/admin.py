@@ -1,46 +1,71 @@
 # app/api/routers/admin.py
 
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Path
-from fastapi.responses import HTMLResponse, RedirectResponse
-import sqlite3
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from datetime import date
 from typing import Dict, Any, Optional
-from app.api.dependencies import get_db_conn, get_current_admin_payload
-import app.repositories.user_repo as user_repo
+from app.api.dependencies import get_repositories, get_current_admin_payload
+from app.api.idempotency import idempotent
+from app.repositories.base import Repositories
 import app.services.vacation_service as vacation_service
-import app.repositories.vacation_repo as vacation_repo
 from app.models.schemas import EmployeeCreateByAdmin
 import app.services.user_service as user_service
+import app.services.session_service as session_service
+import app.services.audit_service as audit_service
+import app.services.report_service as report_service
 
 router = APIRouter(tags=["Admin"])
 
 
+def _search_page(request: Request) -> int:
+    try:
+        return max(1, int(request.query_params.get('page', 1)))
+    except ValueError:
+        return 1
+
+
 #
 # ZOBRAZENÍ ADMIN DASHBOARDU
 #
 @router.get("", response_class=HTMLResponse)
 async def admin_dashboard_page(
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_admin_payload)
 ):
-    admin_email = payload['sub']
-    admin_data = user_repo.get_user_by_email(conn, admin_email)
-    admin_name = admin_data.get('name', admin_email) if admin_data else admin_email
-    employees = user_repo.get_all_employees(conn)
-
     is_super_admin = payload.get('is_super_admin', 0)
     if is_super_admin == 1:
         return RedirectResponse(url="/super_admin", status_code=status.HTTP_302_FOUND)
 
-    upcoming_vacations = vacation_repo.get_upcoming_approved_vacations(conn, limit=10)
-    pending_requests = vacation_repo.get_pending_requests(conn)
+    admin_email = payload['sub']
+    admin_data = repos.users.get_user_by_email(admin_email)
+    admin_name = admin_data.get('name', admin_email) if admin_data else admin_email
+    # Dashboard načítá jen členy týmů, které admin spravuje
+    teams = repos.teams.get_admin_teams(payload.get('id'))
+    team_ids = [team['id'] for team in teams] or None
+    search_query = request.query_params.get('q', '').strip()
+    search_page = _search_page(request)
+    has_more_results = False
+    if search_query:
+        employees, has_more_results = user_service.search_users(
+            repos, search_query, search_page, employees_only=True, team_ids=team_ids
+        )
+    else:
+        employees = repos.users.get_all_employees(team_ids)
+
+    upcoming_vacations = repos.vacations.get_upcoming_approved_vacations(limit=10, team_ids=team_ids)
+    pending_requests = repos.vacations.get_pending_requests(team_ids)
 
     tpl = request.app.state.templates
     return tpl.TemplateResponse("admin_dashboard.html", {
         "request": request,
         "user_name": admin_name,
         "user_email": admin_email,
+        "teams": teams,
         "employees": employees,
+        "search_query": search_query,
+        "has_more_results": has_more_results,
+        "next_search_page": search_page + 1,
         "upcoming_vacations": upcoming_vacations,
         "pending_requests": pending_requests,
         "error": None
@@ -51,14 +76,17 @@ async def admin_dashboard_page(
 # TVORBA ZAMĚSTNANCE
 #
 @router.post("/create_employee", status_code=status.HTTP_303_SEE_OTHER)
+@idempotent("create_employee")
 async def create_employee_submit(
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_admin_payload),
     name: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
     remaining_days: Optional[int] = Form(None),
+    team_id: Optional[int] = Form(None),
+    idempotency_key: Optional[str] = Form(None),
 ):
     try:
         employee_data = EmployeeCreateByAdmin(
@@ -68,9 +96,11 @@ async def create_employee_submit(
         )
 
         user_service.create_employee_by_admin(
-            conn,
+            repos,
             employee_data=employee_data,
-            raw_password=password
+            raw_password=password,
+            team_id=team_id,
+            team_ids=user_service.get_admin_scope(repos, payload.get('id'))
         )
 
         return RedirectResponse(
@@ -97,11 +127,11 @@ async def create_employee_submit(
 #
 @router.post("/delete_user/{user_id}", status_code=status.HTTP_303_SEE_OTHER)
 async def delete_user_submit(
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     user_id: int = Path(..., gt=0),
     payload: Dict[str, Any] = Depends(get_current_admin_payload),
 ):
-    user_to_delete = user_repo.get_user_by_id(conn, user_id)
+    user_to_delete = repos.users.get_user_by_id(user_id)
     
     if not user_to_delete:
         return RedirectResponse(url="/admin?error=Uživatel_nebyl_nalezen.", status_code=status.HTTP_303_SEE_OTHER)
@@ -112,10 +142,15 @@ async def delete_user_submit(
     # Admin nemůže mazat jiné Adminy/Super Adminy
     if user_to_delete['is_admin'] == 1 or user_to_delete['is_super_admin'] == 1:
         return RedirectResponse(url="/admin?error=Nemáte_oprávnění_mazat_administrátory.", status_code=status.HTTP_303_SEE_OTHER)
+
+    if not user_service.is_in_scope(user_to_delete, user_service.get_admin_scope(repos, payload.get('id'))):
+        return RedirectResponse(url="/admin?error=Uživatel_nepatří_do_vašich_týmů.", status_code=status.HTTP_303_SEE_OTHER)
         
-    deleted = user_repo.delete_user(conn, user_id)
+    deleted = repos.users.delete_user(user_id)
     
     if deleted:
+        session_service.revoke_user_sessions(user_id)
+        audit_service.record(payload, audit_service.USER_DELETE, "user", user_id, before=audit_service.user_summary(user_to_delete))
         return RedirectResponse(url="/admin?success=Uživatel_byl_úspěšně_smazán.", status_code=status.HTTP_303_SEE_OTHER)
     else:
         return RedirectResponse(url="/admin?error=Chyba_při_mazání_uživatele.", status_code=status.HTTP_303_SEE_OTHER)
@@ -125,11 +160,14 @@ async def delete_user_submit(
 # SCHVALOVÁNÍ/ZAMÍTÁNÍ ŽÁDOSTÍ O DOVOLENOU
 #
 @router.post("/process_request/{request_id}")
+@idempotent("process_request")
 async def process_vacation_request(
     request_id: int,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_admin_payload),
-    action: str = Form(..., description="Akce: 'Approve' nebo 'Reject'")
+    action: str = Form(..., description="Akce: 'Approve' nebo 'Reject'"),
+    version: Optional[int] = Form(None, description="Verze žádosti zobrazená adminovi"),
+    idempotency_key: Optional[str] = Form(None)
 ):
     
     if action == "Approve":
@@ -143,13 +181,23 @@ async def process_vacation_request(
 
     try:
         updated = vacation_service.handle_vacation_approval(
-            conn,
+            repos,
             request_id,
-            new_status
+            new_status,
+            version,
+            user_service.get_admin_scope(repos, payload.get('id'))
         )
 
         if not updated:
             raise ValueError("Žádost k aktualizaci nenalezena.")
+        audit_service.record(
+            payload,
+            audit_service.VACATION_APPROVE if new_status == "Approved" else audit_service.VACATION_REJECT,
+            "vacation",
+            request_id,
+            before={"status": "Pending", "version": version},
+            after={"status": new_status}
+        )
 
         return RedirectResponse(
             url=f"/admin?success=Žádost_byla_úspěšně_{action_verb}.",
@@ -164,4 +212,54 @@ async def process_vacation_request(
         )
 
     except HTTPException:
-        return RedirectResponse(url="/admin", status_code=status.HTTP_303_SEE_OTHER)
\ No newline at end of file
+        return RedirectResponse(url="/admin", status_code=status.HTTP_303_SEE_OTHER)
+
+#
+# REPORTY ČERPÁNÍ A VYŘIZOVÁNÍ ŽÁDOSTÍ
+#
+CSV_REPORTS = {
+    "days_taken": report_service.days_taken_csv,
+    "turnaround": report_service.turnaround_csv,
+    "backlog": report_service.backlog_csv,
+}
+
+@router.get("/reports", response_class=HTMLResponse)
+async def reports_page(
+    request: Request,
+    repos: Repositories = Depends(get_repositories),
+    payload: Dict[str, Any] = Depends(get_current_admin_payload)
+):
+    reports = report_service.get_reports(repos, user_service.get_admin_scope(repos, payload.get('id')))
+    current_year = date.today().year
+    try:
+        year = int(request.query_params.get('year', current_year))
+    except ValueError:
+        year = current_year
+    years = sorted(set(reports.years) | {current_year, year})
+
+    tpl = request.app.state.templates
+    return tpl.TemplateResponse("reports.html", {
+        "request": request,
+        "user_email": payload['sub'],
+        "year": year,
+        "years": years,
+        "month_names": report_service.MONTH_NAMES,
+        "days_taken": reports.days_taken(year),
+        "turnaround": reports.turnaround_rows(year),
+        "backlog": reports.backlog_rows(year),
+    })
+
+@router.get("/reports/{name}.csv")
+async def report_csv(
+    name: str,
+    repos: Repositories = Depends(get_repositories),
+    payload: Dict[str, Any] = Depends(get_current_admin_payload)
+):
+    export = CSV_REPORTS.get(name)
+    if export is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report nenalezen.")
+    return Response(
+        content=export(report_service.get_reports(repos, user_service.get_admin_scope(repos, payload.get('id')))),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{name}.csv"'}
+    )
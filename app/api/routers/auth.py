@@ -4,12 +4,11 @@ from typing import Optional, Dict, Any
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import RedirectResponse
 from starlette import status
-import sqlite3
-from app.api.dependencies import get_db_conn, get_current_user_optional
+from app.api.dependencies import get_repositories, get_current_user_optional
+from app.repositories.base import Repositories
 import app.services.user_service as user_service 
-from app.core.security import create_access_token
+import app.services.session_service as session_service
 from app.models.schemas import UserLogin
-from app.core.config import settings
 
 router = APIRouter(tags=["Auth"])
 
@@ -45,12 +44,12 @@ async def login_page(
 @router.post("/login")
 async def login_submit(
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     email: str = Form(..., alias="username"),
     password: str = Form(...),
 ):
     user_data = user_service.authenticate_user(
-        conn, 
+        repos, 
         UserLogin(email=email, password=password) 
     )
 
@@ -63,18 +62,11 @@ async def login_submit(
         )
     
     # Získání dat pro token
-    user_id = user_data['id']
     is_super_admin = int(user_data.get('is_super_admin', 0))
     is_admin = int(user_data['is_admin'])
     
-    # Vytvoření tokenu
-    access_token = create_access_token(
-        sub=user_data['email'],
-        user_id=user_id,
-        roles=["admin"] if is_admin == 1 else ["employee"], 
-        is_admin=is_admin, 
-        is_super_admin=is_super_admin
-    )
+    # Vytvoření tokenu (JWT, nebo identifikátor relace uložené na serveru)
+    access_token = session_service.create_token(user_data)
     
     # Určení cílové URL po přihlášení
     if is_super_admin == 1:
@@ -87,7 +79,7 @@ async def login_submit(
     resp = RedirectResponse(url=redirect_url, status_code=status.HTTP_303_SEE_OTHER)
     
     # Nastavení cookie
-    max_age_int = int(settings.ACCESS_TOKEN_EXPIRE_MINUTES) * 60
+    max_age_int = session_service.cookie_max_age()
     
     resp.set_cookie(
         "access_token", 
@@ -106,6 +98,9 @@ async def login_submit(
 #
 @router.get("/logout")
 async def logout(request: Request):
+    token = request.cookies.get("access_token")
+    if token:
+        session_service.revoke_token(token)
     resp = RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
     resp.delete_cookie("access_token", path="/")
     return resp
\ No newline at end of file
@@ -0,0 +1,39 @@
+# app/api/routers/calendar.py
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from app.api.dependencies import get_repositories
+from app.core.security import verify_feed_token
+from app.repositories.base import Repositories
+import app.services.calendar_service as calendar_service
+
+router = APIRouter(tags=["Calendar"])
+
+# Kalendářové klienty se ptají každých pár minut; odpověď si smí ponechat krátce, pak se ověří přes ETag
+FEED_CACHE_CONTROL = "private, max-age=300, must-revalidate"
+
+
+#
+# KALENDÁŘOVÉ FEEDY SCHVÁLENÝCH DOVOLENÝCH (ICS, přístup přes token v URL)
+#
+@router.get("/calendar/{kind}/{object_id}/{token}.ics")
+async def calendar_feed(
+    request: Request,
+    kind: str,
+    object_id: int,
+    token: str,
+    repos: Repositories = Depends(get_repositories)
+):
+    # Neplatný token i neexistující feed vypadají stejně, aby nešlo hádat ID
+    if kind not in calendar_service.FEED_KINDS or not verify_feed_token(calendar_service.feed_scope(kind, object_id), token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kalendář nenalezen.")
+
+    feed = calendar_service.get_feed(repos, kind, object_id)
+    if feed is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kalendář nenalezen.")
+
+    etag, body = feed
+    headers = {"ETag": etag, "Cache-Control": FEED_CACHE_CONTROL}
+    if calendar_service.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="text/calendar; charset=utf-8", headers=headers)
@@ -1,14 +1,16 @@
 # app/api/routers/employees.py
 
-from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Path
-from fastapi.responses import HTMLResponse, RedirectResponse
-import sqlite3
+from fastapi import APIRouter, Depends, Request, Form, Query, HTTPException, status, Path, File, UploadFile
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from typing import Dict, Any, Optional
-from app.api.dependencies import get_db_conn, get_current_employee_payload
-import app.repositories.user_repo as user_repo
+from app.api.dependencies import get_repositories, get_current_employee_payload
+from app.api.idempotency import idempotent
+from app.repositories.base import Repositories
 import app.services.vacation_service as vacation_service
-import app.repositories.vacation_repo as vacation_repo
+import app.services.media_service as media_service
 from app.models.schemas import VacationRequest
+from app.core.config import settings
 from pydantic import ValidationError
 
 router = APIRouter(tags=["Employee"])
@@ -20,41 +22,82 @@ router = APIRouter(tags=["Employee"])
 @router.get("/profile", response_class=HTMLResponse)
 async def employee_profile_page(
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_employee_payload)
 ):
     user_email = payload['sub']
-    user_data = user_repo.get_user_by_email(conn, user_email)
+    user_data = repos.users.get_user_by_email(user_email)
 
     if not user_data:
         return RedirectResponse(url="/logout", status_code=status.HTTP_302_FOUND)
 
     user_id = user_data['id']
-    history = vacation_repo.get_employee_vacation_history(conn, user_id)
+    # Historie se zobrazuje po stránkách, starší stránky mohou sahat do archivu
+    try:
+        history_page = max(1, int(request.query_params.get('history_page', 1)))
+    except ValueError:
+        history_page = 1
+    history_limit = history_page * settings.HISTORY_PAGE_SIZE
+    history = repos.vacations.get_employee_vacation_history(user_id, limit=history_limit + 1)
+    has_more_history = len(history) > history_limit
 
     tpl = request.app.state.templates
     return tpl.TemplateResponse("profile.html", {
         "request": request,
         "user": user_data,
-        "history": history,
+        "history": history[:history_limit],
+        "has_more_history": has_more_history,
+        "next_history_page": history_page + 1,
         "error": request.query_params.get('error'),
         "success": request.query_params.get('success'),
     })
 
 
+#
+# NAHRÁNÍ PROFILOVÉHO OBRÁZKU (POST)
+#
+@router.post("/profile_picture", response_class=RedirectResponse)
+async def upload_profile_picture(
+    repos: Repositories = Depends(get_repositories),
+    payload: Dict[str, Any] = Depends(get_current_employee_payload),
+    picture: UploadFile = File(...)
+):
+    user_data = repos.users.get_user_by_email(payload['sub'])
+
+    if not user_data:
+        return RedirectResponse(url="/logout", status_code=status.HTTP_302_FOUND)
+
+    try:
+        # Kopírování a hashování po částech běží mimo smyčku událostí
+        key = await run_in_threadpool(media_service.store_picture, picture.file)
+        if not repos.users.update_profile_picture(user_data['id'], key):
+            raise ValueError("Profilový obrázek se nepodařilo uložit.")
+        media_service.schedule_thumbnail(key)
+        return RedirectResponse(url="/employee/profile?success=Profilový_obrázek_byl_nahrán.", status_code=status.HTTP_303_SEE_OTHER)
+
+    except ValueError as e:
+        error_message = str(e).replace(" ", "_")
+        return RedirectResponse(url=f"/employee/profile?error={error_message}", status_code=status.HTTP_303_SEE_OTHER)
+
+    finally:
+        await picture.close()
+
+
 #
 # PODÁNÍ NOVÉ ŽÁDOSTI O DOVOLENOU (POST)
 #
 @router.post("/request_vacation", response_class=RedirectResponse)
+@idempotent("request_vacation")
 async def submit_vacation_request(
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_employee_payload), 
     start_date: str = Form(...),
-    end_date: str = Form(...)
+    end_date: str = Form(...),
+    idempotency_key: Optional[str] = Form(None)
 ):
     user_email = payload['sub']
-    user_data = user_repo.get_user_by_email(conn, user_email)
+    user_data = repos.users.get_user_by_email(user_email)
 
     if not user_data:
         return RedirectResponse(url="/logout", status_code=status.HTTP_302_FOUND)
@@ -66,7 +109,7 @@ async def submit_vacation_request(
         request_data = VacationRequest(start_date=start_date, end_date=end_date)
         
         vacation_service.submit_new_vacation_request(
-            conn,
+            repos,
             user_id,
             request_data,
             remaining_days
@@ -88,6 +131,35 @@ async def submit_vacation_request(
         return RedirectResponse(url="/employee/profile?error=Neočekávaná_chyba_serveru_při_ukládání_žádosti.", status_code=status.HTTP_303_SEE_OTHER)
 
 
+#
+# NÁHLED ŽÁDOSTI PŘI VÝBĚRU DAT (JSON, nic nezapisuje)
+#
+@router.get("/quote")
+async def quote_vacation_request(
+    repos: Repositories = Depends(get_repositories),
+    payload: Dict[str, Any] = Depends(get_current_employee_payload),
+    start_date: str = Query(...),
+    end_date: str = Query(...),
+    request_id: Optional[int] = Query(None)
+):
+    user_data = repos.users.get_user_by_email(payload['sub'])
+
+    if not user_data:
+        return JSONResponse({"error": "Uživatel nenalezen."}, status_code=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        request_data = VacationRequest(start_date=start_date, end_date=end_date)
+    except ValidationError:
+        return JSONResponse({"error": "Neplatný formát datumu zadaný v žádosti."}, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    try:
+        quote = vacation_service.quote_vacation_request(repos, user_data, request_data, request_id)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=status.HTTP_404_NOT_FOUND)
+
+    return JSONResponse(quote, headers={"Cache-Control": "no-store"})
+
+
 #
 # ZOBRAZENÍ FORMULÁŘE PRO ÚPRAVU ŽÁDOSTI (GET)
 #
@@ -95,18 +167,18 @@ async def submit_vacation_request(
 async def edit_vacation_form(
     request: Request,
     request_id: int,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_employee_payload)
 ):
     user_email = payload['sub']
-    user_data = user_repo.get_user_by_email(conn, user_email)
+    user_data = repos.users.get_user_by_email(user_email)
 
     if not user_data:
         return RedirectResponse(url="/logout", status_code=status.HTTP_302_FOUND)
 
     user_id = user_data['id']
 
-    req_data = vacation_repo.get_vacation_request_by_id(conn, request_id)
+    req_data = repos.vacations.get_vacation_request_by_id(request_id)
 
     if not req_data or req_data['employee_id'] != user_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Žádost nenalezena nebo nepatří tomuto uživateli.")
@@ -128,16 +200,19 @@ async def edit_vacation_form(
 # ZPRACOVÁNÍ ÚPRAV ŽÁDOSTI (POST)
 #
 @router.post("/edit/{request_id}", response_class=RedirectResponse)
+@idempotent("edit_vacation")
 async def edit_vacation_request_submit(
     request_id: int,
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_employee_payload),
     start_date: str = Form(...),
-    end_date: str = Form(...)
+    end_date: str = Form(...),
+    version: Optional[int] = Form(None),
+    idempotency_key: Optional[str] = Form(None)
 ):
     user_email = payload['sub']
-    user_data = user_repo.get_user_by_email(conn, user_email)
+    user_data = repos.users.get_user_by_email(user_email)
 
     if not user_data:
         return RedirectResponse(url="/logout", status_code=status.HTTP_302_FOUND)
@@ -149,11 +224,12 @@ async def edit_vacation_request_submit(
         new_request_data = VacationRequest(start_date=start_date, end_date=end_date)
 
         vacation_service.edit_vacation_request(
-            conn,
+            repos,
             request_id,
             user_id,
             new_request_data,
-            remaining_days
+            remaining_days,
+            version
         )
         return RedirectResponse(
             url="/employee/profile?success=Žádost_byla_úspěšně_upravena.",
@@ -0,0 +1,27 @@
+# app/api/routers/health.py
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+import app.services.bootstrap_service as bootstrap_service
+
+router = APIRouter(tags=["Health"])
+
+
+#
+# ŽIVOST A PŘIPRAVENOST WORKERU (load balancer, orchestrátor)
+#
+@router.get("/healthz")
+async def healthz():
+    # Proces běží a smyčka událostí odpovídá; databáze se tu záměrně nekontroluje
+    return JSONResponse({"status": "ok"}, headers={"Cache-Control": "no-store"})
+
+@router.get("/readyz")
+async def readyz():
+    steps = bootstrap_service.readiness()
+    if steps is None:
+        return JSONResponse(
+            {"status": "starting", "steps": bootstrap_service.startup_steps()},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Cache-Control": "no-store"}
+        )
+    return JSONResponse({"status": "ready", "steps": steps}, headers={"Cache-Control": "no-store"})
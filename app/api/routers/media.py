@@ -0,0 +1,24 @@
+# app/api/routers/media.py
+
+import os
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+import app.services.media_service as media_service
+
+router = APIRouter(tags=["Media"])
+
+# Obsah pod daným klíčem se nikdy nemění (klíč je hash obsahu)
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+#
+# SOUBORY NAHRANÉ UŽIVATELI (profilové obrázky a jejich náhledy)
+#
+@router.get("/media/{key:path}")
+async def media_file(key: str):
+    if not media_service.KEY_PATTERN.match(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Soubor nenalezen.")
+    path = media_service.media_path(key)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Soubor nenalezen.")
+    return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE})
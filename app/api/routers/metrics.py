@@ -0,0 +1,34 @@
+# app/api/routers/metrics.py
+
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from app.api.dependencies import get_current_user_optional
+from app.core import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+#
+# EXPORT METRIK VE FORMÁTU PROMETHEUS
+#
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint(
+    request: Request,
+    payload: Optional[Dict[str, Any]] = Depends(get_current_user_optional)
+):
+    is_local = request.client is not None and request.client.host in LOCAL_HOSTS
+    is_admin = payload is not None and (payload.get('is_admin') == 1 or payload.get('is_super_admin') == 1)
+
+    if not is_local and not is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Přístup odepřen: Metriky jsou dostupné pouze administrátorům nebo z localhostu."
+        )
+
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -2,41 +2,68 @@
 
 from fastapi import APIRouter, Depends, Request, Form, status, Path
 from fastapi.responses import HTMLResponse, RedirectResponse
-import sqlite3
-from typing import Dict, Any, Optional
-from app.api.dependencies import get_db_conn, get_current_super_admin_payload
-import app.repositories.user_repo as user_repo
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Optional
+from app.api.dependencies import get_repositories, get_current_super_admin_payload
+from app.api.idempotency import idempotent
+from app.repositories.base import Repositories
 from pydantic import ValidationError
 from app.models.schemas import EmployeeCreateByAdmin
 from app.core.security import hash_password
+import app.services.user_service as user_service
+import app.services.session_service as session_service
+import app.services.audit_service as audit_service
+from app.utils.streaming import stream_template
 
 router = APIRouter(tags=["Super Admin"])
 
 
+def _search_page(request: Request) -> int:
+    try:
+        return max(1, int(request.query_params.get('page', 1)))
+    except ValueError:
+        return 1
+
+
 #
 # ZOBRAZENÍ SUPER ADMIN DASHBOARDU
 #
 @router.get("", response_class=HTMLResponse)
 async def super_admin_dashboard_page(
     request: Request,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_super_admin_payload)
 ):
     admin_email = payload['sub']
-    admin_data = user_repo.get_user_by_email(conn, admin_email)
+    admin_data = repos.users.get_user_by_email(admin_email)
     admin_name = admin_data.get('name', admin_email) if admin_data else admin_email
     
-    all_users = user_repo.get_all_users_for_admin_management(conn)
+    search_query = request.query_params.get('q', '').strip()
+    search_page = _search_page(request)
+    has_more_results = False
+    if search_query:
+        all_users, has_more_results = user_service.search_users(repos, search_query, search_page)
+    else:
+        # Celý seznam se streamuje: řádky se čtou z kurzoru až během odesílání stránky
+        all_users = repos.users.iter_users_for_admin_management()
     
     admin_days = admin_data.get('remaining_days', 0) if admin_data else 0
+    team_admins: Dict[int, List[Dict[str, Any]]] = {}
+    for row in repos.teams.get_team_admins():
+        team_admins.setdefault(row['team_id'], []).append(row)
 
     tpl = request.app.state.templates
-    return tpl.TemplateResponse("super_admin_dashboard.html", {
+    return stream_template(tpl, "super_admin_dashboard.html", {
         "request": request,
         "user_name": admin_name,
         "admin_email": admin_email,
         "remaining_days": admin_days,
         "users": all_users,
+        "teams": repos.teams.get_all_teams(),
+        "team_admins": team_admins,
+        "search_query": search_query,
+        "has_more_results": has_more_results,
+        "next_search_page": search_page + 1,
         "payload": payload,
         "error": request.query_params.get("error"),
         "success": request.query_params.get("success")
@@ -47,14 +74,16 @@ async def super_admin_dashboard_page(
 # VYTVOŘENÍ NOVÉHO UŽIVATELE S ROLÍ
 #
 @router.post("/create_user_with_role", status_code=status.HTTP_303_SEE_OTHER)
+@idempotent("create_user_with_role")
 async def create_new_user_with_role_submit(
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_super_admin_payload),
     name: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
     remaining_days: Optional[int] = Form(None),
-    role_choice: int = Form(1) # 1=Employee, 2=Admin, 3=Super Admin
+    role_choice: int = Form(1), # 1=Employee, 2=Admin, 3=Super Admin
+    idempotency_key: Optional[str] = Form(None)
 ):
     try:
         user_data = EmployeeCreateByAdmin(
@@ -67,7 +96,7 @@ async def create_new_user_with_role_submit(
         error_message = f"Chyba validace dat: {e}"
         return RedirectResponse(url=f"/super_admin?error={error_message.replace(' ', '_')}", status_code=status.HTTP_303_SEE_OTHER)
     
-    if user_repo.get_user_by_email(conn, user_data.email):
+    if repos.users.get_user_by_email(user_data.email):
         return RedirectResponse(url="/super_admin?error=Uživatel_s_tímto_emailem_již_existuje.", status_code=status.HTTP_303_SEE_OTHER)
 
     is_admin = role_choice >= 2
@@ -78,8 +107,7 @@ async def create_new_user_with_role_submit(
     hashed_password = hash_password(password)
 
     try:
-        new_user = user_repo.create_user(
-            conn, 
+        new_user = repos.users.create_user(
             user_data, 
             hashed_password, 
             is_admin=is_admin, 
@@ -101,9 +129,10 @@ async def create_new_user_with_role_submit(
 async def update_user_role_submit(
     request: Request,
     user_id: int,
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     payload: Dict[str, Any] = Depends(get_current_super_admin_payload),
-    role_choice: int = Form(..., description="Požadovaná role: 1, 2 nebo 3") 
+    role_choice: int = Form(..., description="Požadovaná role: 1, 2 nebo 3"),
+    version: Optional[int] = Form(None)
 ):
     
     is_admin = role_choice >= 2
@@ -115,13 +144,22 @@ async def update_user_role_submit(
         if user_id == current_user_id and not is_super_admin:
             raise ValueError("Nelze si odebrat vlastní práva Super Admina.")
 
-        updated = user_repo.update_user_roles(conn, user_id, is_admin, is_super_admin) 
+        target = repos.users.get_user_by_id(user_id)
+        updated = repos.users.update_user_roles(user_id, is_admin, is_super_admin, version) 
         
         if updated:
+            audit_service.record(
+                payload, audit_service.USER_ROLE_CHANGE, "user", user_id,
+                before=audit_service.user_roles(target) if target else None,
+                after={"is_admin": int(is_admin), "is_super_admin": int(is_super_admin)}
+            )
+            # Přihlášený uživatel musí dostat novou relaci s aktuálními rolemi
+            if user_id != current_user_id:
+                session_service.revoke_user_sessions(user_id)
             response = RedirectResponse(url="/super_admin?success=Úroveň_role_úspěšně_aktualizována.", 
                                         status_code=status.HTTP_303_SEE_OTHER)
         else:
-            response = RedirectResponse(url="/super_admin?error=Uživatel_nebyl_nalezen_nebo_role_nebyla_změněna.", 
+            response = RedirectResponse(url="/super_admin?error=Uživatel_nebyl_nalezen_nebo_byl_mezitím_změněn._Role_nebyla_změněna.", 
                                         status_code=status.HTTP_303_SEE_OTHER)
             
     except ValueError as e:
@@ -135,20 +173,102 @@ async def update_user_role_submit(
     return response
 
 
+#
+# AUDITNÍ LOG AKCÍ ADMINŮ
+#
+@router.get("/audit", response_class=HTMLResponse)
+async def audit_log_page(
+    request: Request,
+    payload: Dict[str, Any] = Depends(get_current_super_admin_payload)
+):
+    action = request.query_params.get('action') or None
+    if action not in audit_service.ACTION_LABELS:
+        action = None
+    try:
+        before_id = int(request.query_params['before']) if 'before' in request.query_params else None
+    except ValueError:
+        before_id = None
+
+    # Dopsání fronty auditu a dotaz čekají na databázi, smyčka událostí mezitím obsluhuje ostatní
+    entries, next_before = await run_in_threadpool(audit_service.get_page, before_id, action)
+
+    tpl = request.app.state.templates
+    return tpl.TemplateResponse("audit.html", {
+        "request": request,
+        "entries": entries,
+        "action": action or "",
+        "action_labels": audit_service.ACTION_LABELS,
+        "next_before": next_before,
+        "is_first_page": before_id is None,
+    })
+
+
 #
 # MAZÁNÍ UŽIVATELE
 #
 @router.post("/delete_user/{user_id}", status_code=status.HTTP_303_SEE_OTHER)
 async def delete_user_by_super_admin(
-    conn: sqlite3.Connection = Depends(get_db_conn),
+    repos: Repositories = Depends(get_repositories),
     user_id: int = Path(..., gt=0),
     payload: Dict[str, Any] = Depends(get_current_super_admin_payload),
 ):
     if user_id == payload.get('id'):
         return RedirectResponse(url="/super_admin?error=Nemůžete_smazat_sám_sebe.", status_code=status.HTTP_303_SEE_OTHER)
     
-    deleted = user_repo.delete_user(conn, user_id)
+    target = repos.users.get_user_by_id(user_id)
+    deleted = repos.users.delete_user(user_id)
     if deleted:
+        session_service.revoke_user_sessions(user_id)
+        audit_service.record(
+            payload, audit_service.USER_DELETE, "user", user_id,
+            before=audit_service.user_summary(target) if target else None
+        )
         return RedirectResponse(url="/super_admin?success=Uživatel_byl_úspěšně_smazán.", status_code=status.HTTP_303_SEE_OTHER)
     else:
-        return RedirectResponse(url="/super_admin?error=Chyba_při_mazání_uživatele.", status_code=status.HTTP_303_SEE_OTHER)
\ No newline at end of file
+        return RedirectResponse(url="/super_admin?error=Chyba_při_mazání_uživatele.", status_code=status.HTTP_303_SEE_OTHER)
+
+
+#
+# TÝMY (zaměstnanec patří do jednoho týmu, admin spravuje vybrané týmy)
+#
+@router.post("/create_team", status_code=status.HTTP_303_SEE_OTHER)
+async def create_team_submit(
+    repos: Repositories = Depends(get_repositories),
+    payload: Dict[str, Any] = Depends(get_current_super_admin_payload),
+    name: str = Form(...)
+):
+    try:
+        user_service.create_team(repos, name)
+        return RedirectResponse(url="/super_admin?success=Tým_byl_založen.", status_code=status.HTTP_303_SEE_OTHER)
+    except ValueError as e:
+        error_message = str(e).replace(" ", "_")
+        return RedirectResponse(url=f"/super_admin?error={error_message}", status_code=status.HTTP_303_SEE_OTHER)
+
+@router.post("/assign_team", status_code=status.HTTP_303_SEE_OTHER)
+async def assign_team_submit(
+    repos: Repositories = Depends(get_repositories),
+    payload: Dict[str, Any] = Depends(get_current_super_admin_payload),
+    email: str = Form(...),
+    team_id: int = Form(...),
+    as_admin: int = Form(0)
+):
+    try:
+        if as_admin == 1:
+            user_service.assign_admin_to_team(repos, email, team_id)
+        else:
+            user_service.assign_user_to_team(repos, email, team_id)
+        return RedirectResponse(url="/super_admin?success=Uživatel_byl_přiřazen_do_týmu.", status_code=status.HTTP_303_SEE_OTHER)
+    except ValueError as e:
+        error_message = str(e).replace(" ", "_")
+        return RedirectResponse(url=f"/super_admin?error={error_message}", status_code=status.HTTP_303_SEE_OTHER)
+
+@router.post("/remove_team_admin/{team_id}/{admin_id}", status_code=status.HTTP_303_SEE_OTHER)
+async def remove_team_admin_submit(
+    repos: Repositories = Depends(get_repositories),
+    team_id: int = Path(..., gt=0),
+    admin_id: int = Path(..., gt=0),
+    payload: Dict[str, Any] = Depends(get_current_super_admin_payload),
+):
+    if repos.teams.unassign_admin(admin_id, team_id):
+        return RedirectResponse(url="/super_admin?success=Admin_byl_odebrán_z_týmu.", status_code=status.HTTP_303_SEE_OTHER)
+    return RedirectResponse(url="/super_admin?error=Admin_tento_tým_nespravuje.", status_code=status.HTTP_303_SEE_OTHER)
@@ -0,0 +1,51 @@
+# app/cli/archive.py
+"""
+Archivace uzavřených žádostí o dovolenou do ročních databází.
+
+    python -m app.cli.archive --older-than-days 365
+    python -m app.cli.archive --before 2024-01-01 --dry-run
+
+Zamítnuté a schválené žádosti, které skončily před hranicí, se přesunou
+z tabulky vacations do souborů ARCHIVE_DIR/vacations-<rok podání>.db.
+Historie zaměstnance do archivů nahlíží až při stránkování za aktuální záznamy.
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from typing import Optional, List
+from app.core.config import settings
+from app.models.db import open_conn
+import app.repositories.archive_repo as archive_repo
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Archivace uzavřených dovolených.")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                        help="Archivovat žádosti, které skončily před více než N dny.")
+    parser.add_argument("--before", type=date.fromisoformat, help="Pevná hranice (YYYY-MM-DD) místo --older-than-days.")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--dry-run", action="store_true", help="Jen vypíše počet záznamů k archivaci.")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    cutoff = args.before or date.today() - timedelta(days=args.older_than_days)
+
+    with open_conn() as conn:
+        if args.dry_run:
+            print(f"K archivaci (konec před {cutoff.isoformat()}): {archive_repo.count_archivable(conn, cutoff)} žádostí")
+            return 0
+
+        started = time.perf_counter()
+        moved = archive_repo.archive_closed_vacations(conn, cutoff, args.batch_size)
+
+    for year in sorted(moved):
+        print(f"{archive_repo.archive_path(year)}: {moved[year]} žádostí")
+    print(f"Archivováno celkem {sum(moved.values())} žádostí za {time.perf_counter() - started:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# app/cli/backup.py
+"""
+Záloha databáze za běhu aplikace.
+
+    python -m app.cli.backup
+    python -m app.cli.backup --compress --keep 30
+    python -m app.cli.backup --verify app/data/backups/vacation-20250101-030000.db.gz
+
+Kopie vzniká přes online backup API SQLite po BACKUP_PAGES_PER_STEP stránkách
+s pauzou BACKUP_STEP_SLEEP_MS mezi kroky, před uložením se ověří PRAGMA integrity_check.
+Vhodné pro cron; s BACKUP_INTERVAL_MINUTES > 0 zálohuje i samotná aplikace.
+"""
+
+import argparse
+import sys
+from typing import Optional, List
+from app.core.config import settings
+import app.services.backup_service as backup_service
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Záloha databáze za běhu.")
+    parser.add_argument("--dir", default=settings.BACKUP_DIR, help="Adresář se zálohami.")
+    parser.add_argument("--keep", type=int, default=settings.BACKUP_KEEP,
+                        help="Počet ponechaných záloh (0 = ponechat vše).")
+    parser.add_argument("--compress", action="store_true", default=settings.BACKUP_COMPRESS,
+                        help="Uložit zálohu jako .db.gz.")
+    parser.add_argument("--verify", metavar="PATH", help="Jen ověří integritu existující zálohy.")
+    parser.add_argument("--list", action="store_true", help="Vypíše existující zálohy.")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.verify:
+        try:
+            backup_service.verify_snapshot(args.verify)
+        except (ValueError, OSError) as error:
+            print(f"CHYBA: {error}", file=sys.stderr)
+            return 1
+        print(f"{args.verify}: integrita v pořádku")
+        return 0
+
+    if args.list:
+        for path in backup_service.list_snapshots(args.dir):
+            print(path)
+        return 0
+
+    result = backup_service.create_snapshot(directory=args.dir, compress=args.compress, keep=args.keep)
+    if result is None:
+        print("Zálohu právě vytváří jiný proces.", file=sys.stderr)
+        return 1
+
+    print(f"{result['path']}: {result['bytes']} B, {result['pages']} stránek za {result['seconds']:.2f} s")
+    for path in result['removed']:
+        print(f"Smazána stará záloha {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
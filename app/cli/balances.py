@@ -0,0 +1,47 @@
+# app/cli/balances.py
+"""
+Kontrola a přepočet zůstatků dovolené podle knihy pohybů.
+
+    python -m app.cli.balances check
+    python -m app.cli.balances rebuild
+
+Kniha balance_ledger je zdrojem pravdy, sloupec users.remaining_days je jen
+přírůstkově udržovaný snímek. "check" vypíše uživatele, u nichž se snímek
+liší od součtu pohybů, "rebuild" snímky přepočítá.
+"""
+
+import argparse
+import sys
+from typing import Optional, List
+from app.models.db import open_conn
+from app.models import cache_sync
+import app.repositories.ledger_repo as ledger_repo
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Kontrola zůstatků dovolené podle knihy pohybů.")
+    parser.add_argument("command", choices=("check", "rebuild"))
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    with open_conn() as conn:
+        mismatches = ledger_repo.find_balance_mismatches(conn)
+        for row in mismatches:
+            print(f"{row['email']}: snímek {row['remaining_days']}, kniha {row['ledger_balance']}")
+
+        if args.command == "check":
+            print(f"Nesouhlasí {len(mismatches)} zůstatků")
+            return 1 if mismatches else 0
+
+        updated = ledger_repo.rebuild_balances(conn)
+        if updated:
+            cache_sync.bump(conn, (cache_sync.USERS,))
+        conn.commit()
+    print(f"Přepočteno {updated} zůstatků")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# app/cli/seed.py
+"""
+Rychlé generování syntetické databáze pro testy ve velkém měřítku.
+
+    python -m app.cli.seed --db app/data/seed.db --employees 100000 --vacations 1000000 --seed 42
+
+Data jsou deterministická podle --seed. Všichni uživatelé mají stejné heslo
+(--password), jehož bcrypt hash se spočítá jen jednou.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date
+from typing import Dict, Any, Iterator, Tuple, Optional, List
+from app.core.security import hash_password
+from app.models.db import init_schema, create_indexes, LEDGER_BACKFILL_SQL, ADDED_INDEXES
+
+DEFAULT_PASSWORD = "test_password"
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+FIRST_NAMES = [
+    "Jan", "Petr", "Jiří", "Pavel", "Tomáš", "Martin", "Josef", "Lukáš", "Jakub", "David",
+    "Eva", "Jana", "Hana", "Lucie", "Věra", "Žaneta", "Tereza", "Kateřina", "Marie", "Zuzana",
+]
+LAST_NAMES = [
+    "Novák", "Svoboda", "Dvořák", "Černý", "Procházka", "Kučera", "Veselý", "Horák", "Němec", "Říha",
+    "Marek", "Pokorný", "Hájek", "Král", "Jelínek", "Růžička", "Beneš", "Fiala", "Sedláček", "Zeman",
+]
+FIXED_ACCOUNTS = [
+    # email, is_admin, is_super_admin, name
+    ("superadmin@example.com", 0, 1, "Super Admin"),
+    ("admin@example.com", 1, 0, "Admin"),
+    ("employee@example.com", 0, 0, "Testovací Zaměstnanec"),
+]
+
+
+#
+# POMOCNÉ VÝPOČTY
+#
+def _weekdays_up_to(ordinal: int) -> int:
+    # Ordinál 1 (1. 1. 0001) je pondělí
+    full_weeks, rest = divmod(ordinal, 7)
+    return full_weeks * 5 + min(rest, 5)
+
+def working_days_between(start_ordinal: int, end_ordinal: int) -> int:
+    return _weekdays_up_to(end_ordinal) - _weekdays_up_to(start_ordinal - 1)
+
+def _ascii(text: str) -> str:
+    table = str.maketrans("áčďéěíňóřšťúůýžÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ", "acdeeinorstuuyzACDEEINORSTUUYZ")
+    return text.translate(table).lower()
+
+
+#
+# GENERÁTORY ŘÁDKŮ
+#
+def generate_users(rng: random.Random, employees: int, hashed: str) -> Iterator[Tuple]:
+    user_id = 0
+    for email, is_admin, is_super_admin, name in FIXED_ACCOUNTS:
+        user_id += 1
+        yield (user_id, email, hashed, is_admin, is_super_admin, rng.randint(5, 25), name)
+
+    admins = max(1, employees // 50)
+    for i in range(employees):
+        user_id += 1
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f"{_ascii(first)}.{_ascii(last)}.{i}@example.com"
+        is_admin = 1 if i < admins else 0
+        yield (user_id, email, hashed, is_admin, 0, rng.randint(0, 25), f"{first} {last}")
+
+def generate_vacations(
+    rng: random.Random,
+    employee_ids: List[int],
+    total_vacations: int,
+    today: date
+) -> Iterator[Tuple]:
+    today_ordinal = today.toordinal()
+    per_employee, remainder = divmod(total_vacations, len(employee_ids))
+    random_float = rng.random
+    iso_cache: Dict[int, str] = {}
+
+    def iso(ordinal: int) -> str:
+        value = iso_cache.get(ordinal)
+        if value is None:
+            value = iso_cache[ordinal] = date.fromordinal(ordinal).isoformat()
+        return value
+
+    for index, employee_id in enumerate(employee_ids):
+        count = per_employee + (1 if index < remainder else 0)
+        cursor = today_ordinal - 30 * max(count - 2, 0)
+        for i in range(count):
+            # random() je výrazně rychlejší než randint() a stále deterministické
+            start = cursor + 3 + int(random_float() * 48)
+            weekday = (start - 1) % 7
+            if weekday >= 5:
+                start += 7 - weekday
+            end = start + int(random_float() * 10)
+            cursor = end + 1
+
+            if i >= count - 2:
+                status = "Pending"
+            elif end < today_ordinal:
+                status = "Approved" if random_float() < 0.85 else "Rejected"
+            else:
+                status = "Approved"
+
+            submitted_at = (start - 5 - int(random_float() * 36) - EPOCH_ORDINAL) * SECONDS_PER_DAY
+            # Rozhodnutí do tří dnů od podání (reporty doby vyřízení)
+            decided_at = None if status == "Pending" else str(submitted_at + 3600 + int(random_float() * 3 * SECONDS_PER_DAY))
+            yield (
+                employee_id,
+                iso(start),
+                iso(end),
+                working_days_between(start, end),
+                status,
+                str(submitted_at),
+                decided_at,
+            )
+
+
+#
+# NAPLNĚNÍ DATABÁZE
+#
+def seed_database(
+    path: str,
+    employees: int = 200,
+    vacations: int = 2000,
+    seed: int = 42,
+    password: str = DEFAULT_PASSWORD,
+    overwrite: bool = True,
+    teams: int = 0
+) -> Dict[str, Any]:
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"Databáze {path} již existuje.")
+        os.remove(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    hashed = hash_password(password)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")
+        init_schema(conn, with_indexes=False)
+
+        conn.execute("BEGIN")
+        users = list(generate_users(rng, employees, hashed))
+        conn.executemany(
+            "INSERT INTO users (id, email, hashed_password, is_admin, is_super_admin, remaining_days, name) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            users
+        )
+        conn.execute(LEDGER_BACKFILL_SQL)
+        if teams:
+            # Zaměstnanci i admini se rozdělí do týmů rovnoměrně podle id
+            conn.executemany("INSERT INTO teams (id, name) VALUES (?, ?)", ((i, f"Tým {i}") for i in range(1, teams + 1)))
+            conn.execute("UPDATE users SET team_id = (id % ?) + 1 WHERE is_admin = 0 AND is_super_admin = 0", (teams,))
+            conn.execute("INSERT INTO admin_teams (admin_id, team_id) SELECT id, (id % ?) + 1 FROM users WHERE is_admin = 1", (teams,))
+        employee_ids = [row[0] for row in users if row[3] == 0 and row[4] == 0]
+        vacation_rows = 0
+        if vacations and employee_ids:
+            cursor = conn.executemany(
+                "INSERT INTO vacations (employee_id, start_date, end_date, total_days, status, submitted_at, decided_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                generate_vacations(rng, employee_ids, vacations, date.today())
+            )
+            vacation_rows = cursor.rowcount
+        conn.execute("COMMIT")
+        loaded = time.perf_counter()
+
+        create_indexes(conn)
+        for statement in ADDED_INDEXES:
+            conn.execute(statement)
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+
+    return {
+        "path": path,
+        "seed": seed,
+        "users": len(users),
+        "teams": teams,
+        "vacations": vacation_rows,
+        "load_seconds": round(loaded - started, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+#
+# PŘÍKAZOVÁ ŘÁDKA
+#
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generátor syntetické databáze dovolených.")
+    parser.add_argument("--db", default="app/data/seed.db", help="Cílový soubor databáze.")
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--vacations", type=int, default=1_000_000, help="Celkový počet žádostí o dovolenou.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Heslo všech vygenerovaných uživatelů.")
+    parser.add_argument("--teams", type=int, default=0, help="Počet týmů (0 = bez týmů, admini vidí celou firmu).")
+    parser.add_argument("--force", action="store_true", help="Přepsat existující databázi.")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        summary = seed_database(
+            args.db, args.employees, args.vacations, args.seed, args.password, overwrite=args.force, teams=args.teams
+        )
+    except FileExistsError as e:
+        sys.stderr.write(f"{e} Použijte --force pro přepsání.\n")
+        return 1
+
+    print(
+        f"{summary['path']}: {summary['users']} uživatelů, {summary['vacations']} dovolených "
+        f"(načtení {summary['load_seconds']} s, celkem {summary['total_seconds']} s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
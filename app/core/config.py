@@ -9,10 +9,100 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
 
+    #
+    # RELACE NA SERVERU (místo JWT v cookie)
+    #
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "jwt") # "jwt" nebo "server"
+    SESSION_IDLE_MINUTES: int = int(os.getenv("SESSION_IDLE_MINUTES", str(60 * 24)))
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+    SESSION_CACHE_TTL_SECONDS: float = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "15"))
+    SESSION_FLUSH_SECONDS: float = float(os.getenv("SESSION_FLUSH_SECONDS", "30"))
+
     #
     # KONFIGURACE DATABÁZE A SLUŽEB
     #
     DEFAULT_VACATION_DAYS: int = 20
     DB_PATH: str = os.getenv("DB_PATH", "app/data/vacation.db")
+    EMAIL_ENABLED: bool = os.getenv("EMAIL_ENABLED", "1") == "1"
+    REPOSITORY_BACKEND: str = os.getenv("REPOSITORY_BACKEND", "sqlite") # "sqlite" nebo "memory" (testy, benchmarky)
+
+    #
+    # PŘIPOJENÍ K DATABÁZI A SOUDRŽNOST CACHE MEZI WORKERY
+    #
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "8"))
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_JOURNAL_MODE: str = os.getenv("DB_JOURNAL_MODE", "") # např. "WAL" (výchozí v produkčním režimu)
+    DB_BUSY_RETRIES: int = int(os.getenv("DB_BUSY_RETRIES", "5"))
+    DB_BUSY_BACKOFF_MS: float = float(os.getenv("DB_BUSY_BACKOFF_MS", "10"))
+    CACHE_SYNC_INTERVAL_MS: float = float(os.getenv("CACHE_SYNC_INTERVAL_MS", "100"))
+
+    #
+    # ARCHIV UZAVŘENÝCH DOVOLENÝCH
+    #
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "app/data/archive")
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    HISTORY_PAGE_SIZE: int = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+    SEARCH_PAGE_SIZE: int = int(os.getenv("SEARCH_PAGE_SIZE", "50"))
+
+    #
+    # PROFILOVÉ OBRÁZKY
+    #
+    MEDIA_DIR: str = os.getenv("MEDIA_DIR", "app/data/media")
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+    THUMBNAIL_SIZE: int = int(os.getenv("THUMBNAIL_SIZE", "256"))
+    THUMBNAIL_WORKERS: int = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+    #
+    # ZÁLOHY DATABÁZE (online backup API)
+    #
+    BACKUP_DIR: str = os.getenv("BACKUP_DIR", "app/data/backups")
+    BACKUP_INTERVAL_MINUTES: float = float(os.getenv("BACKUP_INTERVAL_MINUTES", "0")) # 0 = plánovač vypnutý
+    BACKUP_KEEP: int = int(os.getenv("BACKUP_KEEP", "7"))
+    BACKUP_COMPRESS: bool = os.getenv("BACKUP_COMPRESS", "0") == "1"
+    BACKUP_PAGES_PER_STEP: int = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+    BACKUP_STEP_SLEEP_MS: float = float(os.getenv("BACKUP_STEP_SLEEP_MS", "50"))
+
+    #
+    # AUDITNÍ LOG AKCÍ ADMINŮ (zápis na pozadí po dávkách)
+    #
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_PAGE_SIZE: int = int(os.getenv("AUDIT_PAGE_SIZE", "50"))
+
+    #
+    # OCHRANA PROTI DVOJÍMU ODESLÁNÍ FORMULÁŘŮ (paměť workeru)
+    #
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+    #
+    # PROFILOVÁNÍ JEDNOTLIVÝCH POŽADAVKŮ (na vyžádání Super Admina)
+    #
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "app/data/profiles")
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_MAX_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+    PROFILE_MAX_BYTES: int = int(os.getenv("PROFILE_MAX_BYTES", str(1024 * 1024)))
+    PROFILE_MIN_INTERVAL_SECONDS: float = float(os.getenv("PROFILE_MIN_INTERVAL_SECONDS", "10"))
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "50"))
+
+    #
+    # LOGOVÁNÍ
+    #
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "") # např. "app.sql=0.01,app.access=0.1"
+
+    #
+    # DIAGNOSTIKA SQL (volitelné instrumentované připojení)
+    #
+    SQL_INSTRUMENTATION: bool = os.getenv("SQL_INSTRUMENTATION", "0") == "1"
+    SQL_SLOW_QUERY_MS: float = float(os.getenv("SQL_SLOW_QUERY_MS", "50"))
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+    #
+    # KAPACITA SOUBĚŽNÝCH ABSENCÍ (0 = bez omezení)
+    #
+    MAX_CONCURRENT_ABSENCES: int = int(os.getenv("MAX_CONCURRENT_ABSENCES", "0"))
+    ABSENCE_GROUP_LIMITS: str = os.getenv("ABSENCE_GROUP_LIMITS", "") # např. "employee:3,admin:1"
     
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,160 @@
+# app/core/log.py
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core import metrics
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_traceback_formatter = logging.Formatter()
+_STANDARD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "request_id"}
+
+
+#
+# FORMÁT JSON
+#
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+#
+# FILTRY (korelace požadavku, vzorkování)
+#
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Z hlučných loggerů propouští jen každý N-tý záznam pod úrovní WARNING."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {name: max(1, round(1 / rate)) for name, rate in rates.items() if rate > 0}
+        self.dropped_names = {name for name, rate in rates.items() if rate <= 0}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _match(self, name: str) -> Optional[str]:
+        for prefix in list(self.every) + list(self.dropped_names):
+            if name == prefix or name.startswith(prefix + "."):
+                return prefix
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        prefix = self._match(record.name)
+        if prefix is None:
+            return True
+        if prefix in self.dropped_names:
+            return False
+        with self._lock:
+            count = self._counters.get(prefix, 0)
+            self._counters[prefix] = count + 1
+        return count % self.every[prefix] == 0
+
+
+def parse_sampling(raw: str) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+#
+# OMEZENÁ FRONTA (při zaplnění se záznamy zahazují a počítají)
+#
+class BoundedQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Zpráva a traceback se vyhodnotí ve vlákně volajícího, extra pole zůstávají
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+
+#
+# NASTAVENÍ PIPELINE
+#
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+_setup_lock = threading.Lock()
+
+def setup_logging() -> None:
+    """Idempotentní v rámci procesu; po forku (gunicorn preload) znovu, vlákno listeneru fork nepřežije."""
+    global _listener, _listener_pid
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter())
+
+        handler = BoundedQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+        handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(settings.LOG_LEVEL)
+
+        _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        if _listener_pid is None:
+            atexit.register(shutdown_logging)
+        _listener_pid = os.getpid()
+
+def shutdown_logging() -> None:
+    global _listener
+    with _setup_lock:
+        if _listener is None or _listener_pid != os.getpid():
+            return
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,224 @@
+# app/core/metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Tuple, List, Optional, Iterator
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+LONG_BUCKETS = (1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+#
+# ZÁKLADNÍ TYPY METRIK
+#
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        # Série: [počty v jednotlivých košících..., +Inf, součet]
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[labels] = series
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, labels: LabelValues = ()) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + (str(bound),))} {cumulative}"
+                )
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + ('+Inf',))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+#
+# REGISTR METRIK APLIKACE
+#
+HTTP_REQUEST_DURATION = Histogram(
+    "dovolena_http_request_duration_seconds", "Doba zpracování HTTP požadavku.", ("method", "route")
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "dovolena_http_requests_total", "Počet HTTP požadavků podle výsledného stavu.", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "dovolena_http_requests_in_flight", "Počet právě zpracovávaných HTTP požadavků."
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "dovolena_db_queries_per_request", "Počet SQL dotazů během jednoho požadavku.", ("route",), COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "dovolena_db_time_per_request_seconds", "Celkový čas strávený v databázi během jednoho požadavku.", ("route",)
+)
+DB_QUERIES_TOTAL = Counter(
+    "dovolena_db_queries_total", "Celkový počet SQL dotazů."
+)
+DB_BUSY_RETRIES_TOTAL = Counter(
+    "dovolena_db_busy_retries_total", "Počet opakování zápisu po obsazené databázi (SQLITE_BUSY)."
+)
+EMAIL_RENDER_DURATION = Histogram(
+    "dovolena_email_render_seconds", "Doba vykreslení e-mailové šablony."
+)
+EMAIL_SEND_DURATION = Histogram(
+    "dovolena_email_send_seconds", "Doba odeslání e-mailu přes SMTP.", ("outcome",)
+)
+LOG_RECORDS_DROPPED = Counter(
+    "dovolena_log_records_dropped_total", "Počet logovacích záznamů zahozených kvůli plné frontě."
+)
+AUDIT_BATCH_SIZE = Histogram(
+    "dovolena_audit_batch_size", "Počet auditních záznamů zapsaných jedním executemany.", (), (1, 5, 20, 100, 500, 2000)
+)
+AUDIT_ENTRIES_DROPPED = Counter(
+    "dovolena_audit_entries_dropped_total", "Auditní záznamy zahozené kvůli plné frontě (zůstanou jen v logu)."
+)
+BACKUP_DURATION = Histogram(
+    "dovolena_backup_duration_seconds", "Doba vytvoření zálohy databáze podle výsledku.", ("result",), LONG_BUCKETS
+)
+BACKUP_SIZE_BYTES = Gauge(
+    "dovolena_backup_size_bytes", "Velikost poslední zálohy databáze na disku."
+)
+BACKUP_LAST_SUCCESS = Gauge(
+    "dovolena_backup_last_success_timestamp_seconds", "Čas poslední úspěšné zálohy (Unix)."
+)
+STARTUP_STEP_SECONDS = Gauge(
+    "dovolena_startup_step_seconds", "Doba jednotlivých kroků startu workeru (total = celý start).", ("step",)
+)
+PROFILES_TOTAL = Counter(
+    "dovolena_request_profiles_total", "Vyžádané profily požadavků podle výsledku.", ("result",)
+)
+
+REGISTRY: List = [
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_TOTAL,
+    HTTP_REQUESTS_IN_FLIGHT,
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    DB_QUERIES_TOTAL,
+    DB_BUSY_RETRIES_TOTAL,
+    EMAIL_RENDER_DURATION,
+    EMAIL_SEND_DURATION,
+    LOG_RECORDS_DROPPED,
+    AUDIT_BATCH_SIZE,
+    AUDIT_ENTRIES_DROPPED,
+    BACKUP_DURATION,
+    BACKUP_SIZE_BYTES,
+    BACKUP_LAST_SUCCESS,
+    PROFILES_TOTAL,
+    STARTUP_STEP_SECONDS,
+]
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+#
+# STATISTIKY AKTUÁLNÍHO POŽADAVKU
+#
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def begin_request() -> RequestStats:
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+def record_db_time(seconds: float, is_query: bool = True) -> None:
+    if is_query:
+        DB_QUERIES_TOTAL.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        if is_query:
+            stats.db_queries += 1
+        stats.db_seconds += seconds
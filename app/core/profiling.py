@@ -0,0 +1,154 @@
+# app/core/profiling.py
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+PROFILE_SUFFIX = ".folded"
+META_SUFFIX = ".json"
+# Ochrana před nekonečnou rekurzí v zásobníku (jeden řádek souboru = jeden vzorek)
+MAX_STACK_DEPTH = 200
+
+_cwd = os.getcwd() + os.sep
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_cwd):
+        filename = filename[len(_cwd):]
+    else:
+        # Knihovny: stačí cesta od site-packages / lib
+        filename = re.sub(r"^.*[/\\](site-packages|dist-packages|lib)[/\\]", "", filename)
+    # Středník odděluje rámce ve formátu collapsed stacks
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+#
+# VZORKOVÁNÍ ZÁSOBNÍKU JEDNOHO VLÁKNA (formát collapsed stacks pro flame graph)
+#
+class StackSampler:
+    """
+    Vlákno na pozadí každých interval sekund přečte zásobník sledovaného vlákna.
+    Požadavek běží ve smyčce událostí, vzorky proto zachytí i souběžné požadavky
+    a čekání smyčky (select) – to je čas, kdy požadavek čekal.
+    """
+
+    def __init__(self, thread_id: int, interval: float, max_seconds: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: "Counter[str]" = Counter()
+        self.truncated = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        stack: List[str] = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                self.truncated = True
+                break
+            self._sample()
+
+    def stop(self) -> "Counter[str]":
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+#
+# OMEZENÍ ČETNOSTI (jeden profilovaný požadavek na worker, minimální odstup)
+#
+_lock = threading.Lock()
+_active = False
+_last_started = 0.0
+
+def try_acquire() -> bool:
+    global _active, _last_started
+    now = time.monotonic()
+    with _lock:
+        elapsed = now - _last_started if _last_started else None
+        # Profil, který se nikdy nedokončil (spojení přerušené před odesláním těla), po limitu neblokuje
+        if _active and elapsed is not None and elapsed < settings.PROFILE_MAX_SECONDS + settings.PROFILE_MIN_INTERVAL_SECONDS:
+            return False
+        if elapsed is not None and elapsed < settings.PROFILE_MIN_INTERVAL_SECONDS:
+            return False
+        _active = True
+        _last_started = now
+        return True
+
+def release() -> None:
+    global _active
+    with _lock:
+        _active = False
+
+
+#
+# ULOŽENÍ PROFILU (omezená velikost a počet souborů)
+#
+def profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return f"{stamp}-{method.lower()}-{slug[:60]}"
+
+def list_profiles(directory: Optional[str] = None) -> List[str]:
+    """Uložené profily od nejnovějšího (cesty k souborům .folded)."""
+    directory = directory or settings.PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((name for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX)), reverse=True)
+    return [os.path.join(directory, name) for name in names]
+
+def _prune(directory: str) -> None:
+    if settings.PROFILE_KEEP <= 0:
+        return
+    for path in list_profiles(directory)[settings.PROFILE_KEEP:]:
+        for target in (path, path[:-len(PROFILE_SUFFIX)] + META_SUFFIX):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+
+def save_profile(name: str, samples: "Counter[str]", meta: Dict[str, Any]) -> str:
+    """Zapíše <name>.folded (flamegraph.pl, speedscope, inferno) a <name>.json s metadaty."""
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    lines, size = [], 0
+    meta = dict(meta, samples=sum(samples.values()), stacks=len(samples), truncated_bytes=False)
+    # Nejčastější zásobníky první; při překročení limitu odpadnou jen ty vzácné
+    for stack, count in samples.most_common():
+        line = f"{stack} {count}\n"
+        size += len(line.encode())
+        if size > settings.PROFILE_MAX_BYTES:
+            meta["truncated_bytes"] = True
+            break
+        lines.append(line)
+
+    path = os.path.join(directory, name + PROFILE_SUFFIX)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    os.replace(path + ".part", path)
+    with open(os.path.join(directory, name + META_SUFFIX), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    _prune(directory)
+    return path
@@ -1,5 +1,7 @@
 # app/core/security.py
 
+import hashlib
+import hmac
 import time
 import bcrypt
 from jose import jwt, JWTError
@@ -38,4 +40,15 @@ def decode_access_token(token: str) -> dict:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError: 
-        raise ValueError("Neplatný nebo vypršelý token")
\ No newline at end of file
+        raise ValueError("Neplatný nebo vypršelý token")
+
+
+#
+# TOKENY KALENDÁŘOVÝCH FEEDŮ (odvozené ze SECRET_KEY, neukládají se)
+#
+def create_feed_token(scope: str) -> str:
+    digest = hmac.new(settings.SECRET_KEY.encode(), f"calendar-feed:{scope}".encode(), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+def verify_feed_token(scope: str, token: str) -> bool:
+    return hmac.compare_digest(create_feed_token(scope), token)
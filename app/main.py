@@ -8,10 +8,25 @@ from app.api.routers import auth as auth_router
 from app.api.routers import employees as employees_router
 from app.api.routers import admin as admin_router
 from app.api.routers import super_admin as super_admin_router
+from app.api.routers import metrics as metrics_router
+from app.api.routers import media as media_router
+from app.api.routers import calendar as calendar_router
+from app.api.routers import health as health_router
 from app.api.error_handlers import setup_error_handlers
+from app.api.middleware import setup_middleware
+from app.api.idempotency import new_token as new_idempotency_token
+from app.core.log import setup_logging, shutdown_logging
+from app.models import db, cache_sync
+from contextlib import asynccontextmanager
 import os
-from app.core.security import decode_access_token
+from app.services.session_service import decode_token
 from app.utils.jinja2_filters import format_date_czech
+import app.services.media_service as media_service
+import app.services.backup_service as backup_service
+import app.services.calendar_service as calendar_service
+import app.services.session_service as session_service
+import app.services.audit_service as audit_service
+import app.services.bootstrap_service as bootstrap_service
 
 
 #
@@ -35,7 +50,7 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
     token = request.cookies.get("access_token")
     if token:
         try:
-            payload = decode_access_token(token)
+            payload = decode_token(token)
             if payload.get('is_admin') == 1:
                 is_admin = True
             if payload.get('is_super_admin') == 1:
@@ -59,22 +74,52 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
+#
+# START A UKONČENÍ WORKERU
+#
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Po forku workeru (gunicorn preload) neběží vlákno listeneru logů z hlavního procesu
+    setup_logging()
+    bootstrap_service.run(app.state.templates.env)
+    backup_service.start_scheduler()
+    yield
+    bootstrap_service.mark_not_ready()
+    backup_service.stop_scheduler()
+    media_service.shutdown_executor()
+    # Zapisovače při ukončení dopíší frontu přes pool, ten se proto zavírá až po nich
+    session_service.shutdown_writer()
+    audit_service.shutdown_writer()
+    cache_sync.get_watcher().close()
+    db.close_pool()
+    shutdown_logging()
+
+
 #
 # TVORBA A KONFIGURACE APLIKACE
 #
 def create_app() -> FastAPI:
-    app = FastAPI(title="Dovolená - aplikace")
+    setup_logging()
+    app = FastAPI(title="Dovolená - aplikace", lifespan=lifespan)
 
     app.add_exception_handler(HTTPException, custom_http_exception_handler)
     setup_error_handlers(app)
+    setup_middleware(app)
     app.state.ENV = os.environ.get("ENV", "development")
     
     app.mount("/static", StaticFiles(directory="app/static"), name="static")
     
     app.state.templates = Jinja2Templates(directory="app/templates")
     app.state.templates.env.filters['date_cz'] = format_date_czech
+    app.state.templates.env.globals['profile_picture_url'] = media_service.picture_url
+    app.state.templates.env.globals['calendar_feed_url'] = calendar_service.feed_path
+    app.state.templates.env.globals['idempotency_token'] = new_idempotency_token
 
     app.include_router(auth_router.router)
+    app.include_router(metrics_router.router)
+    app.include_router(health_router.router)
+    app.include_router(media_router.router)
+    app.include_router(calendar_router.router)
     app.include_router(super_admin_router.router, prefix="/super_admin")
     app.include_router(employees_router.router, prefix="/employee") 
     app.include_router(admin_router.router, prefix="/admin") 
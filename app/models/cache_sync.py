@@ -0,0 +1,94 @@
+# app/models/cache_sync.py
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from app.core.config import settings
+
+#
+# OBLASTI CACHE (zapisovatelé zvyšují verzi, čtenáři podle ní zneplatňují)
+#
+USERS = "users"
+VACATIONS = "vacations"
+# Schválené dovolené a údaje uživatelů, které se zobrazují s nimi (jméno, e-mail, tým)
+APPROVED_VACATIONS = "approved_vacations"
+SESSIONS = "sessions"
+
+CACHE_VERSIONS_SQL = """
+CREATE TABLE IF NOT EXISTS cache_versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+#
+# ZÁPIS: ZVÝŠENÍ VERZE V RÁMCI TRANSAKCE ZAPISOVATELE
+#
+def bump(conn: sqlite3.Connection, scopes: Iterable[str]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO cache_versions (scope, version) VALUES (?, 1)
+        ON CONFLICT(scope) DO UPDATE SET version = version + 1
+        """,
+        [(scope,) for scope in scopes]
+    )
+
+
+#
+# ČTENÍ: SLEDOVÁNÍ VERZÍ NAPŘÍČ PROCESY
+#
+class VersionWatcher:
+    """Vlastní připojení procesu; tabulku verzí čte jen když se změní PRAGMA data_version."""
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.pid = os.getpid()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.executescript(CACHE_VERSIONS_SQL)
+        return self._conn
+
+    def versions(self, refresh: bool = False) -> Dict[str, int]:
+        with self._lock:
+            now = time.monotonic()
+            if refresh or now - self._checked_at >= self.interval:
+                self._checked_at = now
+                conn = self._connection()
+                data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if refresh or data_version != self._data_version:
+                    self._data_version = data_version
+                    self._versions = dict(conn.execute("SELECT scope, version FROM cache_versions").fetchall())
+            return self._versions
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_watcher: Optional[VersionWatcher] = None
+_watcher_lock = threading.Lock()
+
+def get_watcher() -> VersionWatcher:
+    global _watcher
+    with _watcher_lock:
+        # Po forku workeru se připojení rodiče nesmí používat
+        if _watcher is None or _watcher.pid != os.getpid():
+            from app.models.db import DB_PATH
+            _watcher = VersionWatcher(DB_PATH, settings.CACHE_SYNC_INTERVAL_MS / 1000)
+        return _watcher
+
+def version(scope: str, refresh: bool = False) -> int:
+    return get_watcher().versions(refresh).get(scope, 0)
@@ -1,15 +1,484 @@
 # app/models/db.py
 
+import functools
+import queue
+import random
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Callable, Iterator, Optional, TypeVar
 from app.core.config import settings
+from app.core import metrics
+from app.core.metrics import record_db_time
+from app.models import query_log, cache_sync
 import os
 
 #
 # KONFIGURACE DATABÁZE
 #
 DB_PATH = settings.DB_PATH
+# Verze schématu v PRAGMA user_version; zvýšit s každou změnou SCHEMA_SQL, ADDED_COLUMNS či ADDED_INDEXES
+SCHEMA_VERSION = 1
+
+T = TypeVar("T")
+
+
+#
+# MĚŘENÉ PŘIPOJENÍ (počet dotazů a čas v DB pro metriky)
+#
+class MeteredCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_db_time(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_db_time(time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_db_time(time.perf_counter() - started, is_query=False)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            record_db_time(time.perf_counter() - started, is_query=False)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_db_time(time.perf_counter() - started, is_query=False)
+
+
+class MeteredConnection(sqlite3.Connection):
+    # Uvnitř transaction() funkce repozitářů jen přidávají změny, potvrdí je až konec bloku
+    in_atomic_block = False
+
+    def cursor(self, factory=MeteredCursor):
+        return super().cursor(factory)
+
+    def commit(self):
+        if not self.in_atomic_block:
+            super().commit()
+
+    def on_commit(self, func: Callable[[], None]) -> None:
+        """Spustí func po potvrzení: uvnitř transaction() až na konci bloku, po odvolání vůbec."""
+        if self.in_atomic_block:
+            self._after_commit.append(func)
+        else:
+            func()
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+#
+# INSTRUMENTOVANÉ PŘIPOJENÍ (log dotazů, pomalé dotazy, N+1)
+#
+class InstrumentedCursor(MeteredCursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_log.record_statement(self.connection, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_log.record_statement(self.connection, sql, (), time.perf_counter() - started, explain=False)
+
+
+class InstrumentedConnection(MeteredConnection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+#
+# SCHÉMA DATABÁZE
+#
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    hashed_password TEXT NOT NULL,
+    is_admin INTEGER NOT NULL DEFAULT 0,
+    remaining_days INTEGER NOT NULL,
+    profile_picture_path TEXT NULL,
+    name TEXT NOT NULL DEFAULT 'Uživatel',
+    is_super_admin INTEGER DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    team_id INTEGER NULL REFERENCES teams (id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS admin_teams (
+    admin_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE,
+    PRIMARY KEY (admin_id, team_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS vacations (
+    id INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    total_days INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Pending',
+    submitted_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    decided_at TEXT,
+    FOREIGN KEY (employee_id) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS balance_ledger (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    vacation_id INTEGER NULL,
+    delta INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    email TEXT NOT NULL,
+    is_admin INTEGER NOT NULL,
+    is_super_admin INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    created_at INTEGER NOT NULL,
+    actor_id INTEGER NULL,
+    actor_email TEXT NULL,
+    action TEXT NOT NULL,
+    target_type TEXT NOT NULL,
+    target_id INTEGER NULL,
+    before TEXT NULL,
+    after TEXT NULL
+);
+"""
+
+INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_vacations_employee_status ON vacations (employee_id, status);
+CREATE INDEX IF NOT EXISTS idx_vacations_status_dates ON vacations (status, start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_users_roles_email ON users (is_admin, is_super_admin, email);
+CREATE INDEX IF NOT EXISTS idx_balance_ledger_user ON balance_ledger (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_action ON audit_log (action, id);
+"""
+
+def init_schema(conn: sqlite3.Connection, with_indexes: bool = True) -> None:
+    conn.executescript(SCHEMA_SQL)
+    conn.executescript(cache_sync.CACHE_VERSIONS_SQL)
+    if with_indexes:
+        create_indexes(conn)
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    conn.executescript(INDEXES_SQL)
+
+# Uživatelé z doby před zavedením knihy pohybů dostanou počáteční stav rovný aktuálnímu zůstatku
+LEDGER_BACKFILL_SQL = """
+INSERT INTO balance_ledger (user_id, vacation_id, delta, reason, created_at)
+SELECT u.id, NULL, u.remaining_days, 'opening', CAST(strftime('%s', 'now') AS TEXT)
+FROM users u
+WHERE NOT EXISTS (SELECT 1 FROM balance_ledger l WHERE l.user_id = u.id)
+"""
+
+# Sloupce doplněné do tabulek, které už v nasazených databázích existují
+ADDED_COLUMNS = (
+    ("users", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("vacations", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("vacations", "decided_at", "TEXT"),
+    ("users", "team_id", "INTEGER NULL REFERENCES teams (id) ON DELETE SET NULL"),
+)
+
+# Indexy nad doplněnými sloupci (ve starých databázích mohou vzniknout až po přidání sloupce)
+ADDED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_users_team_roles_email ON users (team_id, is_admin, is_super_admin, email)",
+)
+
+# Fulltextový index jmen a e-mailů (bez diakritiky, s prefixovými indexy), udržovaný triggery
+USER_SEARCH_SQL = (
+    """
+    CREATE VIRTUAL TABLE users_fts USING fts5(
+        name, email,
+        content='users', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER users_fts_update AFTER UPDATE OF name, email ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+    "INSERT INTO users_fts (users_fts) VALUES ('rebuild')",
+)
+
+def migrate_data(conn: sqlite3.Connection) -> None:
+    # Workery startují souběžně, migrace proto běží pod zápisovým zámkem
+    conn.execute("BEGIN IMMEDIATE")
+    for table, column, definition in ADDED_COLUMNS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    for statement in ADDED_INDEXES:
+        conn.execute(statement)
+    conn.execute(LEDGER_BACKFILL_SQL)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'users_fts'").fetchone() is None:
+        for statement in USER_SEARCH_SQL:
+            conn.execute(statement)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+#
+# KONTROLA VERZE SCHÉMATU PŘI STARTU
+#
+def read_schema_version(path: Optional[str] = None) -> int:
+    """Verze schématu databáze před migrací (0 = nová nebo dosud neverzovaná databáze)."""
+    path = path or DB_PATH
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+    if version > SCHEMA_VERSION:
+        # Databázi už migrovala novější verze aplikace; stará verze by nad ní mohla zapisovat špatně
+        raise RuntimeError(f"Databáze má schéma verze {version}, aplikace zná nejvýše {SCHEMA_VERSION}.")
+    return version
+
+def verify_schema(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        raise RuntimeError(f"Databáze má po migraci schéma verze {version}, očekávána {SCHEMA_VERSION}.")
+    for table, column, _ in ADDED_COLUMNS:
+        if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            raise RuntimeError(f"Ve schématu chybí sloupec {table}.{column}.")
+
+
+#
+# ZAHŘÁTÍ CACHE STRÁNEK (indexy, přes které jdou nejčastější dotazy)
+#
+HOT_TABLES = ("users", "vacations", "sessions")
+
+def warm_indexes(conn: sqlite3.Connection) -> int:
+    """Projde indexy horkých tabulek do cache stránek (SQLite i OS); vrací počet indexů."""
+    warmed = 0
+    for table in HOT_TABLES:
+        for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+            columns = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+            if not columns or columns[0][2] is None:
+                continue
+            # Podmínka na první sloupec donutí SQLite projít právě tento index, ne nejmenší dostupný
+            conn.execute(
+                f'SELECT COUNT(*) FROM {table} INDEXED BY "{index[1]}" WHERE "{columns[0][2]}" IS NOT NULL'
+            ).fetchone()
+            warmed += 1
+    return warmed
+
+
+#
+# POOL PŘIPOJENÍ (jeden na proces, po forku workeru se vytvoří znovu)
+#
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        factory=InstrumentedConnection if settings.SQL_INSTRUMENTATION else MeteredConnection,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings.DB_BUSY_TIMEOUT_MS)}")
+    if settings.DB_JOURNAL_MODE:
+        conn.execute(f"PRAGMA journal_mode = {settings.DB_JOURNAL_MODE}")
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.pid = os.getpid()
+        # LIFO: naposledy vrácené připojení má nejteplejší cache stránek
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=max(size, 1))
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _connect(self.path)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self.size <= 0:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def prefill(self) -> int:
+        """Otevře připojení do plné velikosti poolu; první požadavky pak nečekají na připojení a PRAGMA."""
+        opened = []
+        try:
+            while self._idle.qsize() + len(opened) < self.size:
+                opened.append(self.acquire())
+        finally:
+            for conn in opened:
+                self.release(conn)
+        return self._idle.qsize()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            # Připojení zděděná přes fork se nezavírají, jen zahodí
+            os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+            _pool = ConnectionPool(DB_PATH, settings.DB_POOL_SIZE)
+            conn = _pool.acquire()
+            try:
+                init_schema(conn)
+                migrate_data(conn)
+                conn.commit()
+            finally:
+                _pool.release(conn)
+        return _pool
+
+def init_pool() -> ConnectionPool:
+    return get_pool()
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+
+#
+# OPAKOVÁNÍ ZÁPISU PŘI OBSAZENÉ DATABÁZI (SQLITE_BUSY)
+#
+def is_busy_error(error: sqlite3.Error) -> bool:
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+def retry_on_busy(func: Callable[..., T]) -> Callable[..., T]:
+    """Zopakuje zápisovou funkci repozitáře (první argument conn), pokud ji SQLite odmítne jako BUSY.
+
+    busy_timeout čeká na uvolnění zámku uvnitř SQLite, ale při uváznutí dvou
+    transakcí (např. zastaralý snímek ve WAL) vrací BUSY okamžitě. Pak je nutné
+    transakci odvolat a celou funkci spustit znovu; prodleva roste exponenciálně
+    s náhodným rozptylem, aby se souběžní zapisovatelé znovu nesrazili.
+    """
+    @functools.wraps(func)
+    def wrapper(conn: sqlite3.Connection, *args, **kwargs) -> T:
+        # Rozpracovanou cizí transakci nelze bezpečně zopakovat
+        retryable = not conn.in_transaction
+        backoff = settings.DB_BUSY_BACKOFF_MS / 1000
+        attempt = 0
+        while True:
+            try:
+                return func(conn, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not retryable or not is_busy_error(e) or attempt >= settings.DB_BUSY_RETRIES:
+                    raise
+                if conn.in_transaction:
+                    conn.rollback()
+                attempt += 1
+                metrics.DB_BUSY_RETRIES_TOTAL.inc()
+                time.sleep(random.uniform(0, backoff * 2 ** attempt))
+    return wrapper
+
+
+#
+# TRANSAKCE PŘES VÍCE FUNKCÍ REPOZITÁŘŮ
+#
+@contextmanager
+def transaction(conn: MeteredConnection, immediate: bool = False) -> Iterator[None]:
+    """
+    Zápisy uvnitř bloku se potvrdí najednou, při výjimce se odvolají všechny.
+    immediate=True vezme zápisový zámek hned (BEGIN IMMEDIATE): co se v bloku
+    přečte, už žádný jiný proces do konce transakce nezmění. Vnořený blok je
+    součástí vnějšího.
+    """
+    if conn.in_atomic_block:
+        yield
+        return
+    if conn.in_transaction:
+        # Dřívější rozpracované změny požadavku do bloku nepatří
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    conn.in_atomic_block = True
+    conn._after_commit = []
+    try:
+        yield
+    except BaseException:
+        conn.in_atomic_block = False
+        conn._after_commit = []
+        conn.rollback()
+        raise
+    conn.in_atomic_block = False
+    conn.commit()
+    after_commit, conn._after_commit = conn._after_commit, []
+    for func in after_commit:
+        func()
 
 
 #
@@ -17,24 +486,15 @@ DB_PATH = settings.DB_PATH
 #
 @contextmanager
 def open_conn() -> Iterator[sqlite3.Connection]:
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-
-    conn = None
+    pool = get_pool()
+    conn = pool.acquire()
     try:
-        conn = sqlite3.connect(
-            DB_PATH,
-            check_same_thread=False,
-        )
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON") 
         yield conn
         conn.commit()
         
     except sqlite3.Error as e:
-        if conn:
-            conn.rollback()
+        conn.rollback()
         raise e 
         
     finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        pool.release(conn)
@@ -0,0 +1,92 @@
+# app/models/query_log.py
+
+import logging
+import re
+import sqlite3
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Optional, List, Any
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE")
+
+
+#
+# NORMALIZACE SQL (tvar dotazu bez konkrétních hodnot)
+#
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    shape = _STRING_LITERAL.sub("?", sql)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    return _IN_LIST.sub("(?+)", shape)
+
+
+#
+# PLÁN DOTAZU PRO POMALÉ DOTAZY
+#
+def explain_query_plan(conn: sqlite3.Connection, sql: str, parameters: Any = ()) -> List[str]:
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # Základní kurzor, aby se EXPLAIN sám znovu nelogoval
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error:
+        return []
+    return [row[3] for row in rows]
+
+
+#
+# ZÁZNAM O JEDNOTLIVÉM DOTAZU
+#
+_request_shapes: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_shapes", default=None)
+
+def record_statement(
+    conn: sqlite3.Connection,
+    sql: str,
+    parameters: Any,
+    seconds: float,
+    explain: bool = True
+) -> None:
+    shape = normalize_sql(sql)
+    duration_ms = seconds * 1000
+    logger.info("SQL %.2f ms | %s", duration_ms, shape, extra={"duration_ms": round(duration_ms, 3), "sql": shape})
+
+    if duration_ms >= settings.SQL_SLOW_QUERY_MS:
+        plan = explain_query_plan(conn, sql, parameters) if explain else []
+        logger.warning(
+            "Pomalý SQL dotaz (%.2f ms, limit %s ms): %s | plán: %s",
+            duration_ms, settings.SQL_SLOW_QUERY_MS, shape, "; ".join(plan) or "-",
+            extra={"duration_ms": round(duration_ms, 3), "sql": shape, "query_plan": plan}
+        )
+
+    shapes = _request_shapes.get()
+    if shapes is not None:
+        shapes[shape] = shapes.get(shape, 0) + 1
+
+
+#
+# DETEKCE N+1 V RÁMCI POŽADAVKU
+#
+def begin_request() -> None:
+    _request_shapes.set({})
+
+def end_request(method: str, route: str) -> None:
+    shapes = _request_shapes.get()
+    if not shapes:
+        return
+    threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+    for shape, count in shapes.items():
+        if count > threshold:
+            logger.warning(
+                "Možný N+1 problém: %s %s provedl stejný dotaz %dx (limit %d): %s",
+                method, route, count, threshold, shape,
+                extra={"route": route, "sql": shape, "count": count}
+            )
+    _request_shapes.set(None)
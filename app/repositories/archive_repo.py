@@ -0,0 +1,180 @@
+# app/repositories/archive_repo.py
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Any, List, Iterator, Tuple
+from app.core.config import settings
+from app.models import cache_sync
+from app.models.db import retry_on_busy
+
+_ARCHIVE_FILE = re.compile(r"^vacations-(\d{4})\.db$")
+
+ARCHIVE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS {schema}.vacations (
+    id INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    total_days INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at TEXT NOT NULL,
+    decided_at TEXT
+);
+CREATE INDEX IF NOT EXISTS {schema}.idx_vacations_employee_submitted ON vacations (employee_id, submitted_at);
+"""
+
+# Sloupce doplněné do archivů vzniklých dřívější verzí (jejich řádky mají hodnotu NULL)
+ARCHIVE_ADDED_COLUMNS = (
+    ("decided_at", "TEXT"),
+)
+
+# Uzavřené záznamy: zamítnuté nebo schválené a již skončené před hranicí
+CLOSED_CONDITION = "status IN ('Approved', 'Rejected') AND end_date < ?"
+
+
+#
+# SOUBORY ARCHIVŮ (jeden na rok podání žádosti)
+#
+def archive_path(year: int) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, f"vacations-{year}.db")
+
+def list_archive_years() -> List[int]:
+    if not os.path.isdir(settings.ARCHIVE_DIR):
+        return []
+    years = []
+    for name in os.listdir(settings.ARCHIVE_DIR):
+        match = _ARCHIVE_FILE.match(name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years, reverse=True)
+
+def _archive_columns(conn: sqlite3.Connection, schema: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(vacations)")]
+
+@contextmanager
+def attached_archive(conn: sqlite3.Connection, year: int, create: bool = False) -> Iterator[str]:
+    schema = f"archive_{year}"
+    path = archive_path(year)
+    if create:
+        os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    # Připojení z poolu se drží dlouho a počet ATTACH je omezený, archiv se proto po použití odpojí
+    conn.execute("ATTACH DATABASE ? AS " + schema, (path,))
+    try:
+        if create:
+            conn.executescript(ARCHIVE_SCHEMA_SQL.format(schema=schema))
+            existing = _archive_columns(conn, schema)
+            for column, definition in ARCHIVE_ADDED_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {schema}.vacations ADD COLUMN {column} {definition}")
+        yield schema
+    finally:
+        conn.execute("DETACH DATABASE " + schema)
+
+
+#
+# ARCHIVACE UZAVŘENÝCH ZÁZNAMŮ
+#
+@retry_on_busy
+def _move_to_archive(conn: sqlite3.Connection, year: int, ids: List[int]) -> None:
+    placeholders = ",".join("?" * len(ids))
+    with attached_archive(conn, year, create=True) as schema:
+        try:
+            # INSERT OR IGNORE: po přerušeném běhu lze archivaci bezpečně spustit znovu
+            conn.execute(
+                f"INSERT OR IGNORE INTO {schema}.vacations "
+                f"SELECT id, employee_id, start_date, end_date, total_days, status, submitted_at, decided_at "
+                f"FROM vacations WHERE id IN ({placeholders})",
+                ids
+            )
+            conn.execute(f"DELETE FROM vacations WHERE id IN ({placeholders})", ids)
+            cache_sync.bump(conn, (cache_sync.VACATIONS, cache_sync.APPROVED_VACATIONS))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+def archive_closed_vacations(conn: sqlite3.Connection, cutoff: date, batch_size: int = 5_000) -> Dict[int, int]:
+    """Přesune uzavřené záznamy do archivů podle roku podání; vrací počty přesunutých řádků po letech."""
+    moved: Dict[int, int] = {}
+    last_id = 0
+    query = f"""
+    SELECT id, CAST(strftime('%Y', CAST(submitted_at AS INTEGER), 'unixepoch') AS INTEGER)
+    FROM vacations
+    WHERE id > ? AND {CLOSED_CONDITION}
+    ORDER BY id
+    LIMIT ?
+    """
+    while True:
+        rows = conn.execute(query, (last_id, cutoff.isoformat(), batch_size)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        per_year: Dict[int, List[int]] = {}
+        for vacation_id, year in rows:
+            per_year.setdefault(year, []).append(vacation_id)
+        for year, ids in per_year.items():
+            _move_to_archive(conn, year, ids)
+            moved[year] = moved.get(year, 0) + len(ids)
+    return moved
+
+def count_archivable(conn: sqlite3.Connection, cutoff: date) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM vacations WHERE {CLOSED_CONDITION}", (cutoff.isoformat(),)).fetchone()[0]
+
+
+#
+# ČTENÍ HISTORIE Z ARCHIVŮ
+#
+def count_employee_archived(conn: sqlite3.Connection, year: int, employee_id: int) -> int:
+    with attached_archive(conn, year) as schema:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM {schema}.vacations WHERE employee_id = ?", (employee_id,)
+        ).fetchone()[0]
+
+def get_employee_archived_history(
+    conn: sqlite3.Connection,
+    year: int,
+    employee_id: int,
+    limit: int,
+    offset: int = 0
+) -> List[Dict[str, Any]]:
+    with attached_archive(conn, year) as schema:
+        cursor = conn.cursor()
+        query = f"""
+        SELECT * FROM {schema}.vacations
+        WHERE employee_id = ?
+        ORDER BY submitted_at DESC
+        LIMIT ? OFFSET ?
+        """
+        cursor.execute(query, (employee_id, limit, offset))
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_archived_report_rows(conn: sqlite3.Connection, year: int) -> List[Tuple[Any, ...]]:
+    """Řádky archivu ve tvaru vacation_repo.REPORT_COLUMNS (n-tice, bez slovníku na řádek)."""
+    with attached_archive(conn, year) as schema:
+        # Archivy ze starší verze decided_at nemají, jejich žádosti se do doby vyřízení nezapočtou
+        decided = "CAST(decided_at AS INTEGER)" if "decided_at" in _archive_columns(conn, schema) else "NULL"
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"""
+        SELECT employee_id, start_date, end_date, status, CAST(submitted_at AS INTEGER), {decided}
+        FROM {schema}.vacations
+        """)
+        return cursor.fetchall()
+
+def delete_employee_archived(employee_id: int) -> None:
+    """
+    Smaže archivované žádosti zaměstnance, každý roční soubor zvlášť a ve vlastním připojení.
+    Transakce přes víc souborů ve WAL atomická není a ATTACH/DETACH nejde uvnitř otevřené
+    transakce připojení požadavku. Volá se proto až po potvrzeném smazání uživatele;
+    přerušené mazání lze bez rizika spustit znovu.
+    """
+    for year in list_archive_years():
+        archive = sqlite3.connect(archive_path(year), timeout=settings.DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        try:
+            archive.execute("DELETE FROM vacations WHERE employee_id = ?", (employee_id,))
+        finally:
+            archive.close()
@@ -0,0 +1,44 @@
+# app/repositories/audit_repo.py
+
+import sqlite3
+from typing import Optional, Dict, Any, List, Tuple
+from app.models.db import retry_on_busy
+
+AUDIT_COLUMNS = ("created_at", "actor_id", "actor_email", "action", "target_type", "target_id", "before", "after")
+
+
+#
+# DÁVKOVÝ ZÁPIS (jediný commit pro celou dávku)
+#
+@retry_on_busy
+def insert_entries(conn: sqlite3.Connection, entries: List[Tuple[Any, ...]]) -> None:
+    conn.executemany(
+        f"INSERT INTO audit_log ({', '.join(AUDIT_COLUMNS)}) VALUES ({', '.join('?' * len(AUDIT_COLUMNS))})",
+        entries
+    )
+    conn.commit()
+
+
+#
+# PROHLÍŽENÍ (stránkování podle id, nejnovější první)
+#
+def get_entries(
+    conn: sqlite3.Connection,
+    limit: int,
+    before_id: Optional[int] = None,
+    action: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    conditions, params = [], []
+    if action:
+        conditions.append("action = ?")
+        params.append(action)
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(before_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT id, {', '.join(AUDIT_COLUMNS)} FROM audit_log {where} ORDER BY id DESC LIMIT ?",
+        (*params, limit)
+    )
+    return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,179 @@
+# app/repositories/base.py
+
+from typing import Protocol, Optional, Dict, Any, List, Iterator, ContextManager
+from app.models.schemas import EmployeeCreateByAdmin
+
+
+#
+# ROZHRANÍ REPOZITÁŘE UŽIVATELŮ
+#
+class UserRepository(Protocol):
+    def get_all_users_for_admin_management(self) -> List[Dict[str, Any]]: ...
+
+    def iter_users_for_admin_management(self) -> Iterator[Dict[str, Any]]:
+        """Řádky pro streamované vykreslení; iterátor může být čten i po skončení požadavku."""
+        ...
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]: ...
+
+    def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def get_all_employees(self, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """S team_ids jen zaměstnanci daných týmů (prázdný seznam = nikdo), None = celá firma."""
+        ...
+
+    def search_users(
+        self,
+        query: str,
+        employees_only: bool = False,
+        limit: int = 50,
+        offset: int = 0,
+        team_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Prefixové hledání podle jména a e-mailu bez ohledu na diakritiku, seřazené podle relevance."""
+        ...
+
+    def create_user(
+        self,
+        user_data: EmployeeCreateByAdmin,
+        hashed_password: str,
+        is_admin: bool = False,
+        is_super_admin: bool = False,
+        team_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]: ...
+
+    def update_user_remaining_days(
+        self,
+        user_id: int,
+        days_change: int,
+        reason: str = "adjustment",
+        vacation_id: Optional[int] = None
+    ) -> bool:
+        """Zapíše pohyb do knihy zůstatků a přírůstkově upraví snímek remaining_days."""
+        ...
+
+    def reset_user_balance(self, user_id: int, new_balance: int) -> bool: ...
+
+    def update_profile_picture(self, user_id: int, picture_path: Optional[str]) -> bool: ...
+
+    def update_user_team(self, user_id: int, team_id: Optional[int]) -> bool: ...
+
+    def update_user_roles(
+        self,
+        user_id: int,
+        is_admin: bool,
+        is_super_admin: bool,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        """S expected_version se změna provede jen nad nezměněným řádkem (compare-and-swap)."""
+        ...
+
+    def delete_user(self, user_id: int) -> bool: ...
+
+
+#
+# ROZHRANÍ REPOZITÁŘE DOVOLENÝCH
+#
+class VacationRepository(Protocol):
+    def create_vacation_request(
+        self,
+        employee_id: int,
+        start_date: str,
+        end_date: str,
+        total_days: int,
+        status: str,
+        submitted_at: str
+    ) -> Optional[Dict[str, Any]]: ...
+
+    def get_vacation_request_by_id(self, request_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def get_active_vacation_requests(self, employee_id: int) -> List[Dict[str, Any]]: ...
+
+    def get_employee_vacation_history(
+        self,
+        employee_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]: ...
+
+    def get_pending_requests(self, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]: ...
+
+    def get_upcoming_approved_vacations(self, limit: int = 10, team_ids: Optional[List[int]] = None) -> List[Any]: ...
+
+    def get_approved_intervals(self) -> List[Dict[str, Any]]: ...
+
+    def get_calendar_vacations(
+        self,
+        employee_id: Optional[int] = None,
+        team_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Schválené dovolené zaměstnance nebo členů týmu (se jménem a e-mailem) podle začátku."""
+        ...
+
+    def get_report_columns(self) -> Dict[str, List[Any]]:
+        """Sloupce employee_id, start_date, end_date, status, submitted_at a decided_at (časy jako int)."""
+        ...
+
+    def update_request_status(
+        self,
+        request_id: int,
+        new_status: str,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        """S expected_version se stav změní jen tehdy, když má žádost stále tuto verzi."""
+        ...
+
+    def update_vacation_request(
+        self,
+        request_id: int,
+        new_start_date: str,
+        new_end_date: str,
+        new_total_days: int,
+        expected_version: Optional[int] = None
+    ) -> bool: ...
+
+    def delete_vacation_request(self, request_id: int) -> bool: ...
+
+
+#
+# ROZHRANÍ REPOZITÁŘE TÝMŮ (zaměstnanec patří do jednoho týmu, admin spravuje libovolný počet)
+#
+class TeamRepository(Protocol):
+    def get_all_teams(self) -> List[Dict[str, Any]]:
+        """Týmy seřazené podle názvu, s počtem členů (members)."""
+        ...
+
+    def get_team_by_id(self, team_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def get_admin_teams(self, admin_id: int) -> List[Dict[str, Any]]: ...
+
+    def get_team_admins(self) -> List[Dict[str, Any]]: ...
+
+    def create_team(self, name: str) -> Optional[Dict[str, Any]]:
+        """None, pokud tým se stejným názvem už existuje."""
+        ...
+
+    def assign_admin(self, admin_id: int, team_id: int) -> bool: ...
+
+    def unassign_admin(self, admin_id: int, team_id: int) -> bool: ...
+
+
+#
+# SADA REPOZITÁŘŮ JEDNOHO POŽADAVKU (vč. řízení transakce)
+#
+class Repositories(Protocol):
+    users: UserRepository
+    vacations: VacationRepository
+    teams: TeamRepository
+
+    def commit(self) -> None: ...
+
+    def rollback(self) -> None: ...
+
+    def transaction(self, immediate: bool = False) -> ContextManager[None]:
+        """Blok, jehož zápisy se potvrdí najednou, nebo (při výjimce) vůbec; immediate zamkne zápis hned."""
+        ...
+
+    def cache_version(self, scope: str, refresh: bool = False) -> int:
+        """Verze oblasti cache (viz app.models.cache_sync); mění se s každým zápisem do oblasti."""
+        ...
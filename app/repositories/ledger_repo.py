@@ -0,0 +1,94 @@
+# app/repositories/ledger_repo.py
+
+import sqlite3
+from time import time
+from typing import Optional, Dict, Any, List
+
+# Důvody pohybů na účtu dovolené
+OPENING = "opening"
+VACATION_REQUEST = "vacation_request"
+VACATION_EDIT = "vacation_edit"
+VACATION_REJECTED = "vacation_rejected"
+ROLLOVER = "rollover"
+ADJUSTMENT = "adjustment"
+
+
+#
+# ZÁPIS POHYBU (jen připojení řádku + přírůstková změna snímku v users)
+#
+def append_movement(
+    conn: sqlite3.Connection,
+    user_id: int,
+    delta: int,
+    reason: str,
+    vacation_id: Optional[int] = None
+) -> bool:
+    cursor = conn.cursor()
+    # Snímek se mění atomicky v SQL, bez čtení a zpětného zápisu celé hodnoty
+    cursor.execute(
+        "UPDATE users SET remaining_days = remaining_days + ?, version = version + 1 WHERE id = ? AND remaining_days + ? >= 0",
+        (delta, user_id, delta)
+    )
+    if cursor.rowcount != 1:
+        return False
+    cursor.execute(
+        "INSERT INTO balance_ledger (user_id, vacation_id, delta, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+        (user_id, vacation_id, delta, reason, str(int(time())))
+    )
+    return True
+
+def append_opening(conn: sqlite3.Connection, user_id: int, balance: int) -> None:
+    # Snímek v users už počáteční zůstatek obsahuje
+    conn.execute(
+        "INSERT INTO balance_ledger (user_id, vacation_id, delta, reason, created_at) VALUES (?, NULL, ?, ?, ?)",
+        (user_id, balance, OPENING, str(int(time())))
+    )
+
+def append_rollover(conn: sqlite3.Connection, user_id: int, new_balance: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO balance_ledger (user_id, vacation_id, delta, reason, created_at)
+        SELECT id, NULL, ? - remaining_days, ?, ? FROM users WHERE id = ?
+    """, (new_balance, ROLLOVER, str(int(time())), user_id))
+    if cursor.rowcount != 1:
+        return False
+    cursor.execute("UPDATE users SET remaining_days = ?, version = version + 1 WHERE id = ?", (new_balance, user_id))
+    return True
+
+
+#
+# ČTENÍ
+#
+def get_user_ledger(conn: sqlite3.Connection, user_id: int) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    query = "SELECT * FROM balance_ledger WHERE user_id = ? ORDER BY id"
+    cursor.execute(query, (user_id,))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+#
+# HROMADNÁ KONTROLA A PŘEPOČET SNÍMKŮ
+#
+def find_balance_mismatches(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    query = """
+    SELECT u.id, u.email, u.remaining_days, COALESCE(l.balance, 0) AS ledger_balance
+    FROM users u
+    LEFT JOIN (SELECT user_id, SUM(delta) AS balance FROM balance_ledger GROUP BY user_id) l ON l.user_id = u.id
+    WHERE u.remaining_days != COALESCE(l.balance, 0)
+    ORDER BY u.id
+    """
+    cursor.execute(query)
+    return [dict(row) for row in cursor.fetchall()]
+
+def rebuild_balances(conn: sqlite3.Connection) -> int:
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE users SET remaining_days = COALESCE(
+            (SELECT SUM(delta) FROM balance_ledger WHERE balance_ledger.user_id = users.id), 0
+        )
+        WHERE remaining_days != COALESCE(
+            (SELECT SUM(delta) FROM balance_ledger WHERE balance_ledger.user_id = users.id), 0
+        )
+    """)
+    return cursor.rowcount
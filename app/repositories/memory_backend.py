@@ -0,0 +1,735 @@
+# app/repositories/memory_backend.py
+"""
+Paměťová implementace repozitářů (slovníky a sekundární indexy).
+
+Určena pro testy a benchmarky v jednom procesu: data nejsou trvalá a
+transakce jsou jen lokální (rollback vrací změny z deníku, izolace mezi
+souběžnými požadavky neexistuje).
+"""
+
+import os
+import sqlite3
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from time import time
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+from app.models.schemas import EmployeeCreateByAdmin
+from app.models import cache_sync
+import app.repositories.archive_repo as archive_repo
+import app.repositories.ledger_repo as ledger_repo
+import app.repositories.vacation_repo as vacation_repo
+from app.core.config import settings
+
+USER_COLUMNS = ("id", "email", "hashed_password", "is_admin", "is_super_admin", "remaining_days", "profile_picture_path", "name", "team_id")
+VACATION_COLUMNS = ("id", "employee_id", "start_date", "end_date", "total_days", "status", "submitted_at", "decided_at")
+
+
+def _columns(conn: sqlite3.Connection, table: str, columns: Tuple[str, ...]) -> str:
+    # Paměťový režim databázi nemigruje; chybějící novější sloupce se doplní jako NULL
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    return ", ".join(column if column in existing else f"NULL AS {column}" for column in columns)
+
+def _search_tokens(text: str) -> List[str]:
+    # Stejné chování jako tokenizer unicode61 s remove_diacritics v SQLite
+    folded = "".join(ch for ch in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(ch))
+    return re.findall(r"\w+", folded)
+
+
+#
+# ÚLOŽIŠTĚ (sdílené všemi požadavky procesu)
+#
+class MemoryStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self.user_ids_by_email: Dict[str, int] = {}
+        self.vacations: Dict[int, Dict[str, Any]] = {}
+        # Slovníky s hodnotou None slouží jako množiny se zachovaným pořadím vložení
+        self.user_ids_by_team: Dict[Optional[int], Dict[int, None]] = {}
+        self.vacation_ids_by_employee: Dict[int, Dict[int, None]] = {}
+        self.vacation_ids_by_status: Dict[str, Dict[int, None]] = {}
+        self.approved_by_start: List[Tuple[str, int]] = []
+        self.max_approved_span = 0
+        self.ledger: List[Dict[str, Any]] = []
+        # Archivované žádosti jen pro reporty (ve tvaru vacation_repo.REPORT_COLUMNS); archiv se za běhu nemění
+        self.archived_report_rows: List[Tuple[Any, ...]] = []
+        self.teams: Dict[int, Dict[str, Any]] = {}
+        self.team_ids_by_admin: Dict[int, Dict[int, None]] = {}
+        self.versions: Dict[str, int] = {}
+        self.next_user_id = 1
+        self.next_vacation_id = 1
+        self.next_team_id = 1
+
+    #
+    # ZÁKLADNÍ OPERACE NAD ŘÁDKY (udržují sekundární indexy)
+    #
+    def put_user(self, row: Dict[str, Any]) -> None:
+        previous = self.users.get(row['id'])
+        if previous is not None:
+            self.user_ids_by_email.pop(previous['email'], None)
+            self.user_ids_by_team.get(previous.get('team_id'), {}).pop(row['id'], None)
+        self.users[row['id']] = row
+        self.user_ids_by_email[row['email']] = row['id']
+        self.user_ids_by_team.setdefault(row.get('team_id'), {})[row['id']] = None
+        self.next_user_id = max(self.next_user_id, row['id'] + 1)
+
+    def remove_user(self, user_id: int) -> None:
+        previous = self.users.pop(user_id, None)
+        if previous is not None:
+            self.user_ids_by_email.pop(previous['email'], None)
+            self.user_ids_by_team.get(previous.get('team_id'), {}).pop(user_id, None)
+
+    def put_team(self, row: Dict[str, Any]) -> None:
+        self.teams[row['id']] = row
+        self.next_team_id = max(self.next_team_id, row['id'] + 1)
+
+    def set_admin_team(self, admin_id: int, team_id: int, assigned: bool) -> None:
+        if assigned:
+            self.team_ids_by_admin.setdefault(admin_id, {})[team_id] = None
+        else:
+            self.team_ids_by_admin.get(admin_id, {}).pop(team_id, None)
+
+    def put_vacation(self, row: Dict[str, Any]) -> None:
+        self.remove_vacation(row['id'])
+        self.vacations[row['id']] = row
+        self.vacation_ids_by_employee.setdefault(row['employee_id'], {})[row['id']] = None
+        self.vacation_ids_by_status.setdefault(row['status'], {})[row['id']] = None
+        if row['status'] == 'Approved':
+            insort(self.approved_by_start, (row['start_date'], row['id']))
+            span = (date.fromisoformat(row['end_date']) - date.fromisoformat(row['start_date'])).days
+            self.max_approved_span = max(self.max_approved_span, span)
+        self.next_vacation_id = max(self.next_vacation_id, row['id'] + 1)
+
+    def remove_vacation(self, vacation_id: int) -> None:
+        previous = self.vacations.pop(vacation_id, None)
+        if previous is None:
+            return
+        self.vacation_ids_by_employee.get(previous['employee_id'], {}).pop(vacation_id, None)
+        self.vacation_ids_by_status.get(previous['status'], {}).pop(vacation_id, None)
+        if previous['status'] == 'Approved':
+            key = (previous['start_date'], vacation_id)
+            i = bisect_left(self.approved_by_start, key)
+            if i < len(self.approved_by_start) and self.approved_by_start[i] == key:
+                del self.approved_by_start[i]
+
+    #
+    # NAČTENÍ ZE SQLITE (benchmarky nad stejnými daty)
+    #
+    @classmethod
+    def from_sqlite(cls, conn: sqlite3.Connection) -> "MemoryStore":
+        store = cls()
+        conn.row_factory = sqlite3.Row
+        # Verze řádků slouží jen k detekci souběžných změn uvnitř úložiště, začínají proto od nuly
+        for row in conn.execute(f"SELECT {_columns(conn, 'users', USER_COLUMNS)} FROM users"):
+            store.put_user(dict(row, version=0))
+        for row in conn.execute(f"SELECT {_columns(conn, 'vacations', VACATION_COLUMNS)} FROM vacations ORDER BY id"):
+            store.put_vacation(dict(row, version=0))
+        for year in archive_repo.list_archive_years():
+            store.archived_report_rows.extend(archive_repo.get_archived_report_rows(conn, year))
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'admin_teams'").fetchone() is not None:
+            for row in conn.execute("SELECT id, name FROM teams"):
+                store.put_team(dict(row))
+            for row in conn.execute("SELECT admin_id, team_id FROM admin_teams"):
+                store.set_admin_team(row['admin_id'], row['team_id'], True)
+        return store
+
+
+#
+# UŽIVATELÉ
+#
+class MemoryUserRepository:
+    def __init__(self, store: MemoryStore, repos: "MemoryRepositories"):
+        self.store = store
+        self.repos = repos
+
+    def get_all_users_for_admin_management(self) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = sorted(self.store.users.values(), key=lambda user: user['email'])
+            return [
+                {key: user[key] for key in (
+                    "id", "name", "email", "is_admin", "is_super_admin", "remaining_days", "version", "team_id"
+                )}
+                for user in rows
+            ]
+
+    def iter_users_for_admin_management(self) -> Iterator[Dict[str, Any]]:
+        # Data jsou celá v paměti, iterátor jen prochází seřazený snímek
+        yield from self.get_all_users_for_admin_management()
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            user_id = self.store.user_ids_by_email.get(email)
+            return dict(self.store.users[user_id]) if user_id is not None else None
+
+    def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            return dict(user) if user is not None else None
+
+    def _scoped_users(self, team_ids: Optional[List[int]]) -> Iterator[Dict[str, Any]]:
+        if team_ids is None:
+            return iter(self.store.users.values())
+        return (
+            self.store.users[user_id]
+            for team_id in dict.fromkeys(team_ids)
+            for user_id in self.store.user_ids_by_team.get(team_id, {})
+        )
+
+    def get_all_employees(self, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = sorted(
+                (user for user in self._scoped_users(team_ids) if user['is_admin'] == 0 and user['is_super_admin'] == 0),
+                key=lambda user: user['email']
+            )
+            return [
+                {key: user[key] for key in ("id", "email", "remaining_days", "profile_picture_path", "name", "team_id")}
+                for user in rows
+            ]
+
+    def search_users(
+        self,
+        query: str,
+        employees_only: bool = False,
+        limit: int = 50,
+        offset: int = 0,
+        team_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        prefixes = _search_tokens(query)
+        if not prefixes:
+            return []
+        matches = []
+        with self.store.lock:
+            for user in self._scoped_users(team_ids):
+                if employees_only and (user['is_admin'] or user['is_super_admin']):
+                    continue
+                name_tokens = _search_tokens(user['name'])
+                tokens = name_tokens + _search_tokens(user['email'])
+                if all(any(token.startswith(prefix) for token in tokens) for prefix in prefixes):
+                    # Shody ve jméně mají přednost před shodami jen v e-mailu
+                    name_hits = sum(any(token.startswith(prefix) for token in name_tokens) for prefix in prefixes)
+                    matches.append((-name_hits, user['email'], user))
+        matches.sort(key=lambda match: match[:2])
+        return [
+            {key: user[key] for key in (
+                "id", "name", "email", "is_admin", "is_super_admin", "remaining_days", "profile_picture_path", "version",
+                "team_id"
+            )}
+            for _, _, user in matches[offset:offset + limit]
+        ]
+
+    def create_user(
+        self,
+        user_data: EmployeeCreateByAdmin,
+        hashed_password: str,
+        is_admin: bool = False,
+        is_super_admin: bool = False,
+        team_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        remaining_days = user_data.remaining_days if user_data.remaining_days is not None else settings.DEFAULT_VACATION_DAYS
+        with self.store.lock:
+            if user_data.email in self.store.user_ids_by_email:
+                raise ValueError("Uživatel s tímto emailem již existuje.")
+            row = {
+                "id": self.store.next_user_id,
+                "email": user_data.email,
+                "hashed_password": hashed_password,
+                "is_admin": 1 if is_admin else 0,
+                "is_super_admin": 1 if is_super_admin else 0,
+                "remaining_days": remaining_days,
+                "profile_picture_path": None,
+                "name": user_data.name,
+                "version": 0,
+                "team_id": team_id,
+            }
+            self.repos._put_user(row)
+            self.repos._append_ledger(row['id'], remaining_days, ledger_repo.OPENING, None)
+            self.repos._bump(cache_sync.USERS)
+            self.repos.commit()
+            return dict(row)
+
+    def update_user_remaining_days(
+        self,
+        user_id: int,
+        days_change: int,
+        reason: str = ledger_repo.ADJUSTMENT,
+        vacation_id: Optional[int] = None
+    ) -> bool:
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if not user:
+                return False
+            new_remaining_days = user['remaining_days'] + days_change
+            if new_remaining_days < 0:
+                return False
+            self.repos._put_user(dict(user, remaining_days=new_remaining_days, version=user['version'] + 1))
+            self.repos._append_ledger(user_id, days_change, reason, vacation_id)
+            self.repos._bump(cache_sync.USERS)
+            self.repos.commit()
+            return True
+
+    def reset_user_balance(self, user_id: int, new_balance: int) -> bool:
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if not user:
+                return False
+            self.repos._put_user(dict(user, remaining_days=new_balance, version=user['version'] + 1))
+            self.repos._append_ledger(user_id, new_balance - user['remaining_days'], ledger_repo.ROLLOVER, None)
+            self.repos._bump(cache_sync.USERS)
+            self.repos.commit()
+            return True
+
+    def update_profile_picture(self, user_id: int, picture_path: Optional[str]) -> bool:
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if not user:
+                return False
+            self.repos._put_user(dict(user, profile_picture_path=picture_path, version=user['version'] + 1))
+            self.repos._bump(cache_sync.USERS)
+            self.repos.commit()
+            return True
+
+    def update_user_team(self, user_id: int, team_id: Optional[int]) -> bool:
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if not user:
+                return False
+            self.repos._put_user(dict(user, team_id=team_id, version=user['version'] + 1))
+            self.repos._bump(cache_sync.USERS, cache_sync.APPROVED_VACATIONS)
+            self.repos.commit()
+            return True
+
+    def update_user_roles(
+        self,
+        user_id: int,
+        is_admin: bool,
+        is_super_admin: bool,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        if is_super_admin:
+            is_admin = False
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if not user or (expected_version is not None and user['version'] != expected_version):
+                return False
+            self.repos._put_user(dict(
+                user,
+                is_admin=1 if is_admin else 0,
+                is_super_admin=1 if is_super_admin else 0,
+                version=user['version'] + 1
+            ))
+            self.repos._bump(cache_sync.USERS, cache_sync.APPROVED_VACATIONS)
+            self.repos.commit()
+            return True
+
+    def delete_user(self, user_id: int) -> bool:
+        with self.store.lock:
+            for vacation_id in list(self.store.vacation_ids_by_employee.get(user_id, {})):
+                self.repos._remove_vacation(vacation_id)
+            for team_id in list(self.store.team_ids_by_admin.get(user_id, {})):
+                self.repos._set_admin_team(user_id, team_id, False)
+            # Stejně jako archive_repo.delete_employee_archived: mimo deník, archiv se nevrací
+            self.store.archived_report_rows = [row for row in self.store.archived_report_rows if row[0] != user_id]
+            self.repos._remove_user(user_id)
+            self.repos._bump(cache_sync.USERS, cache_sync.VACATIONS, cache_sync.APPROVED_VACATIONS)
+            self.repos.commit()
+            return True
+
+
+#
+# DOVOLENÉ
+#
+class MemoryVacationRepository:
+    def __init__(self, store: MemoryStore, repos: "MemoryRepositories"):
+        self.store = store
+        self.repos = repos
+
+    def create_vacation_request(
+        self,
+        employee_id: int,
+        start_date: str,
+        end_date: str,
+        total_days: int,
+        status: str,
+        submitted_at: str
+    ) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            row = {
+                "id": self.store.next_vacation_id,
+                "employee_id": employee_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                "total_days": total_days,
+                "status": status,
+                "submitted_at": submitted_at,
+                "decided_at": None,
+                "version": 0,
+            }
+            self.repos._put_vacation(row)
+            self.repos._bump(cache_sync.VACATIONS)
+            self.repos.commit()
+            return dict(row)
+
+    def get_vacation_request_by_id(self, request_id: int) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            row = self.store.vacations.get(request_id)
+            return dict(row) if row is not None else None
+
+    def get_active_vacation_requests(self, employee_id: int) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = (self.store.vacations[i] for i in self.store.vacation_ids_by_employee.get(employee_id, {}))
+            return [dict(row) for row in rows if row['status'] in ('Pending', 'Approved')]
+
+    def get_employee_vacation_history(
+        self,
+        employee_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = [dict(self.store.vacations[i]) for i in self.store.vacation_ids_by_employee.get(employee_id, {})]
+        rows.sort(key=lambda row: row['submitted_at'], reverse=True)
+        return rows[offset:] if limit is None else rows[offset:offset + limit]
+
+    def get_pending_requests(self, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = []
+            if team_ids is None:
+                for vacation_id in self.store.vacation_ids_by_status.get('Pending', {}):
+                    row = self.store.vacations[vacation_id]
+                    user = self.store.users.get(row['employee_id'])
+                    if user is not None:
+                        rows.append(dict(row, name=user['name']))
+            else:
+                # Jen žádosti členů týmů: práce úměrná velikosti týmu, ne celé firmy
+                for user in self.repos.users._scoped_users(team_ids):
+                    for vacation_id in self.store.vacation_ids_by_employee.get(user['id'], {}):
+                        row = self.store.vacations[vacation_id]
+                        if row['status'] == 'Pending':
+                            rows.append(dict(row, name=user['name']))
+        rows.sort(key=lambda row: row['submitted_at'])
+        return rows
+
+    def get_upcoming_approved_vacations(self, limit: int = 10, team_ids: Optional[List[int]] = None) -> List[Any]:
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self.store.lock:
+            # Probíhající dovolené začaly nejvýše o nejdelší schválené trvání dříve
+            earliest = (date.today() - timedelta(days=self.store.max_approved_span)).isoformat()
+            keys = self.store.approved_by_start
+            result = []
+            for i in range(bisect_left(keys, (earliest, 0)), len(keys)):
+                if len(result) >= limit:
+                    break
+                row = self.store.vacations[keys[i][1]]
+                if row['end_date'] < today:
+                    continue
+                user = self.store.users.get(row['employee_id'])
+                if user is not None and (team_ids is None or user.get('team_id') in team_ids):
+                    result.append({"start_date": row['start_date'], "end_date": row['end_date'], "name": user['name']})
+            return result
+
+    def get_approved_intervals(self) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            result = []
+            for vacation_id in self.store.vacation_ids_by_status.get('Approved', {}):
+                row = self.store.vacations[vacation_id]
+                user = self.store.users.get(row['employee_id'])
+                if user is not None:
+                    result.append({
+                        "start_date": row['start_date'],
+                        "end_date": row['end_date'],
+                        "employee_id": row['employee_id'],
+                        "is_admin": user['is_admin'],
+                        "is_super_admin": user['is_super_admin'],
+                    })
+            return result
+
+    def get_calendar_vacations(
+        self,
+        employee_id: Optional[int] = None,
+        team_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            if team_id is None:
+                employee_ids = [employee_id]
+            else:
+                employee_ids = list(self.store.user_ids_by_team.get(team_id, {}))
+            result = []
+            for user_id in employee_ids:
+                user = self.store.users.get(user_id)
+                if user is None:
+                    continue
+                for vacation_id in self.store.vacation_ids_by_employee.get(user_id, {}):
+                    row = self.store.vacations[vacation_id]
+                    if row['status'] == 'Approved':
+                        result.append({
+                            "id": row['id'],
+                            "employee_id": user_id,
+                            "start_date": row['start_date'],
+                            "end_date": row['end_date'],
+                            "submitted_at": row['submitted_at'],
+                            "decided_at": row.get('decided_at'),
+                            "name": user['name'],
+                            "email": user['email'],
+                        })
+        result.sort(key=lambda row: (row['start_date'], row['id']))
+        return result
+
+    def get_report_columns(self) -> Dict[str, List[Any]]:
+        with self.store.lock:
+            columns: Dict[str, List[Any]] = {name: [] for name in vacation_repo.REPORT_COLUMNS}
+            for row in self.store.vacations.values():
+                columns['employee_id'].append(row['employee_id'])
+                columns['start_date'].append(row['start_date'])
+                columns['end_date'].append(row['end_date'])
+                columns['status'].append(row['status'])
+                columns['submitted_at'].append(int(row['submitted_at']))
+                columns['decided_at'].append(int(row['decided_at']) if row['decided_at'] is not None else None)
+            for row in self.store.archived_report_rows:
+                for name, value in zip(vacation_repo.REPORT_COLUMNS, row):
+                    columns[name].append(value)
+            return columns
+
+    def update_request_status(
+        self,
+        request_id: int,
+        new_status: str,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        with self.store.lock:
+            row = self.store.vacations.get(request_id)
+            if row is None or (expected_version is not None and row['version'] != expected_version):
+                return False
+            self.repos._put_vacation(dict(
+                row, status=new_status, decided_at=str(int(time())), version=row['version'] + 1
+            ))
+            if new_status == 'Approved':
+                self.repos._bump(cache_sync.VACATIONS, cache_sync.APPROVED_VACATIONS)
+            else:
+                self.repos._bump(cache_sync.VACATIONS)
+            self.repos.commit()
+            return True
+
+    def update_vacation_request(
+        self,
+        request_id: int,
+        new_start_date: str,
+        new_end_date: str,
+        new_total_days: int,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        with self.store.lock:
+            row = self.store.vacations.get(request_id)
+            if row is None or row['status'] != 'Pending':
+                return False
+            if expected_version is not None and row['version'] != expected_version:
+                return False
+            self.repos._put_vacation(dict(
+                row,
+                start_date=new_start_date,
+                end_date=new_end_date,
+                total_days=new_total_days,
+                version=row['version'] + 1
+            ))
+            self.repos._bump(cache_sync.VACATIONS)
+            self.repos.commit()
+            return True
+
+    def delete_vacation_request(self, request_id: int) -> bool:
+        with self.store.lock:
+            row = self.store.vacations.get(request_id)
+            if row is None or row['status'] != 'Pending':
+                return False
+            self.repos._remove_vacation(request_id)
+            self.repos._bump(cache_sync.VACATIONS)
+            self.repos.commit()
+            return True
+
+
+#
+# TÝMY
+#
+class MemoryTeamRepository:
+    def __init__(self, store: MemoryStore, repos: "MemoryRepositories"):
+        self.store = store
+        self.repos = repos
+
+    def get_all_teams(self) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = sorted(self.store.teams.values(), key=lambda team: team['name'])
+            return [dict(team, members=len(self.store.user_ids_by_team.get(team['id'], {}))) for team in rows]
+
+    def get_team_by_id(self, team_id: int) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            team = self.store.teams.get(team_id)
+            return dict(team) if team is not None else None
+
+    def get_admin_teams(self, admin_id: int) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = (self.store.teams[team_id] for team_id in self.store.team_ids_by_admin.get(admin_id, {}))
+            return sorted((dict(team) for team in rows), key=lambda team: team['name'])
+
+    def get_team_admins(self) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = []
+            for admin_id, team_ids in self.store.team_ids_by_admin.items():
+                user = self.store.users.get(admin_id)
+                if user is None:
+                    continue
+                for team_id in team_ids:
+                    rows.append({"team_id": team_id, "admin_id": admin_id, "name": user['name'], "email": user['email']})
+        rows.sort(key=lambda row: (row['team_id'], row['email']))
+        return rows
+
+    def create_team(self, name: str) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            if any(team['name'] == name for team in self.store.teams.values()):
+                return None
+            row = {"id": self.store.next_team_id, "name": name}
+            self.repos._put_team(row)
+            self.repos.commit()
+            return dict(row)
+
+    def assign_admin(self, admin_id: int, team_id: int) -> bool:
+        with self.store.lock:
+            if team_id in self.store.team_ids_by_admin.get(admin_id, {}):
+                return False
+            self.repos._set_admin_team(admin_id, team_id, True)
+            self.repos.commit()
+            return True
+
+    def unassign_admin(self, admin_id: int, team_id: int) -> bool:
+        with self.store.lock:
+            if team_id not in self.store.team_ids_by_admin.get(admin_id, {}):
+                return False
+            self.repos._set_admin_team(admin_id, team_id, False)
+            self.repos.commit()
+            return True
+
+
+#
+# SADA REPOZITÁŘŮ S DENÍKEM ZMĚN PRO ROLLBACK
+#
+class MemoryRepositories:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.users = MemoryUserRepository(store, self)
+        self.vacations = MemoryVacationRepository(store, self)
+        self.teams = MemoryTeamRepository(store, self)
+        self._journal: List[Tuple[str, Any, Any]] = []
+        self._in_atomic_block = False
+
+    def _put_user(self, row: Dict[str, Any]) -> None:
+        self._journal.append(("user", row['id'], self.store.users.get(row['id'])))
+        self.store.put_user(row)
+
+    def _remove_user(self, user_id: int) -> None:
+        self._journal.append(("user", user_id, self.store.users.get(user_id)))
+        self.store.remove_user(user_id)
+
+    def _put_vacation(self, row: Dict[str, Any]) -> None:
+        self._journal.append(("vacation", row['id'], self.store.vacations.get(row['id'])))
+        self.store.put_vacation(row)
+
+    def _remove_vacation(self, vacation_id: int) -> None:
+        self._journal.append(("vacation", vacation_id, self.store.vacations.get(vacation_id)))
+        self.store.remove_vacation(vacation_id)
+
+    def _put_team(self, row: Dict[str, Any]) -> None:
+        self._journal.append(("team", row['id'], self.store.teams.get(row['id'])))
+        self.store.put_team(row)
+
+    def _set_admin_team(self, admin_id: int, team_id: int, assigned: bool) -> None:
+        was_assigned = team_id in self.store.team_ids_by_admin.get(admin_id, {})
+        self._journal.append(("admin_team", (admin_id, team_id), was_assigned))
+        self.store.set_admin_team(admin_id, team_id, assigned)
+
+    def _append_ledger(self, user_id: int, delta: int, reason: str, vacation_id: Optional[int]) -> None:
+        self._journal.append(("ledger", None, None))
+        self.store.ledger.append({
+            "id": len(self.store.ledger) + 1,
+            "user_id": user_id,
+            "vacation_id": vacation_id,
+            "delta": delta,
+            "reason": reason,
+            "created_at": str(int(time())),
+        })
+
+    def _bump(self, *scopes: str) -> None:
+        for scope in scopes:
+            self._journal.append(("version", scope, self.store.versions.get(scope, 0)))
+            self.store.versions[scope] = self.store.versions.get(scope, 0) + 1
+
+    def commit(self) -> None:
+        # Uvnitř transaction() potvrzuje až konec bloku
+        if not self._in_atomic_block:
+            self._journal.clear()
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[None]:
+        # Zámek úložiště po celý blok: souběžný požadavek mezi čtením a zápisem nic nezmění (jako BEGIN IMMEDIATE)
+        with self.store.lock:
+            if self._in_atomic_block:
+                yield
+                return
+            self._in_atomic_block = True
+            try:
+                yield
+            except BaseException:
+                self._in_atomic_block = False
+                self.rollback()
+                raise
+            self._in_atomic_block = False
+            self.commit()
+
+    def rollback(self) -> None:
+        with self.store.lock:
+            while self._journal:
+                kind, key, previous = self._journal.pop()
+                if kind == "ledger":
+                    self.store.ledger.pop()
+                elif kind == "version":
+                    self.store.versions[key] = previous
+                elif kind == "team":
+                    if previous is None:
+                        self.store.teams.pop(key, None)
+                    else:
+                        self.store.put_team(previous)
+                elif kind == "admin_team":
+                    self.store.set_admin_team(key[0], key[1], previous)
+                elif kind == "user":
+                    if previous is None:
+                        self.store.remove_user(key)
+                    else:
+                        self.store.put_user(previous)
+                else:
+                    if previous is None:
+                        self.store.remove_vacation(key)
+                    else:
+                        self.store.put_vacation(previous)
+
+    def cache_version(self, scope: str, refresh: bool = False) -> int:
+        return self.store.versions.get(scope, 0)
+
+
+_store: Optional[MemoryStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> MemoryStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            # Výchozí obsah je kopie SQLite databáze, pokud existuje
+            from app.models.db import DB_PATH
+            if os.path.exists(DB_PATH):
+                conn = sqlite3.connect(DB_PATH)
+                try:
+                    _store = MemoryStore.from_sqlite(conn)
+                finally:
+                    conn.close()
+            else:
+                _store = MemoryStore()
+        return _store
@@ -0,0 +1,77 @@
+# app/repositories/session_repo.py
+
+import sqlite3
+from typing import Optional, Dict, Any, List, Tuple
+from app.models import cache_sync
+from app.models.db import retry_on_busy
+
+SESSION_COLUMNS = "id, user_id, email, is_admin, is_super_admin, created_at, last_seen, expires_at"
+
+
+#
+# OPERACE ČTENÍ (READ)
+#
+def get_session(conn: sqlite3.Connection, session_id: str) -> Optional[Dict[str, Any]]:
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {SESSION_COLUMNS} FROM sessions WHERE id = ?", (session_id,))
+    session = cursor.fetchone()
+    if session:
+        return dict(session)
+    return None
+
+def get_recent_sessions(conn: sqlite3.Connection, now: int, limit: int) -> List[Dict[str, Any]]:
+    # Platnost je klouzavá, nejpozději vypršící relace jsou zároveň naposledy použité (index expires_at)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {SESSION_COLUMNS} FROM sessions WHERE expires_at >= ? ORDER BY expires_at DESC LIMIT ?",
+        (now, limit)
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+#
+# OPERACE TVORBY A PRODLOUŽENÍ
+#
+@retry_on_busy
+def create_session(conn: sqlite3.Connection, session: Dict[str, Any]) -> None:
+    conn.execute(
+        f"INSERT INTO sessions ({SESSION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (session['id'], session['user_id'], session['email'], session['is_admin'], session['is_super_admin'],
+         session['created_at'], session['last_seen'], session['expires_at'])
+    )
+    conn.commit()
+
+@retry_on_busy
+def touch_sessions(conn: sqlite3.Connection, touches: List[Tuple[int, int, str]], now: int) -> int:
+    """Dávkový zápis (last_seen, expires_at, id) a úklid prošlých relací; vrací počet smazaných."""
+    cursor = conn.cursor()
+    # Platnost se jen prodlužuje: jiný worker mohl zapsat novější čas
+    cursor.executemany(
+        "UPDATE sessions SET last_seen = MAX(last_seen, ?), expires_at = MAX(expires_at, ?) WHERE id = ?",
+        touches
+    )
+    cursor.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+    conn.commit()
+    return cursor.rowcount
+
+
+#
+# ODVOLÁNÍ RELACÍ
+#
+@retry_on_busy
+def delete_session(conn: sqlite3.Connection, session_id: str) -> bool:
+    # Bez zvýšení verze: jedno odhlášení nesmí vyprázdnit cache relací všech workerů,
+    # ostatní workery relaci ověří v databázi po vypršení SESSION_CACHE_TTL_SECONDS
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+    conn.commit()
+    return cursor.rowcount == 1
+
+@retry_on_busy
+def delete_user_sessions(conn: sqlite3.Connection, user_id: int) -> int:
+    # Hromadné odvolání (změna rolí, smazání uživatele) musí platit hned: ostatní workery zahodí cache podle verze
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+    cache_sync.bump(conn, (cache_sync.SESSIONS,))
+    conn.commit()
+    return cursor.rowcount
@@ -0,0 +1,258 @@
+# app/repositories/sqlite_backend.py
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, ContextManager
+from app.models.schemas import EmployeeCreateByAdmin
+from app.models import cache_sync
+from app.models.db import ConnectionPool, transaction
+import app.repositories.user_repo as user_repo
+import app.repositories.vacation_repo as vacation_repo
+import app.repositories.ledger_repo as ledger_repo
+import app.repositories.team_repo as team_repo
+
+
+#
+# UŽIVATELÉ (obal nad funkcemi user_repo)
+#
+class SqliteUserRepository:
+    def __init__(self, repos: "SqliteRepositories"):
+        self.repos = repos
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.repos.conn
+
+    def get_all_users_for_admin_management(self) -> List[Dict[str, Any]]:
+        return user_repo.get_all_users_for_admin_management(self.conn)
+
+    def iter_users_for_admin_management(self) -> Iterator[Dict[str, Any]]:
+        with self.repos.streaming_conn() as conn:
+            yield from user_repo.iter_users_for_admin_management(conn)
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return user_repo.get_user_by_email(self.conn, email)
+
+    def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return user_repo.get_user_by_id(self.conn, user_id)
+
+    def get_all_employees(self, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        return user_repo.get_all_employees(self.conn, team_ids)
+
+    def search_users(
+        self,
+        query: str,
+        employees_only: bool = False,
+        limit: int = 50,
+        offset: int = 0,
+        team_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        return user_repo.search_users(self.conn, query, employees_only, limit, offset, team_ids)
+
+    def create_user(
+        self,
+        user_data: EmployeeCreateByAdmin,
+        hashed_password: str,
+        is_admin: bool = False,
+        is_super_admin: bool = False,
+        team_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        return user_repo.create_user(self.conn, user_data, hashed_password, is_admin, is_super_admin, team_id)
+
+    def update_user_remaining_days(
+        self,
+        user_id: int,
+        days_change: int,
+        reason: str = ledger_repo.ADJUSTMENT,
+        vacation_id: Optional[int] = None
+    ) -> bool:
+        return user_repo.update_user_remaining_days(self.conn, user_id, days_change, reason, vacation_id)
+
+    def reset_user_balance(self, user_id: int, new_balance: int) -> bool:
+        return user_repo.reset_user_balance(self.conn, user_id, new_balance)
+
+    def update_profile_picture(self, user_id: int, picture_path: Optional[str]) -> bool:
+        return user_repo.update_profile_picture(self.conn, user_id, picture_path)
+
+    def update_user_team(self, user_id: int, team_id: Optional[int]) -> bool:
+        return user_repo.update_user_team(self.conn, user_id, team_id)
+
+    def update_user_roles(
+        self,
+        user_id: int,
+        is_admin: bool,
+        is_super_admin: bool,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        return user_repo.update_user_roles(self.conn, user_id, is_admin, is_super_admin, expected_version)
+
+    def delete_user(self, user_id: int) -> bool:
+        return user_repo.delete_user(self.conn, user_id)
+
+
+#
+# DOVOLENÉ (obal nad funkcemi vacation_repo)
+#
+class SqliteVacationRepository:
+    def __init__(self, repos: "SqliteRepositories"):
+        self.repos = repos
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.repos.conn
+
+    def create_vacation_request(
+        self,
+        employee_id: int,
+        start_date: str,
+        end_date: str,
+        total_days: int,
+        status: str,
+        submitted_at: str
+    ) -> Optional[Dict[str, Any]]:
+        return vacation_repo.create_vacation_request(
+            self.conn, employee_id, start_date, end_date, total_days, status, submitted_at
+        )
+
+    def get_vacation_request_by_id(self, request_id: int) -> Optional[Dict[str, Any]]:
+        return vacation_repo.get_vacation_request_by_id(self.conn, request_id)
+
+    def get_active_vacation_requests(self, employee_id: int) -> List[Dict[str, Any]]:
+        return vacation_repo.get_active_vacation_requests(self.conn, employee_id)
+
+    def get_employee_vacation_history(
+        self,
+        employee_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        return vacation_repo.get_employee_vacation_history(self.conn, employee_id, limit, offset)
+
+    def get_pending_requests(self, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        return vacation_repo.get_pending_requests(self.conn, team_ids)
+
+    def get_upcoming_approved_vacations(self, limit: int = 10, team_ids: Optional[List[int]] = None) -> List[Any]:
+        return vacation_repo.get_upcoming_approved_vacations(self.conn, limit, team_ids)
+
+    def get_approved_intervals(self) -> List[Dict[str, Any]]:
+        return vacation_repo.get_approved_intervals(self.conn)
+
+    def get_calendar_vacations(
+        self,
+        employee_id: Optional[int] = None,
+        team_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return vacation_repo.get_calendar_vacations(self.conn, employee_id, team_id)
+
+    def get_report_columns(self) -> Dict[str, List[Any]]:
+        return vacation_repo.get_report_columns(self.conn)
+
+    def update_request_status(
+        self,
+        request_id: int,
+        new_status: str,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        return vacation_repo.update_request_status(self.conn, request_id, new_status, expected_version)
+
+    def update_vacation_request(
+        self,
+        request_id: int,
+        new_start_date: str,
+        new_end_date: str,
+        new_total_days: int,
+        expected_version: Optional[int] = None
+    ) -> bool:
+        return vacation_repo.update_vacation_request(
+            self.conn, request_id, new_start_date, new_end_date, new_total_days, expected_version
+        )
+
+    def delete_vacation_request(self, request_id: int) -> bool:
+        return vacation_repo.delete_vacation_request(self.conn, request_id)
+
+
+#
+# TÝMY (obal nad funkcemi team_repo)
+#
+class SqliteTeamRepository:
+    def __init__(self, repos: "SqliteRepositories"):
+        self.repos = repos
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.repos.conn
+
+    def get_all_teams(self) -> List[Dict[str, Any]]:
+        return team_repo.get_all_teams(self.conn)
+
+    def get_team_by_id(self, team_id: int) -> Optional[Dict[str, Any]]:
+        return team_repo.get_team_by_id(self.conn, team_id)
+
+    def get_admin_teams(self, admin_id: int) -> List[Dict[str, Any]]:
+        return team_repo.get_admin_teams(self.conn, admin_id)
+
+    def get_team_admins(self) -> List[Dict[str, Any]]:
+        return team_repo.get_team_admins(self.conn)
+
+    def create_team(self, name: str) -> Optional[Dict[str, Any]]:
+        return team_repo.create_team(self.conn, name)
+
+    def assign_admin(self, admin_id: int, team_id: int) -> bool:
+        return team_repo.assign_admin(self.conn, admin_id, team_id)
+
+    def unassign_admin(self, admin_id: int, team_id: int) -> bool:
+        return team_repo.unassign_admin(self.conn, admin_id, team_id)
+
+
+#
+# SADA REPOZITÁŘŮ NAD JEDNÍM PŘIPOJENÍM (z poolu se bere až při prvním dotazu)
+#
+class SqliteRepositories:
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, pool: Optional[ConnectionPool] = None):
+        self._conn = conn
+        self._pool = pool
+        self.users = SqliteUserRepository(self)
+        self.vacations = SqliteVacationRepository(self)
+        self.teams = SqliteTeamRepository(self)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._pool.acquire()
+        return self._conn
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def commit(self) -> None:
+        # Požadavek, který jen četl (nebo DB vůbec nepoužil), nemá co potvrzovat
+        if self._conn is not None and self._conn.in_transaction:
+            self._conn.commit()
+
+    def rollback(self) -> None:
+        if self._conn is not None and self._conn.in_transaction:
+            self._conn.rollback()
+
+    def transaction(self, immediate: bool = False) -> ContextManager[None]:
+        return transaction(self.conn, immediate)
+
+    @contextmanager
+    def streaming_conn(self) -> Iterator[sqlite3.Connection]:
+        # Streamovaná odpověď se čte až po návratu připojení požadavku do poolu, potřebuje proto vlastní
+        if self._pool is None:
+            yield self.conn
+            return
+        conn = self._pool.acquire()
+        try:
+            yield conn
+        finally:
+            self._pool.release(conn)
+
+    def release(self) -> None:
+        if self._pool is not None and self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def cache_version(self, scope: str, refresh: bool = False) -> int:
+        return cache_sync.version(scope, refresh)
@@ -0,0 +1,89 @@
+# app/repositories/team_repo.py
+
+import sqlite3
+from typing import Optional, Dict, Any, List, Tuple
+from app.models.db import retry_on_busy
+
+
+#
+# OPERACE ČTENÍ (READ)
+#
+def get_all_teams(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    query = """
+    SELECT t.id, t.name, COUNT(u.id) AS members
+    FROM teams t
+    LEFT JOIN users u ON u.team_id = t.id
+    GROUP BY t.id
+    ORDER BY t.name
+    """
+    cursor.execute(query)
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_team_by_id(conn: sqlite3.Connection, team_id: int) -> Optional[Dict[str, Any]]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM teams WHERE id = ?", (team_id,))
+    team = cursor.fetchone()
+    if team:
+        return dict(team)
+    return None
+
+def get_admin_teams(conn: sqlite3.Connection, admin_id: int) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    query = """
+    SELECT t.id, t.name
+    FROM admin_teams a
+    JOIN teams t ON t.id = a.team_id
+    WHERE a.admin_id = ?
+    ORDER BY t.name
+    """
+    cursor.execute(query, (admin_id,))
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_team_admins(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    query = """
+    SELECT a.team_id, a.admin_id, u.name, u.email
+    FROM admin_teams a
+    JOIN users u ON u.id = a.admin_id
+    ORDER BY a.team_id, u.email
+    """
+    cursor.execute(query)
+    return [dict(row) for row in cursor.fetchall()]
+
+
+#
+# OPERACE TVORBY A PŘIŘAZENÍ
+#
+@retry_on_busy
+def create_team(conn: sqlite3.Connection, name: str) -> Optional[Dict[str, Any]]:
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO teams (name) VALUES (?)", (name,))
+    if cursor.rowcount != 1:
+        return None
+    conn.commit()
+    return get_team_by_id(conn, cursor.lastrowid)
+
+@retry_on_busy
+def assign_admin(conn: sqlite3.Connection, admin_id: int, team_id: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO admin_teams (admin_id, team_id) VALUES (?, ?)", (admin_id, team_id))
+    conn.commit()
+    return cursor.rowcount == 1
+
+@retry_on_busy
+def unassign_admin(conn: sqlite3.Connection, admin_id: int, team_id: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM admin_teams WHERE admin_id = ? AND team_id = ?", (admin_id, team_id))
+    conn.commit()
+    return cursor.rowcount == 1
+
+
+#
+# OMEZENÍ DOTAZŮ NA TÝMY ADMINA
+#
+def team_filter(column: str, team_ids: Optional[List[int]]) -> Tuple[str, List[int]]:
+    """Podmínka ' AND <column> IN (...)' a její parametry; None = bez omezení."""
+    if team_ids is None:
+        return "", []
+    return f" AND {column} IN ({', '.join('?' * len(team_ids))})", list(team_ids)
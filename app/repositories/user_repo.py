@@ -1,9 +1,15 @@
 # app/repositories/user_repo.py
 
+import re
 import sqlite3
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 from app.models.schemas import EmployeeCreateByAdmin
 from app.core.config import settings
+from app.models import cache_sync
+from app.models.db import retry_on_busy
+import app.repositories.archive_repo as archive_repo
+import app.repositories.ledger_repo as ledger_repo
+import app.repositories.team_repo as team_repo
 
 
 #
@@ -12,17 +18,33 @@ from app.core.config import settings
 def get_all_users_for_admin_management(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
     cursor = conn.cursor()
     query = """
-    SELECT id, name, email, is_admin, is_super_admin, remaining_days 
+    SELECT id, name, email, is_admin, is_super_admin, remaining_days, version, team_id 
     FROM users 
     ORDER BY email
     """
     cursor.execute(query)
     return [dict(row) for row in cursor.fetchall()]
 
+def iter_users_for_admin_management(conn: sqlite3.Connection, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """Stejné řádky jako get_all_users_for_admin_management, ale čtené z kurzoru postupně."""
+    cursor = conn.cursor()
+    query = """
+    SELECT id, name, email, is_admin, is_super_admin, remaining_days, version, team_id 
+    FROM users 
+    ORDER BY email
+    """
+    cursor.execute(query)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+
 def get_user_by_email(conn: sqlite3.Connection, email: str) -> Optional[Dict[str, Any]]:
     cursor = conn.cursor()
     query = """
-    SELECT id, email, hashed_password, is_admin, is_super_admin, remaining_days, profile_picture_path, name 
+    SELECT id, email, hashed_password, is_admin, is_super_admin, remaining_days, profile_picture_path, name, team_id 
     FROM users 
     WHERE email = ?
     """
@@ -35,7 +57,7 @@ def get_user_by_email(conn: sqlite3.Connection, email: str) -> Optional[Dict[str
 def get_user_by_id(conn: sqlite3.Connection, user_id: int) -> Optional[Dict[str, Any]]:
     cursor = conn.cursor()
     query = """
-    SELECT id, email, hashed_password, is_admin, is_super_admin, remaining_days, profile_picture_path, name 
+    SELECT id, email, hashed_password, is_admin, is_super_admin, remaining_days, profile_picture_path, name, team_id 
     FROM users 
     WHERE id = ?
     """
@@ -45,27 +67,60 @@ def get_user_by_id(conn: sqlite3.Connection, user_id: int) -> Optional[Dict[str,
         return dict(user)
     return None
 
-def get_all_employees(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+def get_all_employees(conn: sqlite3.Connection, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    if team_ids is not None and not team_ids:
+        return []
+    scope, params = team_repo.team_filter("team_id", team_ids)
     cursor = conn.cursor()
-    query = """
-    SELECT id, email, remaining_days, profile_picture_path, name 
+    query = f"""
+    SELECT id, email, remaining_days, profile_picture_path, name, team_id 
     FROM users 
-    WHERE is_admin = 0 AND is_super_admin = 0 
+    WHERE is_admin = 0 AND is_super_admin = 0{scope}
     ORDER BY email
     """
-    cursor.execute(query)
+    cursor.execute(query, params)
+    return [dict(row) for row in cursor.fetchall()]
+
+def _match_expression(query: str) -> str:
+    # Každé slovo jako samostatný prefix v uvozovkách, aby vstup nemohl obsahovat syntaxi FTS5
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", query))
+
+def search_users(
+    conn: sqlite3.Connection,
+    query: str,
+    employees_only: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+    team_ids: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    match = _match_expression(query)
+    if not match or (team_ids is not None and not team_ids):
+        return []
+    scope, scope_params = team_repo.team_filter("u.team_id", team_ids)
+    cursor = conn.cursor()
+    sql = f"""
+    SELECT u.id, u.name, u.email, u.is_admin, u.is_super_admin, u.remaining_days, u.profile_picture_path, u.version, u.team_id
+    FROM users_fts
+    JOIN users u ON u.id = users_fts.rowid
+    WHERE users_fts MATCH ? {"AND u.is_admin = 0 AND u.is_super_admin = 0" if employees_only else ""}{scope}
+    ORDER BY bm25(users_fts, 2.0, 1.0), u.email
+    LIMIT ? OFFSET ?
+    """
+    cursor.execute(sql, (match, *scope_params, limit, offset))
     return [dict(row) for row in cursor.fetchall()]
 
 
 #
 # OPERACE TVORBY (CREATE)
 #
+@retry_on_busy
 def create_user(
     conn: sqlite3.Connection, 
     user_data: EmployeeCreateByAdmin, 
     hashed_password: str, 
     is_admin: bool = False, 
-    is_super_admin: bool = False
+    is_super_admin: bool = False,
+    team_id: Optional[int] = None
 ) -> Optional[Dict[str, Any]]:
     
     remaining_days = user_data.remaining_days if user_data.remaining_days is not None else settings.DEFAULT_VACATION_DAYS
@@ -74,37 +129,77 @@ def create_user(
     
     cursor = conn.cursor()
     query = """
-    INSERT INTO users (email, hashed_password, is_admin, is_super_admin, remaining_days, name) 
-    VALUES (?, ?, ?, ?, ?, ?)
+    INSERT INTO users (email, hashed_password, is_admin, is_super_admin, remaining_days, name, team_id) 
+    VALUES (?, ?, ?, ?, ?, ?, ?)
     """ 
-    cursor.execute(query, (user_data.email, hashed_password, admin_flag, super_admin_flag, remaining_days, user_data.name))
+    cursor.execute(query, (
+        user_data.email, hashed_password, admin_flag, super_admin_flag, remaining_days, user_data.name, team_id
+    ))
+    last_id = cursor.lastrowid
+    ledger_repo.append_opening(conn, last_id, remaining_days)
+    cache_sync.bump(conn, (cache_sync.USERS,))
     conn.commit()
     
-    last_id = cursor.lastrowid
     return get_user_by_id(conn, last_id)
 
 
 #
 # OPERACE AKTUALIZACE (UPDATE)
 #
-def update_user_remaining_days(conn: sqlite3.Connection, user_id: int, days_change: int) -> bool:
-    user = get_user_by_id(conn, user_id)
-    if not user:
+@retry_on_busy
+def update_user_remaining_days(
+    conn: sqlite3.Connection,
+    user_id: int,
+    days_change: int,
+    reason: str = ledger_repo.ADJUSTMENT,
+    vacation_id: Optional[int] = None
+) -> bool:
+    if not ledger_repo.append_movement(conn, user_id, days_change, reason, vacation_id):
         return False
-        
-    current_remaining_days = user['remaining_days']
-    new_remaining_days = current_remaining_days + days_change
-    if new_remaining_days < 0:
-        return False 
-        
-    cursor = conn.cursor()
-    query = "UPDATE users SET remaining_days = ? WHERE id = ?"
-    cursor.execute(query, (new_remaining_days, user_id))
+    cache_sync.bump(conn, (cache_sync.USERS,))
     conn.commit() 
-    
-    return cursor.rowcount == 1
+    return True
 
-def update_user_roles(conn: sqlite3.Connection, user_id: int, is_admin: bool, is_super_admin: bool) -> bool:
+@retry_on_busy
+def reset_user_balance(conn: sqlite3.Connection, user_id: int, new_balance: int) -> bool:
+    if not ledger_repo.append_rollover(conn, user_id, new_balance):
+        return False
+    cache_sync.bump(conn, (cache_sync.USERS,))
+    conn.commit()
+    return True
+
+@retry_on_busy
+def update_profile_picture(conn: sqlite3.Connection, user_id: int, picture_path: Optional[str]) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE users SET profile_picture_path = ?, version = version + 1 WHERE id = ?",
+        (picture_path, user_id)
+    )
+    if cursor.rowcount != 1:
+        return False
+    cache_sync.bump(conn, (cache_sync.USERS,))
+    conn.commit()
+    return True
+
+@retry_on_busy
+def update_user_team(conn: sqlite3.Connection, user_id: int, team_id: Optional[int]) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET team_id = ?, version = version + 1 WHERE id = ?", (team_id, user_id))
+    if cursor.rowcount != 1:
+        return False
+    # Změní se i obsah týmových kalendářů
+    cache_sync.bump(conn, (cache_sync.USERS, cache_sync.APPROVED_VACATIONS))
+    conn.commit()
+    return True
+
+@retry_on_busy
+def update_user_roles(
+    conn: sqlite3.Connection,
+    user_id: int,
+    is_admin: bool,
+    is_super_admin: bool,
+    expected_version: Optional[int] = None
+) -> bool:
     if is_super_admin:
         is_admin = False
         
@@ -112,23 +207,37 @@ def update_user_roles(conn: sqlite3.Connection, user_id: int, is_admin: bool, is
     super_admin_flag = 1 if is_super_admin else 0
     
     cursor = conn.cursor()
-    cursor.execute("""
+    query = """
         UPDATE users 
-        SET is_admin = ?, is_super_admin = ?
+        SET is_admin = ?, is_super_admin = ?, version = version + 1
         WHERE id = ?
-    """, (admin_flag, super_admin_flag, user_id))
+    """
+    params = [admin_flag, super_admin_flag, user_id]
+    if expected_version is not None:
+        # Compare-and-swap: změna se neprovede, pokud řádek mezitím upravil někdo jiný
+        query += " AND version = ?"
+        params.append(expected_version)
+    cursor.execute(query, params)
+    if cursor.rowcount == 0:
+        return False
+    cache_sync.bump(conn, (cache_sync.USERS, cache_sync.APPROVED_VACATIONS))
     conn.commit()
     
-    return cursor.rowcount > 0
+    return True
 
 
 #
 # OPERACE MAZÁNÍ (DELETE)
 #
+@retry_on_busy
 def delete_user(conn: sqlite3.Connection, user_id: int) -> bool:
     cursor = conn.cursor()
     cursor.execute("DELETE FROM vacations WHERE employee_id = ?", (user_id,))
+    cursor.execute("DELETE FROM balance_ledger WHERE user_id = ?", (user_id,))
     cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    cache_sync.bump(conn, (cache_sync.USERS, cache_sync.VACATIONS, cache_sync.APPROVED_VACATIONS))
     conn.commit()
+    # Archivy až po potvrzení: neúspěšné smazání uživatele nesmí připravit o jeho historii
+    conn.on_commit(lambda: archive_repo.delete_employee_archived(user_id))
     
     return True
\ No newline at end of file
@@ -3,12 +3,20 @@
 import sqlite3
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from time import time
 from app.models.schemas import VacationRequest
+from app.models import cache_sync
+from app.models.db import retry_on_busy
+import app.repositories.archive_repo as archive_repo
+import app.repositories.team_repo as team_repo
+
+REPORT_COLUMNS = ("employee_id", "start_date", "end_date", "status", "submitted_at", "decided_at")
 
 
 #
 # OPERACE TVORBY (CREATE)
 #
+@retry_on_busy
 def create_vacation_request(
     conn: sqlite3.Connection, 
     employee_id: int, 
@@ -31,6 +39,7 @@ def create_vacation_request(
         status, 
         submitted_at
     ))
+    cache_sync.bump(conn, (cache_sync.VACATIONS,))
     conn.commit() 
     
     last_id = cursor.lastrowid
@@ -58,68 +67,185 @@ def get_active_vacation_requests(conn: sqlite3.Connection, employee_id: int) ->
     cursor.execute(query, (employee_id,))
     return [dict(row) for row in cursor.fetchall()]
 
-def get_employee_vacation_history(conn: sqlite3.Connection, employee_id: int) -> List[Dict[str, Any]]:
+def get_employee_vacation_history(
+    conn: sqlite3.Connection,
+    employee_id: int,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[Dict[str, Any]]:
+    """Nejprve aktuální záznamy, pak archivy od nejnovějšího roku; archivy se čtou jen když je třeba."""
     cursor = conn.cursor()
-    query = "SELECT * FROM vacations WHERE employee_id = ? ORDER BY submitted_at DESC"
-    cursor.execute(query, (employee_id,))
-    return [dict(row) for row in cursor.fetchall()]
+    query = "SELECT * FROM vacations WHERE employee_id = ? ORDER BY submitted_at DESC LIMIT ? OFFSET ?"
+    cursor.execute(query, (employee_id, -1 if limit is None else limit, offset))
+    history = [dict(row) for row in cursor.fetchall()]
+    if limit is not None and len(history) == limit:
+        return history
+
+    years = archive_repo.list_archive_years()
+    if not years:
+        return history
 
-def get_pending_requests(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    # Posun v archivech = posun za všemi aktuálními záznamy
+    if history:
+        skip = 0
+    else:
+        cursor.execute("SELECT COUNT(*) FROM vacations WHERE employee_id = ?", (employee_id,))
+        skip = max(0, offset - cursor.fetchone()[0])
+
+    for year in years:
+        remaining = -1 if limit is None else limit - len(history)
+        if remaining == 0:
+            break
+        if skip > 0:
+            archived = archive_repo.count_employee_archived(conn, year, employee_id)
+            if archived <= skip:
+                skip -= archived
+                continue
+        history.extend(archive_repo.get_employee_archived_history(conn, year, employee_id, remaining, skip))
+        skip = 0
+    return history
+
+def get_pending_requests(conn: sqlite3.Connection, team_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    if team_ids is not None and not team_ids:
+        return []
+    scope, params = team_repo.team_filter("u.team_id", team_ids)
     cursor = conn.cursor()
-    query = """
+    query = f"""
     SELECT v.*, u.name FROM vacations v 
     JOIN users u ON v.employee_id = u.id 
-    WHERE v.status = 'Pending' 
+    WHERE v.status = 'Pending'{scope}
     ORDER BY v.submitted_at ASC
     """
-    cursor.execute(query)
+    cursor.execute(query, params)
     return [dict(row) for row in cursor.fetchall()]
 
-def get_upcoming_approved_vacations(conn: sqlite3.Connection, limit: int = 10):
+def get_upcoming_approved_vacations(conn: sqlite3.Connection, limit: int = 10, team_ids: Optional[List[int]] = None):
+    if team_ids is not None and not team_ids:
+        return []
+    scope, params = team_repo.team_filter("u.team_id", team_ids)
     today = datetime.now().strftime('%Y-%m-%d')
     cursor = conn.cursor()
-    query = """
+    query = f"""
     SELECT v.start_date, v.end_date, u.name 
     FROM vacations v 
     JOIN users u ON v.employee_id = u.id 
     WHERE v.status = 'Approved' 
-    AND v.end_date >= ? 
+    AND v.end_date >= ?{scope}
     ORDER BY v.start_date ASC 
     LIMIT ?
     """
-    cursor.execute(query, (today, limit)) 
+    cursor.execute(query, (today, *params, limit)) 
     return cursor.fetchall()
 
+def get_approved_intervals(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor = conn.cursor()
+    query = """
+    SELECT v.start_date, v.end_date, v.employee_id, u.is_admin, u.is_super_admin 
+    FROM vacations v 
+    JOIN users u ON v.employee_id = u.id 
+    WHERE v.status = 'Approved'
+    """
+    cursor.execute(query)
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_calendar_vacations(
+    conn: sqlite3.Connection,
+    employee_id: Optional[int] = None,
+    team_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Schválené dovolené jednoho zaměstnance, nebo (s team_id) všech členů týmu."""
+    column, value = ("v.employee_id", employee_id) if team_id is None else ("u.team_id", team_id)
+    cursor = conn.cursor()
+    query = f"""
+    SELECT v.id, v.employee_id, v.start_date, v.end_date, v.submitted_at, v.decided_at, u.name, u.email
+    FROM vacations v
+    JOIN users u ON v.employee_id = u.id
+    WHERE v.status = 'Approved' AND {column} = ?
+    ORDER BY v.start_date, v.id
+    """
+    cursor.execute(query, (value,))
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_report_columns(conn: sqlite3.Connection) -> Dict[str, List[Any]]:
+    """Všechny žádosti včetně archivovaných po sloupcích (bez slovníku na řádek) pro agregace reportů."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    query = """
+    SELECT employee_id, start_date, end_date, status,
+           CAST(submitted_at AS INTEGER), CAST(decided_at AS INTEGER)
+    FROM vacations
+    """
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    for year in archive_repo.list_archive_years():
+        rows.extend(archive_repo.get_archived_report_rows(conn, year))
+    columns = list(zip(*rows)) if rows else [()] * len(REPORT_COLUMNS)
+    return {name: list(values) for name, values in zip(REPORT_COLUMNS, columns)}
+
 
 #
 # OPERACE AKTUALIZACE (UPDATE)
 #
-def update_request_status(conn: sqlite3.Connection, request_id: int, new_status: str) -> bool:
+@retry_on_busy
+def update_request_status(
+    conn: sqlite3.Connection,
+    request_id: int,
+    new_status: str,
+    expected_version: Optional[int] = None
+) -> bool:
     cursor = conn.cursor()
-    query = "UPDATE vacations SET status = ? WHERE id = ?"
-    cursor.execute(query, (new_status, request_id))
+    # decided_at (unixový čas jako submitted_at) slouží reportům doby vyřízení
+    query = "UPDATE vacations SET status = ?, decided_at = ?, version = version + 1 WHERE id = ?"
+    params = [new_status, str(int(time())), request_id]
+    if expected_version is not None:
+        # Compare-and-swap: souběžné schválení/úprava téže žádosti se projeví jako nula změněných řádků
+        query += " AND version = ?"
+        params.append(expected_version)
+    cursor.execute(query, params)
+    if cursor.rowcount != 1:
+        return False
+    if new_status == 'Approved':
+        cache_sync.bump(conn, (cache_sync.VACATIONS, cache_sync.APPROVED_VACATIONS))
+    else:
+        cache_sync.bump(conn, (cache_sync.VACATIONS,))
     conn.commit() 
-    return cursor.rowcount == 1
+    return True
 
+@retry_on_busy
 def update_vacation_request(
     conn: sqlite3.Connection,
     request_id: int,
     new_start_date: str,
     new_end_date: str,
-    new_total_days: int
+    new_total_days: int,
+    expected_version: Optional[int] = None
 ) -> bool:
     """Aktualizuje data existující žádosti o dovolenou v DB."""
     cursor = conn.cursor()
     query = """
     UPDATE vacations 
-    SET start_date = ?, end_date = ?, total_days = ?
+    SET start_date = ?, end_date = ?, total_days = ?, version = version + 1
     WHERE id = ? AND status = 'Pending'
     """
-    cursor.execute(query, (
-        new_start_date,
-        new_end_date,
-        new_total_days,
-        request_id
-    ))
+    params = [new_start_date, new_end_date, new_total_days, request_id]
+    if expected_version is not None:
+        query += " AND version = ?"
+        params.append(expected_version)
+    cursor.execute(query, params)
+    if cursor.rowcount != 1:
+        return False
+    cache_sync.bump(conn, (cache_sync.VACATIONS,))
+    conn.commit()
+    return True
+
+
+#
+# OPERACE MAZÁNÍ (DELETE)
+#
+@retry_on_busy
+def delete_vacation_request(conn: sqlite3.Connection, request_id: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM vacations WHERE id = ? AND status = 'Pending'", (request_id,))
+    cache_sync.bump(conn, (cache_sync.VACATIONS,))
     conn.commit()
     return cursor.rowcount == 1
\ No newline at end of file
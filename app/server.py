@@ -0,0 +1,126 @@
+# app/server.py
+"""
+Produkční spuštění s více workery:
+
+    python -m app.server --workers 4 --bind 0.0.0.0:8000
+
+Je-li nainstalován gunicorn, aplikace se načte jednou v hlavním procesu
+(preload) a workery ji zdědí forkem; každý worker si po forku otevře vlastní
+pool připojení. Bez gunicornu (např. na Windows) se použije uvicorn
+s více procesy. uvloop a httptools se použijí, jsou-li dostupné.
+Cache workerů zůstávají soudržné přes tabulku cache_versions (app.models.cache_sync).
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from typing import Optional, List
+
+APP_PATH = "app.main:app"
+
+
+#
+# VOLBA SMYČKY UDÁLOSTÍ A HTTP PARSERU
+#
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def event_loop() -> str:
+    return "uvloop" if _available("uvloop") else "asyncio"
+
+def http_parser() -> str:
+    return "httptools" if _available("httptools") else "h11"
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+#
+# GUNICORN (preload + inicializace workeru po forku)
+#
+def _post_fork(server, worker) -> None:
+    from app.core.log import setup_logging
+    from app.models import db
+    # Vlákno listeneru logů zůstalo v hlavním procesu, worker si spustí vlastní
+    setup_logging()
+    db.init_pool()
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError: # gunicorn není nainstalován
+    UvicornWorker = None
+
+if UvicornWorker is not None:
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": event_loop(), "http": http_parser(), "proxy_headers": True}
+
+def run_gunicorn(bind: str, workers: int, timeout: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "app.server.Worker")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("timeout", timeout)
+            self.cfg.set("post_fork", _post_fork)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Application().run()
+
+
+#
+# UVICORN (záložní režim bez gunicornu)
+#
+def run_uvicorn(bind: str, workers: int, timeout: int) -> None:
+    import uvicorn
+
+    host, _, port = bind.rpartition(":")
+    uvicorn.run(
+        APP_PATH,
+        host=host or "0.0.0.0",
+        port=int(port),
+        workers=workers,
+        loop=event_loop(),
+        http=http_parser(),
+        proxy_headers=True,
+        timeout_keep_alive=timeout,
+    )
+
+
+#
+# PŘÍKAZOVÁ ŘÁDKA
+#
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Produkční server aplikace Dovolená.")
+    parser.add_argument("--bind", default=os.getenv("WEB_BIND", "0.0.0.0:8000"))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--timeout", type=int, default=30, help="Timeout workeru (gunicorn) / keep-alive (uvicorn) v sekundách.")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "uvicorn"), default="auto")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # Souběžné zápisy z více procesů vyžadují WAL
+    os.environ.setdefault("ENV", "production")
+    os.environ.setdefault("DB_JOURNAL_MODE", "WAL")
+
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if _available("gunicorn") and sys.platform != "win32" else "uvicorn"
+
+    if server == "gunicorn":
+        run_gunicorn(args.bind, args.workers, args.timeout)
+    else:
+        run_uvicorn(args.bind, args.workers, args.timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
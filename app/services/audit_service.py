@@ -0,0 +1,182 @@
+# app/services/audit_service.py
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+from app.models.db import open_conn
+import app.repositories.audit_repo as audit_repo
+
+logger = logging.getLogger(__name__)
+
+VACATION_APPROVE = "vacation.approve"
+VACATION_REJECT = "vacation.reject"
+USER_ROLE_CHANGE = "user.role_change"
+USER_DELETE = "user.delete"
+
+ACTION_LABELS = {
+    VACATION_APPROVE: "Schválení žádosti",
+    VACATION_REJECT: "Zamítnutí žádosti",
+    USER_ROLE_CHANGE: "Změna role",
+    USER_DELETE: "Smazání uživatele",
+}
+
+
+def user_roles(user: Dict[str, Any]) -> Dict[str, int]:
+    return {"is_admin": int(user['is_admin']), "is_super_admin": int(user.get('is_super_admin') or 0)}
+
+def user_summary(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {"email": user['email'], "name": user['name'], **user_roles(user)}
+
+def _to_json(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+#
+# ZAPISOVAČ NA POZADÍ (omezená fronta, dávky přes executemany)
+#
+class AuditWriter:
+    def __init__(self, size: int, batch_size: int):
+        self.pid = os.getpid()
+        self.batch_size = max(batch_size, 1)
+        self.queue: "queue.Queue[Tuple[Any, ...]]" = queue.Queue(maxsize=max(size, 1))
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, entry: Tuple[Any, ...]) -> None:
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # Zapisovač nestíhá: požadavek na něj nečeká, záznam zůstane aspoň v logu
+            metrics.AUDIT_ENTRIES_DROPPED.inc()
+            logger.warning("Fronta auditu je plná, záznam se do databáze nezapíše.", extra={"audit_entries": [entry]})
+
+    def _drain(self, batch: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Tuple[Any, ...]]) -> None:
+        try:
+            with self._write_lock:
+                with open_conn() as conn:
+                    audit_repo.insert_entries(conn, batch)
+            metrics.AUDIT_BATCH_SIZE.observe(len(batch))
+        except Exception:
+            # Záznamy aspoň v logu, aby stopa akcí nezmizela úplně
+            logger.exception("Zápis auditního logu selhal.", extra={"audit_entries": batch})
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self) -> None:
+        while True:
+            batch = self._drain([])
+            if not batch:
+                break
+            self._write(batch)
+        # Počká i na dávku, kterou právě zapisuje vlákno na pozadí
+        self.queue.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Pod zátěží se mezitím nahromadí další záznamy a zapíší se jedním commitem
+            self._write(self._drain([first]))
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+def _get_writer() -> AuditWriter:
+    global _writer
+    with _writer_lock:
+        # Vlákno rodiče po forku workeru neběží
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = AuditWriter(settings.AUDIT_QUEUE_SIZE, settings.AUDIT_BATCH_SIZE)
+        return _writer
+
+def flush() -> None:
+    with _writer_lock:
+        writer = _writer if _writer is not None and _writer.pid == os.getpid() else None
+    if writer is not None:
+        writer.flush()
+
+def shutdown_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.pid == os.getpid():
+            _writer.close()
+        _writer = None
+
+
+#
+# ZÁZNAM AKCE (z požadavku jen vložení do fronty)
+#
+def record(
+    actor: Dict[str, Any],
+    action: str,
+    target_type: str,
+    target_id: Optional[int],
+    before: Optional[Dict[str, Any]] = None,
+    after: Optional[Dict[str, Any]] = None
+) -> None:
+    """actor je payload přihlášeného uživatele (id, sub)."""
+    _get_writer().put((
+        int(time.time()),
+        actor.get('id'),
+        actor.get('sub'),
+        action,
+        target_type,
+        target_id,
+        _to_json(before),
+        _to_json(after),
+    ))
+
+
+#
+# PROHLÍŽENÍ AUDITNÍHO LOGU
+#
+def get_page(
+    before_id: Optional[int] = None,
+    action: Optional[str] = None,
+    page_size: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Záznamy od nejnovějšího a id pro odkaz na starší stránku (None = poslední stránka).
+
+    Blokuje (čeká na zápis fronty i na dotaz), volat mimo smyčku událostí.
+    """
+    page_size = page_size or settings.AUDIT_PAGE_SIZE
+    # Vlastní čerstvé akce mají být vidět hned, ne až po dalším cyklu zapisovače
+    flush()
+    with open_conn() as conn:
+        rows = audit_repo.get_entries(conn, page_size + 1, before_id, action)
+
+    entries = []
+    for row in rows[:page_size]:
+        row['created'] = datetime.fromtimestamp(row['created_at']).strftime('%d. %m. %Y %H:%M:%S')
+        row['action_label'] = ACTION_LABELS.get(row['action'], row['action'])
+        entries.append(row)
+    next_before = entries[-1]['id'] if len(rows) > page_size else None
+    return entries, next_before
@@ -0,0 +1,276 @@
+# app/services/backup_service.py
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from app.core import metrics
+from app.core.config import settings
+from app.models.db import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = ".backup.lock"
+# Zámek starší než tato doba zůstal po přerušeném procesu
+LOCK_STALE_SECONDS = 6 * 3600
+# Kolikrát smí zápisy jiného připojení zálohu vrátit na začátek (jen mimo WAL), pak se kopíruje jedním krokem
+MAX_RESTARTS = 5
+# Nejkratší prodleva plánovače mezi kontrolami (i po chybě)
+MIN_CHECK_SECONDS = 60
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _prefix() -> str:
+    return os.path.splitext(os.path.basename(DB_PATH))[0]
+
+def _snapshot_pattern() -> "re.Pattern[str]":
+    return re.compile(rf"^{re.escape(_prefix())}-\d{{8}}-\d{{6}}\.db(\.gz)?$")
+
+def list_snapshots(directory: Optional[str] = None) -> List[str]:
+    """Cesty k hotovým zálohám od nejnovější."""
+    directory = directory or settings.BACKUP_DIR
+    if not os.path.isdir(directory):
+        return []
+    pattern = _snapshot_pattern()
+    names = sorted((name for name in os.listdir(directory) if pattern.match(name)), reverse=True)
+    return [os.path.join(directory, name) for name in names]
+
+
+#
+# KOPIE ZA BĚHU (online backup API po omezených krocích)
+#
+class _TooManyRestarts(Exception):
+    pass
+
+def _copy_online(target_path: str, cancel: Optional[threading.Event]) -> Dict[str, int]:
+    source = sqlite3.connect(DB_PATH, timeout=settings.DB_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(target_path)
+    progress_state = {"pages": 0, "restarts": 0, "remaining": None}
+    pause = settings.BACKUP_STEP_SLEEP_MS / 1000
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        if progress_state["remaining"] is not None and remaining > progress_state["remaining"]:
+            progress_state["restarts"] += 1
+            if progress_state["restarts"] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        progress_state["remaining"] = remaining
+        progress_state["pages"] = total
+        if cancel is not None and cancel.is_set():
+            raise RuntimeError("Záloha byla přerušena ukončením aplikace.")
+        # Mezi kroky se zámek uvolní, aby zápisy aplikace nečekaly na celou kopii
+        if remaining and pause > 0:
+            time.sleep(pause)
+
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+            # Ve WAL drží otevřená čtecí transakce jeden snímek pro všechny kroky, zápisy běží dál bez restartů
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        try:
+            source.backup(target, pages=settings.BACKUP_PAGES_PER_STEP, progress=progress)
+        except _TooManyRestarts:
+            # Bez WAL by neustálé zápisy kopii po krocích nikdy nepustily dokončit
+            logger.warning("Záloha se kvůli souběžným zápisům dokončí jedním krokem.")
+            source.backup(target)
+        # Kopie přebírá režim žurnálu zdroje; záloha má být jediný soubor bez -wal/-shm
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        if source.in_transaction:
+            source.rollback()
+        target.close()
+        source.close()
+
+    return {"pages": progress_state["pages"], "restarts": progress_state["restarts"]}
+
+def _check_integrity(path: str) -> None:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as error:
+        result = [str(error)]
+    finally:
+        conn.close()
+    if result != ["ok"]:
+        raise ValueError(f"Záloha {path} neprošla kontrolou integrity: {'; '.join(result[:5])}")
+
+def _compress(source_path: str, target_path: str) -> None:
+    with open(source_path, "rb") as source, gzip.open(target_path, "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+
+def verify_snapshot(path: str) -> None:
+    """PRAGMA integrity_check nad zálohou; komprimovaná se rozbalí do dočasného souboru."""
+    if not path.endswith(".gz"):
+        _check_integrity(path)
+        return
+    fd, plain_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as target, gzip.open(path, "rb") as source:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        _check_integrity(plain_path)
+    finally:
+        os.remove(plain_path)
+
+
+#
+# ZÁMEK MEZI PROCESY (každý worker má vlastní plánovač)
+#
+def _acquire_lock(directory: str) -> bool:
+    path = os.path.join(directory, LOCK_NAME)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < LOCK_STALE_SECONDS:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as lock_file:
+            lock_file.write(str(os.getpid()))
+        return True
+    return False
+
+def _release_lock(directory: str) -> None:
+    try:
+        os.remove(os.path.join(directory, LOCK_NAME))
+    except FileNotFoundError:
+        pass
+
+
+#
+# VYTVOŘENÍ ZÁLOHY A RETENCE
+#
+def prune_snapshots(keep: int, directory: Optional[str] = None) -> List[str]:
+    """Smaže zálohy nad počet keep (nejstarší první); keep <= 0 = ponechat vše."""
+    if keep <= 0:
+        return []
+    removed = list_snapshots(directory)[keep:]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+def create_snapshot(
+    directory: Optional[str] = None,
+    compress: Optional[bool] = None,
+    keep: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    min_age_seconds: float = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Vytvoří ověřenou zálohu databáze. Vrací None, pokud zálohu právě dělá jiný proces
+    nebo je nejnovější záloha mladší než min_age_seconds.
+    """
+    directory = directory or settings.BACKUP_DIR
+    compress = settings.BACKUP_COMPRESS if compress is None else compress
+    keep = settings.BACKUP_KEEP if keep is None else keep
+    os.makedirs(directory, exist_ok=True)
+
+    if not _acquire_lock(directory):
+        return None
+    try:
+        # Kontrola až pod zámkem: jiný worker mohl zálohu právě dokončit
+        if min_age_seconds > 0 and seconds_since_last_snapshot(directory) < min_age_seconds:
+            return None
+
+        started = time.perf_counter()
+        name = f"{_prefix()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+        path = os.path.join(directory, name + (".gz" if compress else ""))
+        partial = os.path.join(directory, name + ".part")
+        compressed_partial = path + ".part"
+        try:
+            copied = _copy_online(partial, cancel)
+            _check_integrity(partial)
+            if compress:
+                _compress(partial, compressed_partial)
+                os.replace(compressed_partial, path)
+                os.remove(partial)
+            else:
+                os.replace(partial, path)
+        except BaseException:
+            for leftover in (partial, compressed_partial):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            metrics.BACKUP_DURATION.observe(time.perf_counter() - started, ("failed",))
+            raise
+
+        seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+        metrics.BACKUP_DURATION.observe(seconds, ("ok",))
+        metrics.BACKUP_SIZE_BYTES.set(size)
+        metrics.BACKUP_LAST_SUCCESS.set(time.time())
+        removed = prune_snapshots(keep, directory)
+    finally:
+        _release_lock(directory)
+
+    logger.info(
+        "Záloha databáze vytvořena.",
+        extra={"path": path, "bytes": size, "seconds": round(seconds, 3),
+               "pages": copied["pages"], "restarts": copied["restarts"], "pruned": len(removed)},
+    )
+    return {"path": path, "bytes": size, "seconds": seconds, "removed": removed, **copied}
+
+def seconds_since_last_snapshot(directory: Optional[str] = None) -> float:
+    snapshots = list_snapshots(directory)
+    if not snapshots:
+        return float("inf")
+    return time.time() - os.path.getmtime(snapshots[0])
+
+
+#
+# PLÁNOVAČ ZÁLOH (vlákno v každém workeru, o běh se dělí přes zámek)
+#
+class BackupScheduler:
+    def __init__(self, interval_seconds: float):
+        self.interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _delay(self) -> float:
+        try:
+            due_in = self.interval - seconds_since_last_snapshot()
+        except OSError:
+            due_in = 0
+        return max(due_in, MIN_CHECK_SECONDS)
+
+    def _run(self) -> None:
+        # První kontrola hned po startu, pak vždy podle stáří nejnovější zálohy
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                create_snapshot(cancel=self._stop, min_age_seconds=self.interval)
+            except Exception:
+                if not self._stop.is_set():
+                    logger.exception("Plánovaná záloha databáze selhala.")
+            delay = self._delay()
+
+
+_scheduler: Optional[BackupScheduler] = None
+
+def start_scheduler() -> None:
+    global _scheduler
+    if settings.BACKUP_INTERVAL_MINUTES <= 0 or _scheduler is not None:
+        return
+    _scheduler = BackupScheduler(settings.BACKUP_INTERVAL_MINUTES * 60)
+    _scheduler.start()
+
+def stop_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
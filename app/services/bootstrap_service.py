@@ -0,0 +1,100 @@
+# app/services/bootstrap_service.py
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from jinja2 import Environment
+from app.core import metrics
+from app.models import db
+from app.models.db import open_conn
+import app.services.session_service as session_service
+import app.services.vacation_service as vacation_service
+
+logger = logging.getLogger(__name__)
+
+# Šablony vykreslované prostředím vacation_service (e-maily), ne prostředím stránek aplikace
+EMAIL_TEMPLATES = ("vacation_email.html",)
+
+_ready = threading.Event()
+_steps: Dict[str, Dict[str, Any]] = {}
+
+
+def _run_step(name: str, func: Callable[[], Any], required: bool = True) -> Any:
+    """Změří krok startu; nepovinný krok (zahřátí cache) při chybě jen zaloguje."""
+    started = time.perf_counter()
+    try:
+        result = func()
+    except Exception:
+        _steps[name] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 3)}
+        if required:
+            raise
+        logger.exception("Krok startu '%s' selhal, worker pokračuje bez něj.", name, extra={"step": name})
+        return None
+    elapsed = time.perf_counter() - started
+    metrics.STARTUP_STEP_SECONDS.set(elapsed, (name,))
+    _steps[name] = {"ok": True, "ms": round(elapsed * 1000, 3), "result": result}
+    logger.info("Krok startu '%s' hotov.", name, extra={"step": name, "duration_ms": _steps[name]["ms"], "result": result})
+    return result
+
+
+#
+# KROKY STARTU
+#
+def _open_pool() -> int:
+    pool = db.init_pool()
+    with open_conn() as conn:
+        db.verify_schema(conn)
+    return pool.prefill()
+
+def _compile_templates(env: Environment) -> int:
+    # Kompilace šablony trvá řádově víc než její vykreslení; hotové drží Environment v cache.
+    # Každé prostředí jen své šablony: e-mailové nemá filtry stránek (date_cz) a naopak.
+    pages = [name for name in env.list_templates(extensions=["html"]) if name not in EMAIL_TEMPLATES]
+    for name in pages:
+        env.get_template(name)
+    for name in EMAIL_TEMPLATES:
+        vacation_service.template_env.get_template(name)
+    return len(pages) + len(EMAIL_TEMPLATES)
+
+def _warm_indexes() -> int:
+    # Naposledy vrácené připojení poolu se použije první (LIFO), jeho cache stránek zůstane teplá
+    with open_conn() as conn:
+        return db.warm_indexes(conn)
+
+def run(env: Environment) -> None:
+    """Start workeru: kontrola schématu, pool, šablony, indexy, relace. Teprve potom je worker připraven."""
+    _ready.clear()
+    _steps.clear()
+    started = time.perf_counter()
+    _run_step("schema_version", db.read_schema_version)
+    _run_step("pool", _open_pool)
+    _run_step("templates", lambda: _compile_templates(env), required=False)
+    _run_step("warm_indexes", _warm_indexes, required=False)
+    _run_step("sessions", session_service.prime_cache, required=False)
+    metrics.STARTUP_STEP_SECONDS.set(time.perf_counter() - started, ("total",))
+    _ready.set()
+
+
+#
+# STAV PRO /healthz A /readyz
+#
+def mark_not_ready() -> None:
+    """Při ukončení workeru: load balancer přestane posílat nové požadavky dřív, než zmizí pool."""
+    _ready.clear()
+
+def readiness() -> Optional[Dict[str, Any]]:
+    """Časy kroků startu, pokud je worker připraven a databáze odpovídá; jinak None."""
+    if not _ready.is_set():
+        return None
+    try:
+        with open_conn() as conn:
+            conn.execute("SELECT 1").fetchone()
+    except sqlite3.Error:
+        logger.exception("Kontrola připravenosti: databáze neodpovídá.")
+        return None
+    return {name: step["ms"] for name, step in _steps.items()}
+
+def startup_steps() -> Dict[str, Dict[str, Any]]:
+    return {name: {"ok": step["ok"], "ms": step["ms"]} for name, step in _steps.items()}
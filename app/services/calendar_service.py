@@ -0,0 +1,131 @@
+# app/services/calendar_service.py
+
+import hashlib
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.security import create_feed_token
+from app.models import cache_sync
+from app.repositories.base import Repositories
+
+FEED_KINDS = ("employee", "team")
+PRODID = "-//Dovolena//Kalendar dovolenych//CS"
+# RFC 5545: řádky delší než 75 oktetů se zalamují
+MAX_LINE_OCTETS = 75
+
+
+def feed_scope(kind: str, object_id: int) -> str:
+    return f"{kind}:{object_id}"
+
+def feed_path(kind: str, object_id: int) -> str:
+    return f"/calendar/{kind}/{object_id}/{create_feed_token(feed_scope(kind, object_id))}.ics"
+
+
+#
+# GENEROVÁNÍ ICALENDAR (RFC 5545)
+#
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _fold(line: str) -> str:
+    encoded = line.encode()
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line
+    parts = []
+    start, limit = 0, MAX_LINE_OCTETS
+    while len(encoded) - start > limit:
+        end = start + limit
+        # Nezalamovat uprostřed vícebajtového znaku UTF-8
+        while encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, MAX_LINE_OCTETS - 1
+    parts.append(encoded[start:].decode())
+    return "\r\n ".join(parts)
+
+def _timestamp(row: Dict[str, Any]) -> str:
+    # DTSTAMP z rozhodnutí (nebo podání), ne z aktuálního času: stejná data = stejný feed a ETag
+    try:
+        seconds = int(row.get('decided_at') or row['submitted_at'])
+    except (TypeError, ValueError):
+        seconds = 0
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def render_calendar(name: str, rows: List[Dict[str, Any]]) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    for row in rows:
+        # Celodenní událost má DTEND exkluzivní, tj. den po posledním dni dovolené
+        end = date.fromisoformat(row['end_date']) + timedelta(days=1)
+        lines.extend([
+            "BEGIN:VEVENT",
+            f"UID:vacation-{row['id']}@dovolena",
+            f"DTSTAMP:{_timestamp(row)}",
+            f"DTSTART;VALUE=DATE:{row['start_date'].replace('-', '')}",
+            f"DTEND;VALUE=DATE:{end.strftime('%Y%m%d')}",
+            f"SUMMARY:{_escape('Dovolená – ' + (row['name'] or row['email']))}",
+            "END:VEVENT",
+        ])
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode()
+
+
+#
+# CACHE FEEDŮ (platná do další změny schválených dovolených)
+#
+Feed = Tuple[str, bytes]
+
+_lock = threading.Lock()
+_version: Optional[int] = None
+_feeds: Dict[Tuple[str, int], Feed] = {}
+
+def _build_feed(repos: Repositories, kind: str, object_id: int) -> Optional[Feed]:
+    if kind == "employee":
+        user = repos.users.get_user_by_id(object_id)
+        if not user:
+            return None
+        name = f"Dovolená – {user['name'] or user['email']}"
+        rows = repos.vacations.get_calendar_vacations(employee_id=object_id)
+    else:
+        team = repos.teams.get_team_by_id(object_id)
+        if not team:
+            return None
+        name = f"Dovolená – tým {team['name']}"
+        rows = repos.vacations.get_calendar_vacations(team_id=object_id)
+
+    body = render_calendar(name, rows)
+    # ETag z obsahu: všechny workery pro stejná data vrátí stejnou hodnotu
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"', body
+
+def get_feed(repos: Repositories, kind: str, object_id: int) -> Optional[Feed]:
+    """(ETag, tělo) feedu; None, pokud zaměstnanec či tým neexistuje."""
+    global _version
+    # Změny uživatelů, které feed ovlivní (jméno, e-mail, tým, role, smazání), zvyšují i tuto verzi;
+    # běžné zápisy uživatelů (zůstatek dnů, obrázek) proto feedy nezneplatní
+    version = repos.cache_version(cache_sync.APPROVED_VACATIONS)
+    with _lock:
+        if version != _version:
+            _feeds.clear()
+            _version = version
+        feed = _feeds.get((kind, object_id))
+    if feed is not None:
+        return feed
+
+    feed = _build_feed(repos, kind, object_id)
+    if feed is not None:
+        with _lock:
+            if _version == version:
+                _feeds[(kind, object_id)] = feed
+    return feed
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
@@ -0,0 +1,226 @@
+# app/services/capacity_service.py
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+from app.core.config import settings
+from app.repositories.base import Repositories
+from app.models import cache_sync
+
+GLOBAL_GROUP = "*"
+
+
+#
+# INTERVALOVÝ INDEX SCHVÁLENÝCH ABSENCÍ
+#
+class AbsenceIndex:
+    """
+    Seřazené hranice úseků se stejným počtem souběžných absencí (dny jako ordinály).
+    Index se po sestavení nemění: čtenáři ho procházejí bez zámku, nová absence dává nový index.
+    """
+
+    def __init__(self, intervals: Optional[List[Tuple[date, date]]] = None):
+        self._points: List[int] = []
+        self._counts: List[int] = []
+        if intervals:
+            self._build(intervals)
+
+    def _build(self, intervals: List[Tuple[date, date]]) -> None:
+        deltas: Dict[int, int] = {}
+        for start, end in intervals:
+            s = start.toordinal()
+            e = end.toordinal() + 1
+            deltas[s] = deltas.get(s, 0) + 1
+            deltas[e] = deltas.get(e, 0) - 1
+
+        running = 0
+        for point in sorted(deltas):
+            running += deltas[point]
+            self._points.append(point)
+            self._counts.append(running)
+
+    def added(self, start: date, end: date) -> "AbsenceIndex":
+        """Kopie indexu s další absencí; jedno sloučení seřazených hranic místo vkládání po prvcích."""
+        s = start.toordinal()
+        e = end.toordinal() + 1
+        first = bisect_right(self._points, s)
+        last = bisect_left(self._points, e)
+
+        points = self._points[:first]
+        counts = self._counts[:first]
+        if not points or points[-1] != s:
+            points.append(s)
+            counts.append(counts[-1] if counts else 0)
+        counts[-1] += 1
+        # Hranice uvnitř absence: o jednu víc
+        points.extend(self._points[first:last])
+        counts.extend(count + 1 for count in self._counts[first:last])
+        if last == len(self._points) or self._points[last] != e:
+            points.append(e)
+            counts.append(self._counts[last - 1] if last > 0 else 0)
+        points.extend(self._points[last:])
+        counts.extend(self._counts[last:])
+
+        index = AbsenceIndex()
+        index._points = points
+        index._counts = counts
+        return index
+
+    def segments(self, start: date, end: date) -> Iterator[Tuple[date, date, int]]:
+        """Vrací úseky (od, do, počet) pokrývající zadané období."""
+        s = start.toordinal()
+        e = end.toordinal()
+        k = bisect_right(self._points, s) - 1
+        cursor = s
+
+        if k < 0:
+            if not self._points or self._points[0] > e:
+                yield start, end, 0
+                return
+            yield start, date.fromordinal(self._points[0] - 1), 0
+            k = 0
+            cursor = self._points[0]
+
+        while k < len(self._points) and cursor <= e:
+            next_point = self._points[k + 1] if k + 1 < len(self._points) else e + 1
+            seg_end = min(next_point - 1, e)
+            yield date.fromordinal(cursor), date.fromordinal(seg_end), self._counts[k]
+            cursor = seg_end + 1
+            k += 1
+
+    def days_over_limit(self, start: date, end: date, limit: int) -> List[date]:
+        """Pracovní dny, ve kterých by další absence překročila limit."""
+        days: List[date] = []
+        for seg_start, seg_end, count in self.segments(start, end):
+            if count < limit:
+                continue
+            current = seg_start
+            while current <= seg_end:
+                if current.weekday() < 5:
+                    days.append(current)
+                current += timedelta(days=1)
+        return days
+
+
+#
+# KONFIGURACE LIMITŮ
+#
+def parse_group_limits(raw: str) -> Dict[str, int]:
+    """Limity skupin z textu "skupina:počet,..."; chybný zápis je chyba konfigurace, ne schvalování."""
+    limits: Dict[str, int] = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        group, sep, value = item.partition(":")
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = -1
+        if not sep or not group.strip() or limit < 0:
+            raise ValueError(f"Neplatná položka ABSENCE_GROUP_LIMITS: '{item.strip()}' (očekává se skupina:počet).")
+        limits[group.strip()] = limit
+    return limits
+
+# Načteno jednou při importu: chybná konfigurace zastaví start workeru
+GROUP_LIMITS = parse_group_limits(settings.ABSENCE_GROUP_LIMITS)
+
+def get_absence_group(user: Dict[str, Any]) -> str:
+    if user.get('is_admin') == 1 or user.get('is_super_admin') == 1:
+        return "admin"
+    return "employee"
+
+def get_limits_for_group(group: str) -> Dict[str, int]:
+    limits: Dict[str, int] = {}
+    if settings.MAX_CONCURRENT_ABSENCES > 0:
+        limits[GLOBAL_GROUP] = settings.MAX_CONCURRENT_ABSENCES
+    group_limit = GROUP_LIMITS.get(group)
+    if group_limit is not None and group_limit > 0:
+        limits[group] = group_limit
+    return limits
+
+
+#
+# CACHE INDEXŮ (platná pro verzi oblasti schválených absencí)
+#
+_lock = threading.Lock()
+_cached: Optional[Tuple[int, Dict[str, AbsenceIndex]]] = None
+
+def _load_indexes(repos: Repositories) -> Dict[str, AbsenceIndex]:
+    per_group: Dict[str, List[Tuple[date, date]]] = {GLOBAL_GROUP: []}
+    for row in repos.vacations.get_approved_intervals():
+        interval = (date.fromisoformat(row['start_date']), date.fromisoformat(row['end_date']))
+        per_group[GLOBAL_GROUP].append(interval)
+        per_group.setdefault(get_absence_group(row), []).append(interval)
+    return {group: AbsenceIndex(intervals) for group, intervals in per_group.items()}
+
+def get_indexes(repos: Repositories) -> Dict[str, AbsenceIndex]:
+    global _cached
+    version = repos.cache_version(cache_sync.APPROVED_VACATIONS, refresh=True)
+    with _lock:
+        cached = _cached
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    # Načítá se mimo zámek: uvnitř transakce paměťového backendu drží vlákno zámek úložiště
+    indexes = _load_indexes(repos)
+    # Verze se během načítání změnila: data nemusí odpovídat ani jedné, do cache se nedají
+    if repos.cache_version(cache_sync.APPROVED_VACATIONS, refresh=True) == version:
+        with _lock:
+            _cached = (version, indexes)
+    return indexes
+
+def invalidate_index() -> None:
+    global _cached
+    with _lock:
+        _cached = None
+
+def record_approval(repos: Repositories, group: str, start: date, end: date) -> None:
+    global _cached
+    version = repos.cache_version(cache_sync.APPROVED_VACATIONS, refresh=True)
+    with _lock:
+        if _cached is None:
+            return
+        cached_version, indexes = _cached
+        if version != cached_version + 1:
+            # Mezitím zapisoval i jiný proces, index se příště načte znovu
+            _cached = None
+            return
+        # Nové indexy místo úpravy stávajících, které můžou právě procházet jiná vlákna
+        indexes = dict(indexes)
+        indexes[GLOBAL_GROUP] = indexes[GLOBAL_GROUP].added(start, end)
+        indexes[group] = indexes.get(group, AbsenceIndex()).added(start, end)
+        _cached = (version, indexes)
+
+
+#
+# KONTROLA KAPACITY PŘI SCHVALOVÁNÍ
+#
+def find_capacity_conflicts(
+    repos: Repositories,
+    user: Dict[str, Any],
+    start: date,
+    end: date
+) -> List[date]:
+    limits = get_limits_for_group(get_absence_group(user))
+    if not limits:
+        return []
+
+    indexes = get_indexes(repos)
+    conflicts = set()
+    for group, limit in limits.items():
+        index = indexes.get(group)
+        if index is None:
+            continue
+        conflicts.update(index.days_over_limit(start, end, limit))
+    return sorted(conflicts)
+
+def ensure_capacity(
+    repos: Repositories,
+    user: Dict[str, Any],
+    start: date,
+    end: date
+) -> None:
+    conflicts = find_capacity_conflicts(repos, user, start, end)
+    if conflicts:
+        days_cz = ", ".join(day.strftime('%d. %m. %Y') for day in conflicts)
+        raise ValueError(f"Schválením by byla překročena kapacita souběžných absencí ve dnech: {days_cz}.")
@@ -0,0 +1,117 @@
+# app/services/media_service.py
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Optional
+from app.core.config import settings
+from app.utils import images
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Klíč souboru: <první 2 znaky hashe>/<sha256>[_<velikost náhledu>].<přípona>
+KEY_PATTERN = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{64}(_\d+)?\.(png|jpg|gif|webp)$")
+
+
+#
+# ÚLOŽIŠTĚ ADRESOVANÉ OBSAHEM
+#
+def media_path(key: str) -> str:
+    return os.path.join(settings.MEDIA_DIR, *key.split("/"))
+
+def thumbnail_key(key: str) -> str:
+    digest = key.rsplit(".", 1)[0]
+    return f"{digest}_{settings.THUMBNAIL_SIZE}.jpg"
+
+def store_picture(source: BinaryIO) -> str:
+    """Po částech zkopíruje nahraný soubor na disk a vrátí jeho klíč; stejný obsah se uloží jen jednou."""
+    os.makedirs(settings.MEDIA_DIR, exist_ok=True)
+    fd, partial_path = tempfile.mkstemp(dir=settings.MEDIA_DIR, suffix=".part")
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as target:
+            chunk = source.read(CHUNK_SIZE)
+            extension = images.sniff_image_type(chunk)
+            if extension is None:
+                raise ValueError("Nahraný soubor není obrázek ve formátu PNG, JPEG, GIF ani WebP.")
+            while chunk:
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_BYTES:
+                    raise ValueError(f"Obrázek je větší než povolených {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+                digest.update(chunk)
+                target.write(chunk)
+                chunk = source.read(CHUNK_SIZE)
+
+        hex_digest = digest.hexdigest()
+        key = f"{hex_digest[:2]}/{hex_digest}.{extension}"
+        path = media_path(key)
+        if os.path.exists(path):
+            os.remove(partial_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(partial_path, path)
+        return key
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+
+#
+# NÁHLEDY V PROCESECH NA POZADÍ (zpracování obrázků neblokuje vlákna požadavků)
+#
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # spawn: forkovat vícevláknový worker (logování, watcher cache) není bezpečné
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _log_thumbnail_result(key: str, future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error("Náhled obrázku se nepodařilo vytvořit: %s", error, extra={"media_key": key})
+
+def schedule_thumbnail(key: str) -> Optional[Future]:
+    if not images.PILLOW_AVAILABLE or os.path.exists(media_path(thumbnail_key(key))):
+        return None
+    future = _get_executor().submit(
+        images.make_thumbnail, media_path(key), media_path(thumbnail_key(key)), settings.THUMBNAIL_SIZE
+    )
+    future.add_done_callback(lambda done: _log_thumbnail_result(key, done))
+    return future
+
+
+#
+# ADRESA OBRÁZKU PRO ŠABLONY
+#
+def picture_url(key: Optional[str], fallback: str = "/static/images/employee_picture.png") -> str:
+    if not key:
+        return fallback
+    # Dokud náhled neexistuje, zobrazí se originál; obě adresy jsou neměnné a lze je cachovat navždy
+    if os.path.exists(media_path(thumbnail_key(key))):
+        return f"/media/{thumbnail_key(key)}"
+    return f"/media/{key}"
@@ -0,0 +1,258 @@
+# app/services/report_service.py
+
+import copy
+import csv
+import io
+import threading
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from app.repositories.base import Repositories
+from app.models import cache_sync
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_HOUR = 3600
+MONTH_NAMES = ("Led", "Úno", "Bře", "Dub", "Kvě", "Čvn", "Čvc", "Srp", "Zář", "Říj", "Lis", "Pro")
+
+
+def _month_label(month: int) -> str:
+    # Měsíce se počítají od ledna 1970 (stejně jako datetime64[M])
+    year, index = divmod(int(month), 12)
+    return f"{1970 + year}-{index + 1:02d}"
+
+def _months_of(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+#
+# SLOUPCOVÁ DATA (každý sloupec se převede na kompaktní pole jen jednou)
+#
+class VacationColumns:
+    def __init__(self, raw: Dict[str, List[Any]]):
+        # Data jako počet dní od 1. 1. 1970, časy v sekundách; chybějící rozhodnutí je NaN
+        self.employee_id = np.asarray(raw['employee_id'], dtype=np.int64)
+        self.start = np.asarray(raw['start_date'], dtype="datetime64[D]").astype(np.int64)
+        self.end = np.asarray(raw['end_date'], dtype="datetime64[D]").astype(np.int64)
+        status = np.asarray(raw['status'], dtype=object)
+        self.approved = status == 'Approved'
+        self.pending = status == 'Pending'
+        self.submitted = np.asarray(raw['submitted_at'], dtype=np.int64)
+        self.decided = np.asarray(raw['decided_at'], dtype=np.float64)
+
+    def select(self, mask: np.ndarray) -> "VacationColumns":
+        """Jen řádky vybrané maskou (např. žádosti zaměstnanců z týmů admina)."""
+        selected = copy.copy(self)
+        for name, values in vars(self).items():
+            setattr(selected, name, values[mask])
+        return selected
+
+
+#
+# AGREGACE (seskupení přes seřazené klíče, bez smyček v Pythonu)
+#
+def days_taken_by_month(columns: VacationColumns) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Čerpané pracovní dny schválených dovolených po (zaměstnanec, měsíc)."""
+    start = columns.start[columns.approved]
+    lengths = columns.end[columns.approved] - start + 1
+    lengths = np.maximum(lengths, 0)
+    # Rozvinutí intervalů na jednotlivé dny: vlastník dne a jeho posun od začátku intervalu
+    owner = np.repeat(np.arange(len(start)), lengths)
+    offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    days = start[owner] + offsets
+    working = (days + 3) % 7 < 5  # 1. 1. 1970 byl čtvrtek
+    employees = columns.employee_id[columns.approved][owner[working]]
+    months = _months_of(days[working])
+    if not len(months):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+
+    first_month = months.min()
+    span = int(months.max() - first_month) + 1
+    keys, counts = np.unique(employees * span + (months - first_month), return_counts=True)
+    return keys // span, keys % span + first_month, counts
+
+def turnaround_by_month(columns: VacationColumns) -> Dict[str, np.ndarray]:
+    """Doba od podání do rozhodnutí v hodinách po měsících rozhodnutí (průměr, medián, 90. percentil, maximum)."""
+    decided = ~np.isnan(columns.decided)
+    decided_at = columns.decided[decided].astype(np.int64)
+    hours = np.maximum(decided_at - columns.submitted[decided], 0) / SECONDS_PER_HOUR
+    months = _months_of(decided_at // SECONDS_PER_DAY)
+    order = np.lexsort((hours, months))
+    hours, months = hours[order], months[order]
+    if not len(hours):
+        empty = np.zeros(0)
+        return {"month": empty.astype(np.int64), "count": empty.astype(np.int64),
+                "mean": empty, "median": empty, "p90": empty, "max": empty}
+
+    # V rámci měsíce jsou hodiny seřazené, kvantily jsou proto jen indexy do pole
+    month_keys, first, counts = np.unique(months, return_index=True, return_counts=True)
+    return {
+        "month": month_keys,
+        "count": counts,
+        "mean": np.add.reduceat(hours, first) / counts,
+        "median": (hours[first + (counts - 1) // 2] + hours[first + counts // 2]) / 2,
+        "p90": hours[first + np.ceil(counts * 0.9).astype(np.int64) - 1],
+        "max": hours[first + counts - 1],
+    }
+
+def pending_backlog(columns: VacationColumns, today: int) -> Tuple[int, np.ndarray]:
+    """Počet čekajících žádostí na konci každého dne; vrací první den a řadu až do dneška."""
+    # Rozhodnuté žádosti bez decided_at (z doby před jeho zaváděním) nemají známý konec čekání
+    known = columns.pending | ~np.isnan(columns.decided)
+    opened = columns.submitted[known] // SECONDS_PER_DAY
+    if not len(opened):
+        return today, np.zeros(1, dtype=np.int64)
+    closed = np.where(
+        columns.pending[known],
+        today + 1,
+        np.nan_to_num(columns.decided[known]).astype(np.int64) // SECONDS_PER_DAY
+    )
+    closed = np.maximum(closed, opened)
+
+    first_day = min(int(opened.min()), today)
+    length = today - first_day + 1
+    # Rozdílové pole: +1 v den podání, -1 v den rozhodnutí, průběžný součet je stav fronty
+    delta = np.bincount(np.clip(opened - first_day, 0, length), minlength=length + 1)
+    delta -= np.bincount(np.clip(closed - first_day, 0, length), minlength=length + 1)
+    return first_day, np.cumsum(delta)[:length]
+
+
+#
+# PŘEDPOČÍTANÉ REPORTY (platné do dalšího zápisu dovolených nebo uživatelů)
+#
+class UtilisationReports:
+    def __init__(self, columns: VacationColumns, users: Dict[int, Dict[str, Any]], today: int):
+        self.users = users
+        self.days_employee, self.days_month, self.days_count = days_taken_by_month(columns)
+        self.turnaround = turnaround_by_month(columns)
+        self.backlog_start, self.backlog = pending_backlog(columns, today)
+        self.years = sorted({int(month) // 12 + 1970 for month in np.unique(self.days_month)})
+
+    def days_taken(self, year: int) -> List[Dict[str, Any]]:
+        lo = (year - 1970) * 12
+        selected = (self.days_month >= lo) & (self.days_month < lo + 12)
+        employee_ids, rows = np.unique(self.days_employee[selected], return_inverse=True)
+        matrix = np.zeros((len(employee_ids), 12), dtype=np.int64)
+        np.add.at(matrix, (rows, self.days_month[selected] - lo), self.days_count[selected])
+
+        result = []
+        for employee_id, months in zip(employee_ids.tolist(), matrix.tolist()):
+            user = self.users.get(employee_id, {})
+            result.append({
+                "employee_id": employee_id,
+                "name": user.get('name') or user.get('email') or f"#{employee_id}",
+                "months": months,
+                "total": sum(months),
+            })
+        result.sort(key=lambda row: row['name'])
+        return result
+
+    def turnaround_rows(self, year: Optional[int] = None) -> List[Dict[str, Any]]:
+        t = self.turnaround
+        rows = []
+        for i, month in enumerate(t['month'].tolist()):
+            if year is not None and month // 12 + 1970 != year:
+                continue
+            rows.append({
+                "month": _month_label(month),
+                "count": int(t['count'][i]),
+                "mean": round(float(t['mean'][i]), 1),
+                "median": round(float(t['median'][i]), 1),
+                "p90": round(float(t['p90'][i]), 1),
+                "max": round(float(t['max'][i]), 1),
+            })
+        return rows
+
+    def backlog_rows(self, year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Stav fronty po měsících: průměr, maximum a hodnota na konci měsíce."""
+        days = np.arange(self.backlog_start, self.backlog_start + len(self.backlog))
+        months = _months_of(days)
+        month_keys, first, counts = np.unique(months, return_index=True, return_counts=True)
+        mean = np.add.reduceat(self.backlog, first) / counts
+        peak = np.maximum.reduceat(self.backlog, first)
+        last = self.backlog[first + counts - 1]
+
+        rows = []
+        for i, month in enumerate(month_keys.tolist()):
+            if year is not None and month // 12 + 1970 != year:
+                continue
+            rows.append({
+                "month": _month_label(month),
+                "mean": round(float(mean[i]), 1),
+                "peak": int(peak[i]),
+                "month_end": int(last[i]),
+            })
+        return rows
+
+    def backlog_daily(self) -> List[Tuple[str, int]]:
+        return [
+            (str(np.datetime64(self.backlog_start + i, "D")), count)
+            for i, count in enumerate(self.backlog.tolist())
+        ]
+
+
+Scope = Optional[Tuple[int, ...]]
+ReportSource = Tuple[VacationColumns, Dict[int, Dict[str, Any]]]
+
+_cached: Optional[Tuple[Tuple[int, int, int], ReportSource, Dict[Scope, UtilisationReports]]] = None
+_lock = threading.Lock()
+
+def _load_source(repos: Repositories) -> ReportSource:
+    columns = VacationColumns(repos.vacations.get_report_columns())
+    users = {user['id']: user for user in repos.users.get_all_users_for_admin_management()}
+    return columns, users
+
+def _scoped_source(source: ReportSource, scope: Scope) -> ReportSource:
+    columns, users = source
+    if scope is None:
+        return source
+    users = {user_id: user for user_id, user in users.items() if user.get('team_id') in scope}
+    member_ids = np.fromiter(users, dtype=np.int64, count=len(users))
+    return columns.select(np.isin(columns.employee_id, member_ids)), users
+
+def get_reports(repos: Repositories, team_ids: Optional[List[int]] = None) -> UtilisationReports:
+    """
+    Reporty se přepočítají jen po zápisu dovolených či uživatelů (nebo se změnou dne).
+    team_ids omezí reporty na členy týmů admina (None = celá firma); každý rozsah má vlastní výsledek.
+    """
+    global _cached
+    today = (date.today() - date(1970, 1, 1)).days
+    key = (repos.cache_version(cache_sync.VACATIONS), repos.cache_version(cache_sync.USERS), today)
+    scope = None if team_ids is None else tuple(sorted(set(team_ids)))
+    with _lock:
+        if _cached is None or _cached[0] != key:
+            _cached = (key, _load_source(repos), {})
+        _, source, reports = _cached
+        if scope not in reports:
+            reports[scope] = UtilisationReports(*_scoped_source(source, scope), today)
+        return reports[scope]
+
+
+#
+# EXPORT DO CSV
+#
+def _to_csv(header: List[str], rows: List[List[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+def days_taken_csv(reports: UtilisationReports) -> str:
+    rows = []
+    for employee_id, month, count in zip(
+        reports.days_employee.tolist(), reports.days_month.tolist(), reports.days_count.tolist()
+    ):
+        user = reports.users.get(employee_id, {})
+        rows.append([employee_id, user.get('name', ''), user.get('email', ''), _month_label(month), count])
+    return _to_csv(["employee_id", "name", "email", "month", "working_days"], rows)
+
+def turnaround_csv(reports: UtilisationReports) -> str:
+    rows = [
+        [row['month'], row['count'], row['mean'], row['median'], row['p90'], row['max']]
+        for row in reports.turnaround_rows()
+    ]
+    return _to_csv(["month", "decided", "mean_hours", "median_hours", "p90_hours", "max_hours"], rows)
+
+def backlog_csv(reports: UtilisationReports) -> str:
+    return _to_csv(["date", "pending"], [list(row) for row in reports.backlog_daily()])
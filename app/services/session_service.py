@@ -0,0 +1,270 @@
+# app/services/session_service.py
+"""
+Relace přihlášených uživatelů (JWT, nebo serverové relace v tabulce sessions).
+
+Serverové relace jsou vždy v SQLite, i při REPOSITORY_BACKEND=memory: odhlášení
+a odvolání musí platit pro všechny workery, paměťový backend je jen v jednom
+procesu. Proto se nepředávají přes Repositories, ale přes vlastní připojení
+z poolu (open_conn), stejně jako zápis auditu.
+"""
+
+import hashlib
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token
+from app.models import cache_sync
+from app.models.db import open_conn
+import app.repositories.session_repo as session_repo
+
+logger = logging.getLogger(__name__)
+
+# Čas posledního použití se posouvá nejvýše jednou za tuto dobu (méně zápisů, stejná klouzavá platnost)
+TOUCH_GRANULARITY_SECONDS = 60
+# Cookie relace jen nese identifikátor, o platnosti rozhoduje server
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600
+
+
+def server_sessions_enabled() -> bool:
+    return settings.SESSION_BACKEND == "server"
+
+def _session_id(token: str) -> str:
+    # V databázi je jen otisk tokenu; únik tabulky nedává platné cookie
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _payload(session: Dict[str, Any]) -> Dict[str, Any]:
+    # Stejný tvar jako payload JWT, závislosti rolí se nemění
+    return {
+        "sub": session['email'],
+        "id": session['user_id'],
+        "roles": ["admin"] if session['is_admin'] == 1 else ["employee"],
+        "exp": session['expires_at'],
+        "is_admin": session['is_admin'],
+        "is_super_admin": session['is_super_admin'],
+    }
+
+
+#
+# CACHE RELACÍ WORKERU (LRU, platná pro verzi oblasti relací a nejvýše ttl sekund)
+#
+class SessionCache:
+    """
+    Hromadné odvolání (verze oblasti) zahodí celou cache. Jednotlivé odhlášení
+    verzi nemění, ostatní workery ho poznají, až položce vyprší ttl.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self.version: Optional[int] = None
+        # id relace -> (čas načtení z databáze, relace)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, version: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if version != self.version:
+                # Některý proces odvolal relace uživatele; nevíme kterého, cache se proto naplní znovu
+                self._entries.clear()
+                self.version = version
+                return None
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                # Relaci mohl jiný worker mezitím odhlásit
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return entry[1]
+
+    def put(self, session: Dict[str, Any], version: int) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[session['id']] = (time.monotonic(), session)
+            self._entries.move_to_end(session['id'])
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def prime(self, sessions: List[Dict[str, Any]], version: int) -> None:
+        """sessions od naposledy použité; ta skončí na konci LRU."""
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+            loaded_at = time.monotonic()
+            for session in reversed(sessions[:self.size]):
+                self._entries[session['id']] = (loaded_at, session)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def discard_user(self, user_id: int) -> None:
+        with self._lock:
+            for session_id in [key for key, (_, session) in self._entries.items() if session['user_id'] == user_id]:
+                del self._entries[session_id]
+
+
+#
+# ODLOŽENÝ ZÁPIS POSLEDNÍHO POUŽITÍ (dávka jednou za SESSION_FLUSH_SECONDS)
+#
+class TouchWriter:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.pid = os.getpid()
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-touch-writer", daemon=True)
+        self._thread.start()
+
+    def touch(self, session_id: str, last_seen: int, expires_at: int) -> None:
+        with self._lock:
+            self._pending[session_id] = (last_seen, expires_at)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._pending.pop(session_id, None)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        touches = [(last_seen, expires_at, session_id) for session_id, (last_seen, expires_at) in pending.items()]
+        with open_conn() as conn:
+            session_repo.touch_sessions(conn, touches, int(time.time()))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Zápis posledního použití relací selhal.")
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+_cache = SessionCache(settings.SESSION_CACHE_SIZE, settings.SESSION_CACHE_TTL_SECONDS)
+_writer: Optional[TouchWriter] = None
+_writer_lock = threading.Lock()
+
+def _get_writer() -> TouchWriter:
+    global _writer
+    with _writer_lock:
+        # Vlákno rodiče po forku workeru neběží
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = TouchWriter(settings.SESSION_FLUSH_SECONDS)
+        return _writer
+
+def shutdown_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.pid == os.getpid():
+            _writer.close()
+        _writer = None
+
+
+#
+# VYDÁNÍ A OVĚŘENÍ COOKIE (JWT, nebo neprůhledný token relace)
+#
+def create_token(user_data: Dict[str, Any]) -> str:
+    is_admin = int(user_data['is_admin'])
+    is_super_admin = int(user_data.get('is_super_admin') or 0)
+    if not server_sessions_enabled():
+        return create_access_token(
+            sub=user_data['email'],
+            user_id=user_data['id'],
+            roles=["admin"] if is_admin == 1 else ["employee"],
+            is_admin=is_admin,
+            is_super_admin=is_super_admin
+        )
+
+    token = secrets.token_urlsafe(32)
+    now = int(time.time())
+    with open_conn() as conn:
+        session_repo.create_session(conn, {
+            "id": _session_id(token),
+            "user_id": user_data['id'],
+            "email": user_data['email'],
+            "is_admin": is_admin,
+            "is_super_admin": is_super_admin,
+            "created_at": now,
+            "last_seen": now,
+            "expires_at": now + settings.SESSION_IDLE_MINUTES * 60,
+        })
+    return token
+
+def cookie_max_age() -> int:
+    if server_sessions_enabled():
+        return SESSION_COOKIE_MAX_AGE
+    return int(settings.ACCESS_TOKEN_EXPIRE_MINUTES) * 60
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Payload přihlášeného uživatele; ValueError pro neplatný, prošlý nebo odvolaný token."""
+    if not server_sessions_enabled():
+        return decode_access_token(token)
+
+    session_id = _session_id(token)
+    now = int(time.time())
+    version = cache_sync.version(cache_sync.SESSIONS)
+    session = _cache.get(session_id, version)
+    if session is None or session['expires_at'] < now:
+        # Prošlá položka v cache mohla být mezitím prodloužena jiným workerem
+        with open_conn() as conn:
+            session = session_repo.get_session(conn, session_id)
+        if session is None or session['expires_at'] < now:
+            _cache.discard(session_id)
+            raise ValueError("Neplatná nebo vypršelá relace")
+        _cache.put(session, version)
+
+    if now - session['last_seen'] >= TOUCH_GRANULARITY_SECONDS:
+        session['last_seen'] = now
+        session['expires_at'] = now + settings.SESSION_IDLE_MINUTES * 60
+        _get_writer().touch(session_id, session['last_seen'], session['expires_at'])
+    return _payload(session)
+
+
+def prime_cache() -> int:
+    """Při startu workeru načte naposledy použité relace do cache; vrací jejich počet."""
+    if not server_sessions_enabled():
+        # Bez cache relací: aspoň první ověření JWT nebude platit za načtení knihoven
+        try:
+            decode_access_token(create_access_token(sub="", user_id=0, roles=[], is_admin=0, is_super_admin=0))
+        except ValueError:
+            pass
+        return 0
+
+    version = cache_sync.version(cache_sync.SESSIONS)
+    with open_conn() as conn:
+        sessions = session_repo.get_recent_sessions(conn, int(time.time()), settings.SESSION_CACHE_SIZE)
+    _cache.prime(sessions, version)
+    return len(sessions)
+
+
+#
+# ODVOLÁNÍ RELACÍ (odhlášení, změna rolí, smazání uživatele)
+#
+def revoke_token(token: str) -> None:
+    if not server_sessions_enabled():
+        return
+    session_id = _session_id(token)
+    _cache.discard(session_id)
+    if _writer is not None:
+        _writer.forget(session_id)
+    with open_conn() as conn:
+        session_repo.delete_session(conn, session_id)
+
+def revoke_user_sessions(user_id: int) -> None:
+    if not server_sessions_enabled():
+        return
+    _cache.discard_user(user_id)
+    with open_conn() as conn:
+        session_repo.delete_user_sessions(conn, user_id)
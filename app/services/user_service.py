@@ -1,9 +1,8 @@
 # app/services/user_service.py
 
-import sqlite3
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from app.models.schemas import UserLogin, EmployeeCreateByAdmin
-import app.repositories.user_repo as user_repo
+from app.repositories.base import Repositories
 from app.core.security import verify_password, hash_password
 from fastapi import HTTPException, status
 from app.core.config import settings
@@ -12,8 +11,8 @@ from app.core.config import settings
 #
 # AUTENTIZACE UŽIVATELE
 #
-def authenticate_user(conn: sqlite3.Connection, form_data: UserLogin) -> Optional[Dict[str, Any]]:
-    user_data = user_repo.get_user_by_email(conn, form_data.email)
+def authenticate_user(repos: Repositories, form_data: UserLogin) -> Optional[Dict[str, Any]]:
+    user_data = repos.users.get_user_by_email(form_data.email)
 
     if not user_data:
         return None
@@ -23,38 +22,104 @@ def authenticate_user(conn: sqlite3.Connection, form_data: UserLogin) -> Optiona
         
     return user_data
 
+#
+# VYHLEDÁVÁNÍ UŽIVATELŮ
+#
+def search_users(
+    repos: Repositories,
+    query: str,
+    page: int = 1,
+    employees_only: bool = False,
+    team_ids: Optional[List[int]] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    page_size = settings.SEARCH_PAGE_SIZE
+    rows = repos.users.search_users(
+        query, employees_only, limit=page_size + 1, offset=(page - 1) * page_size, team_ids=team_ids
+    )
+    return rows[:page_size], len(rows) > page_size
+
 #
 # TVORBA ZAMĚSTNANCE ADMINEM
 #
 def create_employee_by_admin(
-    conn: sqlite3.Connection, 
+    repos: Repositories, 
     employee_data: EmployeeCreateByAdmin,
-    raw_password: str
+    raw_password: str,
+    team_id: Optional[int] = None,
+    team_ids: Optional[List[int]] = None
 ) -> Optional[Dict[str, Any]]:
     
-    if user_repo.get_user_by_email(conn, employee_data.email):
+    if repos.users.get_user_by_email(employee_data.email):
         raise ValueError("Uživatel s tímto emailem již existuje.")
+    if team_ids is not None:
+        # Admin s týmy zakládá zaměstnance jen do svých týmů (výchozí je první z nich)
+        if team_id is None and team_ids:
+            team_id = team_ids[0]
+        if team_id not in team_ids:
+            raise ValueError("Zaměstnance lze založit jen do vašeho týmu.")
 
     hashed_password = hash_password(raw_password)
 
-    new_user = user_repo.create_user(
-        conn, 
+    new_user = repos.users.create_user(
         employee_data, 
         hashed_password, 
         is_admin=False,
+        team_id=team_id,
     )
     return new_user
 
 #
 # RESET ROČNÍCH DNŮ DOVOLENÉ
 #
-def reset_annual_vacation_days(conn: sqlite3.Connection, employee_id: int) -> bool:
-    user_data = user_repo.get_user_by_id(conn, employee_id)
+def reset_annual_vacation_days(repos: Repositories, employee_id: int) -> bool:
+    user_data = repos.users.get_user_by_id(employee_id)
     
     if not user_data:
         return False
         
-    current_days = user_data['remaining_days']
-    default_days = settings.DEFAULT_VACATION_DAYS
-    days_to_add = default_days - current_days
-    return user_repo.update_user_remaining_days(conn, employee_id, days_to_add)
\ No newline at end of file
+    return repos.users.reset_user_balance(employee_id, settings.DEFAULT_VACATION_DAYS)
+
+#
+# TÝMY A ROZSAH ADMINŮ
+#
+def get_admin_scope(repos: Repositories, admin_id: int) -> Optional[List[int]]:
+    """Týmy spravované adminem; None znamená admina bez přiřazených týmů, který vidí celou firmu."""
+    team_ids = [team['id'] for team in repos.teams.get_admin_teams(admin_id)]
+    return team_ids or None
+
+def is_in_scope(user: Optional[Dict[str, Any]], team_ids: Optional[List[int]]) -> bool:
+    if user is None:
+        return False
+    return team_ids is None or user.get('team_id') in team_ids
+
+def create_team(repos: Repositories, name: str) -> Dict[str, Any]:
+    name = name.strip()
+    if not name:
+        raise ValueError("Název týmu nesmí být prázdný.")
+    team = repos.teams.create_team(name)
+    if team is None:
+        raise ValueError("Tým s tímto názvem již existuje.")
+    return team
+
+def _get_team(repos: Repositories, team_id: int) -> Dict[str, Any]:
+    team = repos.teams.get_team_by_id(team_id)
+    if team is None:
+        raise ValueError("Tým nebyl nalezen.")
+    return team
+
+def assign_user_to_team(repos: Repositories, email: str, team_id: Optional[int]) -> None:
+    user = repos.users.get_user_by_email(email)
+    if user is None:
+        raise ValueError("Uživatel nebyl nalezen.")
+    if team_id is not None:
+        _get_team(repos, team_id)
+    if not repos.users.update_user_team(user['id'], team_id):
+        raise ValueError("Tým uživatele se nepodařilo změnit.")
+
+def assign_admin_to_team(repos: Repositories, email: str, team_id: int) -> None:
+    admin = repos.users.get_user_by_email(email)
+    if admin is None or admin['is_admin'] != 1:
+        raise ValueError("Správcem týmu může být jen uživatel s rolí Admin.")
+    _get_team(repos, team_id)
+    if not repos.teams.assign_admin(admin['id'], team_id):
+        raise ValueError("Admin už tento tým spravuje.")
@@ -1,33 +1,52 @@
 # vacation_service.py
 
-import sqlite3
 import os
+import logging
 import smtplib
-from typing import Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 from datetime import date, timedelta
 from time import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from jinja2 import Environment, FileSystemLoader
 from app.models.schemas import VacationRequest
-import app.repositories.vacation_repo as vacation_repo
-import app.repositories.user_repo as user_repo
+from app.repositories.base import Repositories
+import app.repositories.ledger_repo as ledger_repo
+import app.services.capacity_service as capacity_service
+import app.services.user_service as user_service
+from app.core import metrics
+from app.core.config import settings
+from app.models import cache_sync
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 BASE_URL = "https://dovolena.kovarna-prostejov.cz"
 
 template_env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+logger = logging.getLogger(__name__)
+
+# Souběžná změna téže žádosti (jiný admin, úprava zaměstnancem) odhalená porovnáním verze
+CONFLICT_MESSAGE = "Žádost byla mezitím změněna nebo zpracována. Obnovte stránku a akci zopakujte."
+OVERLAP_MESSAGE = "V daném období již existuje buď čekající, nebo schválená žádost o dovolenou."
+EDIT_OVERLAP_MESSAGE = "Upravené období se překrývá s jinou aktivní žádostí."
+# Počet zaměstnanců, jejichž aktivní žádosti drží worker pro náhled v paměti
+ACTIVE_INTERVALS_CACHE_SIZE = 1024
 
 def render_email(template_name, **kwargs):
     try:
-        template = template_env.get_template(template_name)
-        return template.render(**kwargs)
-    except Exception as e:
-        print(f"!!! CHYBA: Šablona '{template_name}' nebyla nalezena v {TEMPLATES_DIR}!")
+        with metrics.EMAIL_RENDER_DURATION.time():
+            template = template_env.get_template(template_name)
+            return template.render(**kwargs)
+    except Exception:
+        logger.exception("Šablonu e-mailu '%s' se nepodařilo vykreslit (%s).", template_name, TEMPLATES_DIR,
+                         extra={"template": template_name})
         return None
 
 def send_email(prijemce, predmet, text_html):
+    if not settings.EMAIL_ENABLED:
+        return
     odesilatel = "dovolena.kovarna@gmail.com"
     heslo = "akqgszsqwxchywcq"
     msg = MIMEMultipart()
@@ -35,13 +54,16 @@ def send_email(prijemce, predmet, text_html):
     msg['To'] = prijemce
     msg['Subject'] = predmet
     msg.attach(MIMEText(text_html, 'html'))
+    started = time()
     try:
         with smtplib.SMTP("smtp.gmail.com", 587) as server:
             server.starttls()
             server.login(odesilatel, heslo)
             server.send_message(msg)
-    except Exception as e:
-        print(f"Email se nepodařilo odeslat: {e}")
+        metrics.EMAIL_SEND_DURATION.observe(time() - started, ("sent",))
+    except Exception:
+        metrics.EMAIL_SEND_DURATION.observe(time() - started, ("failed",))
+        logger.exception("E-mail se nepodařilo odeslat.", extra={"recipient": prijemce, "subject": predmet})
 
 def is_overlapping(start1: date, end1: date, start2: date, end2: date) -> bool:
     return start1 <= end2 and end1 >= start2
@@ -57,39 +79,59 @@ def calculate_working_days(start_date: date, end_date: date) -> int:
         current_date += timedelta(days=1)
     return working_days
 
+def check_range(start_date: date, end_date: date) -> int:
+    """Počet pracovních dní v období; ValueError, pokud období nelze žádat."""
+    if start_date > end_date:
+        raise ValueError("Datum začátku nemůže být po datu konce dovolené.")
+    total_days = calculate_working_days(start_date, end_date)
+    if total_days == 0:
+        raise ValueError("Vybrané období neobsahuje žádný pracovní den.")
+    return total_days
+
+def find_overlapping(
+    active_requests: List[Dict[str, Any]],
+    start_date: date,
+    end_date: date,
+    exclude_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    return [
+        req for req in active_requests
+        if req['id'] != exclude_id and is_overlapping(
+            start_date, end_date, date.fromisoformat(req['start_date']), date.fromisoformat(req['end_date'])
+        )
+    ]
+
 def submit_new_vacation_request(
-    conn: sqlite3.Connection, 
+    repos: Repositories, 
     employee_id: int, 
     request_data: VacationRequest, 
     user_remaining_days: int
 ) -> Dict[str, Any]:
-    if request_data.start_date > request_data.end_date:
-        raise ValueError("Datum začátku nemůže být po datu konce dovolené.")
-    total_days = calculate_working_days(request_data.start_date, request_data.end_date)
-    if total_days == 0:
-        raise ValueError("Vybrané období neobsahuje žádný pracovní den.")
+    total_days = check_range(request_data.start_date, request_data.end_date)
     if total_days > user_remaining_days:
         raise ValueError(f"Nedostatečný zůstatek dní. Požadováno: {total_days}, Zbývá: {user_remaining_days}.")
-    active_requests = vacation_repo.get_active_vacation_requests(conn, employee_id)
-    for req in active_requests:
-        req_start = date.fromisoformat(req['start_date'])
-        req_end = date.fromisoformat(req['end_date'])
-        if is_overlapping(request_data.start_date, request_data.end_date, req_start, req_end):
-            raise ValueError("V daném období již existuje buď čekající, nebo schválená žádost o dovolenou.")
     submitted_at = str(int(time())) 
     start_date_str = request_data.start_date.isoformat()
     end_date_str = request_data.end_date.isoformat()
     try:
-        user_updated = user_repo.update_user_remaining_days(conn, employee_id, -total_days)
-        if not user_updated:
-            raise ValueError("Chyba DB: Selhala aktualizace zůstatku dnů po odečtu.")
-        new_request = vacation_repo.create_vacation_request(
-            conn, employee_id, start_date_str, end_date_str, total_days, 'Pending', submitted_at
-        )
-        if not new_request:
-            raise ValueError("Chyba při vytváření žádosti v databázi.")
+        # Kontrola překryvu, nová žádost a odečet dnů v jedné transakci se zápisovým zámkem:
+        # souběžné podání nepřeskočí kontrolu a žádost nikdy nezůstane bez pohybu v knize
+        with repos.transaction(immediate=True):
+            active_requests = repos.vacations.get_active_vacation_requests(employee_id)
+            if find_overlapping(active_requests, request_data.start_date, request_data.end_date):
+                raise ValueError(OVERLAP_MESSAGE)
+            new_request = repos.vacations.create_vacation_request(
+                employee_id, start_date_str, end_date_str, total_days, 'Pending', submitted_at
+            )
+            if not new_request:
+                raise ValueError("Chyba při vytváření žádosti v databázi.")
+            user_updated = repos.users.update_user_remaining_days(
+                employee_id, -total_days, ledger_repo.VACATION_REQUEST, new_request['id']
+            )
+            if not user_updated:
+                raise ValueError("Chyba DB: Selhala aktualizace zůstatku dnů po odečtu.")
         try:
-            user = user_repo.get_user_by_id(conn, employee_id)
+            user = repos.users.get_user_by_id(employee_id)
             start_cz = request_data.start_date.strftime('%d. %m. %Y')
             end_cz = request_data.end_date.strftime('%d. %m. %Y')
             telo_admin = render_email(
@@ -102,42 +144,61 @@ def submit_new_vacation_request(
                 link=f"{BASE_URL}/admin"
             )
             send_email("sklena1975@seznam.cz", f"Nová žádost o dovolenou: {user['name']}", telo_admin)
-        except:
-            pass
+        except Exception:
+            logger.exception("Notifikaci o nové žádosti se nepodařilo připravit.", extra={"vacation_id": new_request['id']})
         return new_request
     except ValueError as e:
         raise e 
-    except Exception as e:
-        conn.rollback() 
-        print(f"KRITICKÁ TRANSACNÍ CHYBA PŘI PODÁNÍ: {e}") 
+    except Exception:
+        repos.rollback() 
+        logger.exception("Kritická transakční chyba při podání žádosti.", extra={"employee_id": employee_id})
         raise ValueError("Neočekávaná DB chyba při podání žádosti.")
 
 def handle_vacation_approval(
-    conn: sqlite3.Connection, 
+    repos: Repositories, 
     request_id: int, 
-    new_status: str
+    new_status: str,
+    expected_version: Optional[int] = None,
+    team_ids: Optional[List[int]] = None
 ) -> bool:
-    request_data = vacation_repo.get_vacation_request_by_id(conn, request_id)
+    request_data = repos.vacations.get_vacation_request_by_id(request_id)
     if not request_data:
         raise ValueError("Žádost nenalezena.") 
     if request_data.get('status') != 'Pending':
         raise ValueError("Žádost již byla zpracována.") 
+    if expected_version is not None and request_data['version'] != expected_version:
+        raise ValueError(CONFLICT_MESSAGE)
     user_id = request_data['employee_id']
     days_to_modify = request_data['total_days']
+    request_start = date.fromisoformat(request_data['start_date'])
+    request_end = date.fromisoformat(request_data['end_date'])
+    employee = repos.users.get_user_by_id(user_id)
+    if team_ids is not None and not user_service.is_in_scope(employee, team_ids):
+        raise ValueError("Žádost nepatří zaměstnanci z vašich týmů.")
     try:
-        if new_status == 'Rejected':
-            user_updated = user_repo.update_user_remaining_days(conn, user_id, days_to_modify)
-            if not user_updated:
-                raise ValueError("Chyba DB: Selhala aktualizace zůstatku dnů po zamítnutí.")
-        status_updated = vacation_repo.update_request_status(conn, request_id, new_status)
-        if not status_updated:
-            raise ValueError("Chyba DB: Selhala aktualizace statusu žádosti.")
-        conn.commit()
+        # Zápisový zámek od kontroly kapacity do potvrzení: jiný worker mezitím nic neschválí
+        with repos.transaction(immediate=True):
+            if new_status == 'Approved' and employee:
+                capacity_service.ensure_capacity(repos, employee, request_start, request_end)
+            # Stav se mění jako první a jen nad přečtenou verzí, vrácení dnů tak proběhne nejvýše jednou
+            status_updated = repos.vacations.update_request_status(request_id, new_status, request_data['version'])
+            if not status_updated:
+                raise ValueError(CONFLICT_MESSAGE)
+            if new_status == 'Rejected':
+                user_updated = repos.users.update_user_remaining_days(
+                    user_id, days_to_modify, ledger_repo.VACATION_REJECTED, request_id
+                )
+                if not user_updated:
+                    raise ValueError("Chyba DB: Selhala aktualizace zůstatku dnů po zamítnutí.")
+        if new_status == 'Approved' and employee:
+            capacity_service.record_approval(
+                repos, capacity_service.get_absence_group(employee), request_start, request_end
+            )
         try:
-            user = user_repo.get_user_by_id(conn, user_id)
+            user = repos.users.get_user_by_id(user_id)
             stav_cz = "SCHVÁLENA" if new_status == 'Approved' else "ZAMÍTNUTA"
-            start_cz = date.fromisoformat(request_data['start_date']).strftime('%d. %m. %Y')
-            end_cz = date.fromisoformat(request_data['end_date']).strftime('%d. %m. %Y')
+            start_cz = request_start.strftime('%d. %m. %Y')
+            end_cz = request_end.strftime('%d. %m. %Y')
             telo_user = render_email(
                 "vacation_email.html",
                 title=f"Vaše žádost byla {stav_cz}",
@@ -146,62 +207,60 @@ def handle_vacation_approval(
                 link=f"{BASE_URL}/employee/profile"
             )
             send_email(user['email'], f"Rozhodnutí o dovolené: {stav_cz}", telo_user)
-        except:
-            pass
+        except Exception:
+            logger.exception("Notifikaci o rozhodnutí se nepodařilo připravit.", extra={"vacation_id": request_id})
         return True
     except ValueError as e:
-        conn.rollback() 
+        repos.rollback() 
         raise e 
     except Exception:
-        conn.rollback()
+        repos.rollback()
+        logger.exception("Kritická transakční chyba při schválení/zamítnutí žádosti.", extra={"vacation_id": request_id})
         raise ValueError("Neočekávaná DB chyba během transakce schválení/zamítnutí.")
 
 def edit_vacation_request(
-    conn: sqlite3.Connection,
+    repos: Repositories,
     request_id: int,
     employee_id: int,
     new_request_data: VacationRequest,
-    user_remaining_days: int
+    user_remaining_days: int,
+    expected_version: Optional[int] = None
 ) -> Dict[str, Any]:
-    current_request = vacation_repo.get_vacation_request_by_id(conn, request_id)
+    current_request = repos.vacations.get_vacation_request_by_id(request_id)
     if not current_request:
         raise ValueError("Žádost k úpravě nenalezena.")
     if current_request['employee_id'] != employee_id:
         raise ValueError("Žádost nepatří tomuto zaměstnanci.")
     if current_request['status'] != 'Pending':
         raise ValueError(f"Žádost má status '{current_request['status']}' a nelze ji upravovat.")
+    if expected_version is not None and current_request['version'] != expected_version:
+        raise ValueError(CONFLICT_MESSAGE)
     old_total_days = current_request['total_days']
-    if new_request_data.start_date > new_request_data.end_date:
-        raise ValueError("Datum začátku nemůže být po datu konce dovolené.")
-    new_total_days = calculate_working_days(new_request_data.start_date, new_request_data.end_date)
-    if new_total_days == 0:
-        raise ValueError("Vybrané období neobsahuje žádný pracovní den.")
+    new_total_days = check_range(new_request_data.start_date, new_request_data.end_date)
     days_difference = new_total_days - old_total_days
     if days_difference > 0 and days_difference > user_remaining_days:
         raise ValueError(f"Nedostatečný zůstatek dní. Změna vyžaduje dalších {days_difference} dní, zbývá jen {user_remaining_days}.")
-    active_requests = vacation_repo.get_active_vacation_requests(conn, employee_id)
-    for req in active_requests:
-        if req['id'] == request_id:
-            continue
-        req_start = date.fromisoformat(req['start_date'])
-        req_end = date.fromisoformat(req['end_date'])
-        if is_overlapping(new_request_data.start_date, new_request_data.end_date, req_start, req_end):
-            raise ValueError("Upravené období se překrývá s jinou aktivní žádostí.")
+    active_requests = repos.vacations.get_active_vacation_requests(employee_id)
+    if find_overlapping(active_requests, new_request_data.start_date, new_request_data.end_date, exclude_id=request_id):
+        raise ValueError(EDIT_OVERLAP_MESSAGE)
     try:
         start_date_str = new_request_data.start_date.isoformat()
         end_date_str = new_request_data.end_date.isoformat()
-        vacation_updated = vacation_repo.update_vacation_request(
-            conn, request_id, start_date_str, end_date_str, new_total_days
-        )
-        if not vacation_updated:
-            raise ValueError("Chyba DB: Selhala aktualizace žádosti.")
-        if days_difference != 0:
-            user_updated = user_repo.update_user_remaining_days(conn, employee_id, -days_difference)
-            if not user_updated:
-                raise ValueError("Chyba DB: Selhala aktualizace zůstatku dnů uživatele.")
-        conn.commit()
+        # Nový termín a změna zůstatku se potvrdí společně; výjimka z bloku odvolá obojí
+        with repos.transaction():
+            vacation_updated = repos.vacations.update_vacation_request(
+                request_id, start_date_str, end_date_str, new_total_days, current_request['version']
+            )
+            if not vacation_updated:
+                raise ValueError(CONFLICT_MESSAGE)
+            if days_difference != 0:
+                user_updated = repos.users.update_user_remaining_days(
+                    employee_id, -days_difference, ledger_repo.VACATION_EDIT, request_id
+                )
+                if not user_updated:
+                    raise ValueError("Chyba DB: Selhala aktualizace zůstatku dnů uživatele.")
         try:
-            user = user_repo.get_user_by_id(conn, employee_id)
+            user = repos.users.get_user_by_id(employee_id)
             start_cz = new_request_data.start_date.strftime('%d. %m. %Y')
             end_cz = new_request_data.end_date.strftime('%d. %m. %Y')
             telo_admin = render_email(
@@ -215,12 +274,99 @@ def edit_vacation_request(
                 link=f"{BASE_URL}/admin/requests"
             )
             send_email("sklena1975@seznam.cz", f"ÚPRAVA žádosti o dovolenou: {user['name']}", telo_admin)
-        except:
-            pass
-        return vacation_repo.get_vacation_request_by_id(conn, request_id)
+        except Exception:
+            logger.exception("Notifikaci o úpravě žádosti se nepodařilo připravit.", extra={"vacation_id": request_id})
+        return repos.vacations.get_vacation_request_by_id(request_id)
     except ValueError as e:
-        conn.rollback() 
+        repos.rollback() 
         raise e 
     except Exception:
-        conn.rollback()
-        raise ValueError("Neočekávaná chyba DB během editace žádosti.")
\ No newline at end of file
+        repos.rollback()
+        logger.exception("Kritická transakční chyba při úpravě žádosti.", extra={"vacation_id": request_id})
+        raise ValueError("Neočekávaná chyba DB během editace žádosti.")
+
+
+#
+# NÁHLED ŽÁDOSTI PŘED ODESLÁNÍM (jen čtení; aktivní žádosti v paměti do další změny dovolených)
+#
+_intervals_lock = threading.Lock()
+_intervals_version: Optional[int] = None
+_intervals: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+
+def _active_intervals(repos: Repositories, employee_id: int) -> List[Dict[str, Any]]:
+    global _intervals_version
+    # Čerstvá verze: vlastní právě podaná žádost musí být v náhledu vidět hned
+    version = repos.cache_version(cache_sync.VACATIONS, refresh=True)
+    with _intervals_lock:
+        if version != _intervals_version:
+            _intervals.clear()
+            _intervals_version = version
+        intervals = _intervals.get(employee_id)
+        if intervals is not None:
+            _intervals.move_to_end(employee_id)
+            return intervals
+
+    intervals = [
+        {"id": req['id'], "start_date": req['start_date'], "end_date": req['end_date'], "status": req['status']}
+        for req in repos.vacations.get_active_vacation_requests(employee_id)
+    ]
+    with _intervals_lock:
+        if _intervals_version == version:
+            _intervals[employee_id] = intervals
+            while len(_intervals) > ACTIVE_INTERVALS_CACHE_SIZE:
+                _intervals.popitem(last=False)
+    return intervals
+
+def quote_vacation_request(
+    repos: Repositories,
+    user: Dict[str, Any],
+    request_data: VacationRequest,
+    request_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Stejné kontroly jako podání (nebo úprava žádosti request_id), ale bez zápisu:
+    pracovní dny, zůstatek po podání, kolize s vlastními žádostmi a dny nad kapacitou absencí.
+    """
+    old_total_days = 0
+    if request_id is not None:
+        current_request = repos.vacations.get_vacation_request_by_id(request_id)
+        if not current_request or current_request['employee_id'] != user['id'] or current_request['status'] != 'Pending':
+            raise ValueError("Žádost k úpravě nenalezena.")
+        old_total_days = current_request['total_days']
+
+    quote: Dict[str, Any] = {
+        "working_days": calculate_working_days(request_data.start_date, request_data.end_date),
+        "remaining_days": user['remaining_days'],
+        "remaining_after": None,
+        "conflicts": [],
+        "capacity_conflicts": [],
+        "error": None,
+    }
+    try:
+        check_range(request_data.start_date, request_data.end_date)
+    except ValueError as e:
+        quote["error"] = str(e)
+        return quote
+
+    days_needed = quote["working_days"] - old_total_days
+    quote["remaining_after"] = user['remaining_days'] - days_needed
+    overlapping = find_overlapping(
+        _active_intervals(repos, user['id']), request_data.start_date, request_data.end_date, exclude_id=request_id
+    )
+    quote["conflicts"] = [
+        {"start_date": req['start_date'], "end_date": req['end_date'], "status": req['status']} for req in overlapping
+    ]
+    if days_needed > 0 and days_needed > user['remaining_days']:
+        if request_id is not None:
+            quote["error"] = f"Nedostatečný zůstatek dní. Změna vyžaduje dalších {days_needed} dní, zbývá jen {user['remaining_days']}."
+        else:
+            quote["error"] = f"Nedostatečný zůstatek dní. Požadováno: {days_needed}, Zbývá: {user['remaining_days']}."
+    elif overlapping:
+        quote["error"] = EDIT_OVERLAP_MESSAGE if request_id is not None else OVERLAP_MESSAGE
+    # Kapacita se vynucuje až při schválení, tady je jen upozorněním
+    quote["capacity_conflicts"] = [
+        day.isoformat() for day in capacity_service.find_capacity_conflicts(
+            repos, user, request_data.start_date, request_data.end_date
+        )
+    ]
+    return quote
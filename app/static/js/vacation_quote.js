@@ -0,0 +1,105 @@
+// app/static/js/vacation_quote.js
+//
+// Náhled žádosti o dovolenou při výběru dat: pracovní dny, zůstatek po podání a kolize.
+// Formulář označený data-quote-url se ptá endpointu /employee/quote, výsledek vypíše
+// do prvku [data-quote-result]. Odeslání formuláře zůstává beze změny.
+(function () {
+    "use strict";
+
+    var DEBOUNCE_MS = 250;
+
+    function formatDate(iso) {
+        var parts = iso.split("-");
+        return parts[2] + ". " + parts[1] + ". " + parts[0];
+    }
+
+    function describe(quote) {
+        var lines = [];
+        lines.push("Pracovních dní: " + quote.working_days + ".");
+        if (quote.remaining_after !== null) {
+            lines.push("Zůstatek po podání: " + quote.remaining_after + " z " + quote.remaining_days + " dnů.");
+        }
+        quote.conflicts.forEach(function (conflict) {
+            var label = conflict.status === "Approved" ? "schválenou" : "čekající";
+            lines.push("Překrývá se s " + label + " žádostí " +
+                formatDate(conflict.start_date) + " – " + formatDate(conflict.end_date) + ".");
+        });
+        if (quote.capacity_conflicts.length) {
+            lines.push("Upozornění: ve dnech " + quote.capacity_conflicts.map(formatDate).join(", ") +
+                " je už naplněna kapacita souběžných absencí, schválení může být odmítnuto.");
+        }
+        return lines;
+    }
+
+    function render(box, quote) {
+        box.textContent = "";
+        if (quote.error) {
+            var strong = document.createElement("strong");
+            strong.textContent = quote.error;
+            box.appendChild(strong);
+        }
+        (quote.working_days === undefined ? [] : describe(quote)).forEach(function (line) {
+            var row = document.createElement("div");
+            row.textContent = line;
+            box.appendChild(row);
+        });
+        box.className = "alert " + (quote.error ? "error" : "success");
+        box.hidden = false;
+    }
+
+    function setup(form) {
+        var start = form.querySelector("[name=start_date]");
+        var end = form.querySelector("[name=end_date]");
+        var box = form.querySelector("[data-quote-result]");
+        var timer = null;
+        var pending = null;
+
+        function update() {
+            if (!start.value || !end.value) {
+                box.hidden = true;
+                return;
+            }
+            var params = new URLSearchParams({ start_date: start.value, end_date: end.value });
+            if (form.dataset.quoteRequestId) {
+                params.set("request_id", form.dataset.quoteRequestId);
+            }
+            // Rychlé změny dat: starší odpověď nesmí přepsat novější
+            if (pending) {
+                pending.abort();
+            }
+            pending = new AbortController();
+            fetch(form.dataset.quoteUrl + "?" + params.toString(), {
+                credentials: "same-origin",
+                headers: { "Accept": "application/json" },
+                signal: pending.signal
+            })
+                .then(function (response) {
+                    var type = response.headers.get("Content-Type") || "";
+                    return type.indexOf("application/json") === 0 ? response.json() : null;
+                })
+                .then(function (quote) {
+                    if (quote) {
+                        render(box, quote);
+                    } else {
+                        box.hidden = true;
+                    }
+                })
+                .catch(function (error) {
+                    if (error.name !== "AbortError") {
+                        box.hidden = true;
+                    }
+                });
+        }
+
+        function schedule() {
+            clearTimeout(timer);
+            timer = setTimeout(update, DEBOUNCE_MS);
+        }
+
+        start.addEventListener("change", schedule);
+        end.addEventListener("change", schedule);
+        update();
+    }
+
+    document.querySelectorAll("form[data-quote-url]").forEach(setup);
+})();
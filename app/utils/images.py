@@ -0,0 +1,41 @@
+# app/utils/images.py
+
+import importlib.util
+from typing import Optional
+
+# Pillow je volitelný: bez něj se místo náhledu zobrazuje původní obrázek
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# Rozpoznání formátu podle prvních bajtů souboru (přípona ani Content-Type se neověřují)
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    for signature, extension in _SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def make_thumbnail(source_path: str, target_path: str, size: int) -> bool:
+    """Zmenší obrázek do čtverce size×size a uloží ho jako JPEG; běží v procesu na pozadí."""
+    if not PILLOW_AVAILABLE:
+        return False
+    import os
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image.convert("RGB"), (size, size), Image.LANCZOS)
+        # Zápis do dočasného souboru a přejmenování: čtenář nikdy neuvidí poloviční náhled
+        partial_path = f"{target_path}.{os.getpid()}.part"
+        image.save(partial_path, "JPEG", quality=85, optimize=True)
+    os.replace(partial_path, target_path)
+    return True
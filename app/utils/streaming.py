@@ -0,0 +1,28 @@
+# app/utils/streaming.py
+
+from typing import Any, Dict, Iterable, Iterator
+from starlette.responses import StreamingResponse
+from starlette.templating import Jinja2Templates
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def buffered(chunks: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    # Jinja generuje spoustu krátkých řetězců, po síti se posílají spojené do větších bloků
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            length = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def stream_template(templates: Jinja2Templates, name: str, context: Dict[str, Any]) -> StreamingResponse:
+    """Vykreslí šablonu postupně; iterátory v kontextu se čtou až během odesílání odpovědi."""
+    template = templates.get_template(name)
+    return StreamingResponse(buffered(template.generate(context)), media_type="text/html; charset=utf-8")
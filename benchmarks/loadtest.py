@@ -0,0 +1,277 @@
+# benchmarks/loadtest.py
+"""
+Reprodukovatelný zátěžový test HTTP vrstvy.
+
+    python -m benchmarks.loadtest --employees 500 --concurrency 1,8,32 --requests 2000 --output vysledek.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --db app/data/loadtest.db
+
+Bez --url běží aplikace `app.main:app` v procesu přes ASGI klienta. S --url se
+měří běžící uvicorn, který musí používat stejnou databázi (DB_PATH) a EMAIL_ENABLED=0.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+
+DEFAULT_MIX = {
+    "profile": 35,
+    "admin_dashboard": 15,
+    "super_admin_dashboard": 5,
+    "login": 10,
+    "submit": 15,
+    "edit": 12,
+    "approve": 8,
+}
+
+
+#
+# STATISTIKA
+#
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def summarize(latencies: List[float], errors: int, rejected: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rejected": rejected,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+def parse_mix(raw: Optional[str]) -> Dict[str, int]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in raw.split(","):
+        name, weight = item.split("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Neznámý scénář: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+#
+# SDÍLENÝ STAV BĚHU
+#
+class RunState:
+    def __init__(self, db_path: str, seed: int):
+        self.rng = random.Random(seed)
+        conn = sqlite3.connect(db_path)
+        self.employees = [row[0] for row in conn.execute(
+            "SELECT email FROM users WHERE is_admin = 0 AND is_super_admin = 0 ORDER BY id"
+        )]
+        self.pending_by_employee: Dict[str, List[int]] = {}
+        for vacation_id, email in conn.execute(
+            "SELECT v.id, u.email FROM vacations v JOIN users u ON u.id = v.employee_id WHERE v.status = 'Pending' ORDER BY v.id"
+        ):
+            self.pending_by_employee.setdefault(email, []).append(vacation_id)
+        # Poslední čekající žádost každého zaměstnance slouží scénáři úprav, ostatní ke schválení
+        self.approvable = [vacation_id for ids in self.pending_by_employee.values() for vacation_id in ids[:-1]]
+        self.rng.shuffle(self.approvable)
+        conn.close()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def record(self, scenario: str, elapsed: float, ok: bool, rejected: bool) -> None:
+        self.latencies.setdefault(scenario, []).append(elapsed)
+        if not ok:
+            self.errors[scenario] = self.errors.get(scenario, 0) + 1
+        if rejected:
+            self.rejected[scenario] = self.rejected.get(scenario, 0) + 1
+
+
+#
+# VIRTUÁLNÍ UŽIVATEL
+#
+class VirtualUser:
+    def __init__(self, make_client, state: RunState, worker_id: int, seed: int):
+        self.make_client = make_client
+        self.state = state
+        self.rng = random.Random(seed * 1000 + worker_id)
+        self.email = state.employees[worker_id % len(state.employees)]
+        self.employee = make_client()
+        self.admin = make_client()
+        self.super_admin = make_client()
+
+    async def login(self, client, email: str):
+        return await client.post("/login", data={"username": email, "password": "test_password"})
+
+    async def setup(self) -> None:
+        await self.login(self.employee, self.email)
+        await self.login(self.admin, "admin@example.com")
+        await self.login(self.super_admin, "superadmin@example.com")
+
+    async def close(self) -> None:
+        for client in (self.employee, self.admin, self.super_admin):
+            await client.aclose()
+
+    def _random_range(self):
+        start = date.today() + timedelta(days=self.rng.randint(400, 4000))
+        return start, start + timedelta(days=self.rng.randint(0, 4))
+
+    async def run(self, scenario: str):
+        if scenario == "profile":
+            return await self.employee.get("/employee/profile")
+        if scenario == "admin_dashboard":
+            return await self.admin.get("/admin")
+        if scenario == "super_admin_dashboard":
+            return await self.super_admin.get("/super_admin")
+        if scenario == "login":
+            client = self.make_client()
+            try:
+                return await self.login(client, self.email)
+            finally:
+                await client.aclose()
+        if scenario == "submit":
+            start, end = self._random_range()
+            return await self.employee.post(
+                "/employee/request_vacation",
+                data={"start_date": start.isoformat(), "end_date": end.isoformat()}
+            )
+        if scenario == "edit":
+            pending = self.state.pending_by_employee.get(self.email) or [0]
+            request_id = pending[-1]
+            form = await self.employee.get(f"/employee/edit/{request_id}")
+            if form.status_code != 200:
+                return form
+            start, end = self._random_range()
+            return await self.employee.post(
+                f"/employee/edit/{request_id}",
+                data={"start_date": start.isoformat(), "end_date": end.isoformat()}
+            )
+        if scenario == "approve":
+            request_id = self.state.approvable.pop() if self.state.approvable else 0
+            action = "Approve" if self.rng.random() < 0.8 else "Reject"
+            return await self.admin.post(f"/admin/process_request/{request_id}", data={"action": action})
+        raise ValueError(scenario)
+
+
+async def _worker(user: VirtualUser, scenarios: List[str], weights: List[int], budget: Dict[str, int]) -> None:
+    while budget["remaining"] > 0:
+        budget["remaining"] -= 1
+        scenario = user.rng.choices(scenarios, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await user.run(scenario)
+            ok = response.status_code < 400
+            rejected = "error=" in response.headers.get("location", "")
+        except Exception:
+            ok, rejected = False, False
+        user.state.record(scenario, time.perf_counter() - started, ok, rejected)
+
+
+async def run_level(make_client, db_path: str, mix: Dict[str, int], concurrency: int, requests: int, seed: int) -> Dict[str, Any]:
+    state = RunState(db_path, seed)
+    users = [VirtualUser(make_client, state, i, seed) for i in range(concurrency)]
+    await asyncio.gather(*(user.setup() for user in users))
+
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+    budget = {"remaining": requests}
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(user, scenarios, weights, budget) for user in users))
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*(user.close() for user in users))
+
+    all_latencies = [value for values in state.latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(all_latencies, sum(state.errors.values()), sum(state.rejected.values()), elapsed),
+        "scenarios": {
+            name: summarize(values, state.errors.get(name, 0), state.rejected.get(name, 0), elapsed)
+            for name, values in sorted(state.latencies.items())
+        },
+    }
+
+
+#
+# SPUŠTĚNÍ
+#
+async def main_async(args) -> Dict[str, Any]:
+    import httpx
+    from app.cli.seed import seed_database
+
+    dataset = None
+    if not args.no_seed:
+        dataset = seed_database(args.db, args.employees, args.employees * args.vacations_per_employee, args.seed)
+
+    app = None
+    if args.url:
+        make_client = lambda: httpx.AsyncClient(base_url=args.url, follow_redirects=False, timeout=60)
+    else:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        make_client = lambda: httpx.AsyncClient(transport=transport, base_url="http://loadtest", follow_redirects=False)
+
+    levels = []
+    for concurrency in args.concurrency:
+        if dataset is not None and levels:
+            # Každá úroveň souběžnosti startuje ze stejného stavu dat
+            seed_database(args.db, args.employees, args.employees * args.vacations_per_employee, args.seed)
+        if app is not None:
+            async with app.router.lifespan_context(app):
+                levels.append(await run_level(make_client, args.db, args.mix, concurrency, args.requests, args.seed))
+        else:
+            levels.append(await run_level(make_client, args.db, args.mix, concurrency, args.requests, args.seed))
+
+    return {
+        "mode": "http" if args.url else "asgi",
+        "target": args.url or "app.main:app",
+        "seed": args.seed,
+        "dataset": dataset,
+        "mix": args.mix,
+        "requests_per_level": args.requests,
+        "python": platform.python_version(),
+        "started_at": int(time.time()),
+        "levels": levels,
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Zátěžový test aplikace Dovolená.")
+    parser.add_argument("--url", help="Adresa běžícího serveru (jinak se testuje v procesu přes ASGI).")
+    parser.add_argument("--db", default="app/data/loadtest.db", help="Cesta k testovací databázi.")
+    parser.add_argument("--no-seed", action="store_true", help="Nepřegenerovávat databázi.")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--vacations-per-employee", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=1000, help="Počet požadavků na jednu úroveň souběžnosti.")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX), help="Např. profile=50,submit=20,approve=5")
+    parser.add_argument("--output", help="Soubor pro JSON výsledek (jinak stdout).")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    os.environ["DB_PATH"] = args.db
+    os.environ["EMAIL_ENABLED"] = "0"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    result = asyncio.run(main_async(args))
+    report = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
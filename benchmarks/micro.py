@@ -0,0 +1,308 @@
+# benchmarks/micro.py
+"""
+Mikro-benchmarky horkých cest služeb a repozitářů.
+
+    python -m benchmarks.micro run --sizes 1k,100k --output vysledky.json
+    python -m benchmarks.micro run --sizes 1k,100k --save-baseline
+    python -m benchmarks.micro compare vysledky.json --tolerance 0.3
+    python -m benchmarks.micro run --sizes 100k --backend memory
+
+`compare` skončí s kódem 1, pokud je některá horká cesta pomalejší než uložená
+baseline (benchmarks/baselines.json) o více než zadanou toleranci. Bez souboru
+s výsledky se benchmarky před porovnáním nejprve spustí.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Any, List, Optional
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+VACATIONS_PER_EMPLOYEE = 10
+MIN_TIME = 0.2
+REPEATS = 3
+
+
+#
+# KONTEXT BENCHMARKU (připojení a reprezentativní vstupy)
+#
+class BenchContext:
+    def __init__(self, db_path: str, backend: str = "sqlite"):
+        from app.models.db import MeteredConnection, init_schema, migrate_data
+        from app.repositories.sqlite_backend import SqliteRepositories
+        from app.repositories.memory_backend import MemoryRepositories, MemoryStore
+
+        self.conn = sqlite3.connect(db_path, factory=MeteredConnection, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        init_schema(self.conn)
+        migrate_data(self.conn)
+        self.conn.commit()
+        if backend == "memory":
+            self.repos = MemoryRepositories(MemoryStore.from_sqlite(self.conn))
+        else:
+            self.repos = SqliteRepositories(self.conn)
+
+        count = self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        middle = self.conn.execute(
+            "SELECT id, email, name FROM users WHERE is_admin = 0 AND is_super_admin = 0 ORDER BY id LIMIT 1 OFFSET ?",
+            (max(0, (count - 2) // 2),)
+        ).fetchone()
+        self.employee_id = middle["id"]
+        self.employee_email = middle["email"]
+        self.employee_name = middle["name"]
+        self.pending_id = self.conn.execute(
+            "SELECT id FROM vacations WHERE employee_id = ? AND status = 'Pending' ORDER BY id DESC LIMIT 1",
+            (self.employee_id,)
+        ).fetchone()["id"]
+        self.pending = dict(self.conn.execute("SELECT * FROM vacations WHERE id = ?", (self.pending_id,)).fetchone())
+        self.sequence = 0
+
+    def unique(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+#
+# DEFINICE BENCHMARKŮ
+#
+def _service_benchmarks(ctx: BenchContext) -> Dict[str, Callable[[], Any]]:
+    from app.services.vacation_service import calculate_working_days, is_overlapping
+    from app.utils.jinja2_filters import format_date_czech
+    from app.core.security import create_access_token, decode_access_token
+
+    start = date(2026, 7, 1)
+    active = [
+        {"start_date": (start + timedelta(days=14 * i)).isoformat(), "end_date": (start + timedelta(days=14 * i + 4)).isoformat()}
+        for i in range(VACATIONS_PER_EMPLOYEE)
+    ]
+    token = create_access_token("employee@example.com", 7, ["employee"], 0, 0)
+
+    def overlap_check():
+        new_start, new_end = date(2027, 1, 4), date(2027, 1, 8)
+        for req in active:
+            if is_overlapping(new_start, new_end, date.fromisoformat(req["start_date"]), date.fromisoformat(req["end_date"])):
+                return True
+        return False
+
+    return {
+        "service.calculate_working_days[2w]": lambda: calculate_working_days(start, start + timedelta(days=13)),
+        "service.calculate_working_days[1y]": lambda: calculate_working_days(start, start + timedelta(days=364)),
+        "service.overlap_check": overlap_check,
+        "filters.format_date_czech": lambda: format_date_czech("2026-07-01"),
+        "security.create_access_token": lambda: create_access_token("employee@example.com", 7, ["employee"], 0, 0),
+        "security.decode_access_token": lambda: decode_access_token(token),
+    }
+
+def _repository_benchmarks(ctx: BenchContext) -> Dict[str, Callable[[], Any]]:
+    from app.models.schemas import EmployeeCreateByAdmin
+
+    users = ctx.repos.users
+    vacations = ctx.repos.vacations
+    pending = ctx.pending
+
+    bench_employee_id = users.create_user(
+        EmployeeCreateByAdmin(email="bench-owner@example.com", name="Bench", remaining_days=0), "x"
+    )["id"]
+
+    def create_user():
+        data = EmployeeCreateByAdmin(email=f"bench{ctx.unique()}@example.com", name="Bench", remaining_days=20)
+        return users.create_user(data, "x")
+
+    def delete_user():
+        data = EmployeeCreateByAdmin(email=f"bench-delete{ctx.unique()}@example.com", name="Bench", remaining_days=0)
+        return users.delete_user(users.create_user(data, "x")["id"])
+
+    # Čtení se měří před zápisy, aby vložené řádky neovlivnily výsledky
+    return {
+        "user_repo.get_all_users_for_admin_management": users.get_all_users_for_admin_management,
+        "user_repo.get_user_by_email": lambda: users.get_user_by_email(ctx.employee_email),
+        "user_repo.get_user_by_id": lambda: users.get_user_by_id(ctx.employee_id),
+        "user_repo.get_all_employees": users.get_all_employees,
+        "user_repo.search_users": lambda: users.search_users(ctx.employee_name[:3], limit=50),
+        "vacation_repo.get_vacation_request_by_id": lambda: vacations.get_vacation_request_by_id(ctx.pending_id),
+        "vacation_repo.get_active_vacation_requests": lambda: vacations.get_active_vacation_requests(ctx.employee_id),
+        "vacation_repo.get_employee_vacation_history": lambda: vacations.get_employee_vacation_history(ctx.employee_id),
+        "vacation_repo.get_pending_requests": vacations.get_pending_requests,
+        "vacation_repo.get_upcoming_approved_vacations": lambda: vacations.get_upcoming_approved_vacations(10),
+        "vacation_repo.get_approved_intervals": vacations.get_approved_intervals,
+        "user_repo.update_user_remaining_days": lambda: users.update_user_remaining_days(ctx.employee_id, 0),
+        "user_repo.update_user_roles": lambda: users.update_user_roles(ctx.employee_id, False, False),
+        "vacation_repo.update_request_status": lambda: vacations.update_request_status(ctx.pending_id, "Pending"),
+        "vacation_repo.update_vacation_request": lambda: vacations.update_vacation_request(
+            ctx.pending_id, pending["start_date"], pending["end_date"], pending["total_days"]
+        ),
+        "vacation_repo.create_vacation_request": lambda: vacations.create_vacation_request(
+            bench_employee_id, "2099-01-05", "2099-01-09", 5, "Rejected", "0"
+        ),
+        "user_repo.create_user": create_user,
+        "user_repo.delete_user[+insert]": delete_user,
+    }
+
+
+#
+# MĚŘENÍ
+#
+def measure(fn: Callable[[], Any], min_time: float = MIN_TIME, repeats: int = REPEATS) -> Dict[str, Any]:
+    started = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - started, 1e-7)
+    iterations = max(1, min(100_000, int(min_time / single)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter() - started) / iterations)
+    return {"seconds_per_op": best, "iterations": iterations}
+
+def size_label(size: str, backend: str) -> str:
+    # Výsledky paměťového backendu mají v baseline vlastní klíče
+    return size if backend == "sqlite" else f"{size}@{backend}"
+
+def dataset_path(data_dir: str, size: str, seed: int) -> str:
+    return os.path.join(data_dir, f"seed-{size}-{seed}.db")
+
+def ensure_dataset(data_dir: str, size: str, seed: int) -> str:
+    from app.cli.seed import seed_database
+
+    path = dataset_path(data_dir, size, seed)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        employees = max(1, SIZES[size] // VACATIONS_PER_EMPLOYEE)
+        seed_database(path, employees, SIZES[size], seed)
+    return path
+
+def run_size(
+    data_dir: str,
+    size: str,
+    seed: int,
+    selected: Optional[List[str]],
+    backend: str = "sqlite"
+) -> Dict[str, Any]:
+    import shutil
+
+    source = ensure_dataset(data_dir, size, seed)
+    # Zápisové benchmarky mění data, proto se měří na kopii
+    work_path = source + ".work"
+    shutil.copyfile(source, work_path)
+    ctx = BenchContext(work_path, backend)
+    try:
+        benchmarks = {**_service_benchmarks(ctx), **_repository_benchmarks(ctx)}
+        results = {}
+        for name, fn in benchmarks.items():
+            if selected and not any(part in name for part in selected):
+                continue
+            results[name] = measure(fn)
+            sys.stderr.write(f"[{size}] {name}: {results[name]['seconds_per_op'] * 1e6:.2f} µs\n")
+        return results
+    finally:
+        ctx.close()
+        os.remove(work_path)
+
+def run(args) -> Dict[str, Any]:
+    os.environ["EMAIL_ENABLED"] = "0"
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "sizes": {
+            size_label(size, args.backend): run_size(args.data_dir, size, args.seed, args.only, args.backend)
+            for size in args.sizes
+        },
+    }
+
+
+#
+# POROVNÁNÍ S BASELINE
+#
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for size, benchmarks in results["sizes"].items():
+        base_size = baseline.get("sizes", {}).get(size, {})
+        for name, result in benchmarks.items():
+            base = base_size.get(name)
+            if not base:
+                continue
+            ratio = result["seconds_per_op"] / base["seconds_per_op"]
+            marker = "REGRESE" if ratio > 1 + tolerance else "ok"
+            print(f"{marker:8} [{size}] {name}: {ratio:.2f}x ({result['seconds_per_op'] * 1e6:.2f} µs vs. {base['seconds_per_op'] * 1e6:.2f} µs)")
+            if ratio > 1 + tolerance:
+                regressions.append(f"[{size}] {name}")
+    return regressions
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Mikro-benchmarky aplikace Dovolená.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--sizes", type=lambda v: v.split(","), default=["1k", "100k"], help="Velikosti dat: 1k,100k,1M")
+        p.add_argument("--seed", type=int, default=42)
+        p.add_argument("--data-dir", default=os.path.join("app", "data", "bench"))
+        p.add_argument("--only", type=lambda v: v.split(","), help="Spustit jen benchmarky obsahující daný text.")
+        p.add_argument("--baseline", default=BASELINE_PATH)
+        p.add_argument("--backend", choices=("sqlite", "memory"), default="sqlite", help="Implementace repozitářů.")
+
+    run_parser = sub.add_parser("run", help="Spustí benchmarky.")
+    common(run_parser)
+    run_parser.add_argument("--output", help="Soubor pro JSON výsledek.")
+    run_parser.add_argument("--save-baseline", action="store_true", help="Uloží výsledky jako novou baseline.")
+
+    compare_parser = sub.add_parser("compare", help="Porovná výsledky s baseline.")
+    common(compare_parser)
+    compare_parser.add_argument("results", nargs="?", help="JSON s výsledky (jinak se benchmarky spustí).")
+    compare_parser.add_argument("--tolerance", type=float, default=0.3, help="Povolené zpomalení (0.3 = 30 %).")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "compare" and args.results:
+        results = load_json(args.results)
+    else:
+        for size in args.sizes:
+            if size not in SIZES:
+                raise SystemExit(f"Neznámá velikost dat: {size}")
+        results = run(args)
+
+    if args.command == "run":
+        if args.output:
+            write_json(args.output, results)
+        if args.save_baseline:
+            baseline = load_json(args.baseline) if os.path.exists(args.baseline) else {"sizes": {}}
+            baseline.update({key: value for key, value in results.items() if key != "sizes"})
+            for size, benchmarks in results["sizes"].items():
+                baseline["sizes"].setdefault(size, {}).update(benchmarks)
+            write_json(args.baseline, baseline)
+        if not args.output and not args.save_baseline:
+            json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+            sys.stdout.write("\n")
+        return 0
+
+    regressions = compare(results, load_json(args.baseline), args.tolerance)
+    if regressions:
+        print(f"Zpomalení nad toleranci {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# tests/conftest.py
+
+import sqlite3
+import pytest
+from app.core.config import settings
+from app.models import cache_sync
+from app.models.db import MeteredConnection, init_schema, migrate_data
+from app.repositories.memory_backend import MemoryRepositories, MemoryStore
+from app.repositories.sqlite_backend import SqliteRepositories
+
+BACKENDS = ("sqlite", "memory")
+
+
+#
+# PRÁZDNÁ DATABÁZE V DOČASNÉM ADRESÁŘI
+#
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Archivy a verze cache jen z dočasného adresáře, nikdy z app/data
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    path = str(tmp_path / "vacation.db")
+    watcher = cache_sync.VersionWatcher(path, 0)
+    monkeypatch.setattr(cache_sync, "_watcher", watcher)
+    yield path
+    watcher.close()
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path, factory=MeteredConnection, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    init_schema(conn)
+    migrate_data(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+#
+# SADA REPOZITÁŘŮ (stejné testy pro oba backendy)
+#
+@pytest.fixture(params=BACKENDS)
+def repos(request, conn):
+    if request.param == "memory":
+        return MemoryRepositories(MemoryStore())
+    return SqliteRepositories(conn)
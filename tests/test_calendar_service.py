@@ -0,0 +1,73 @@
+# tests/test_calendar_service.py
+"""
+iCalendar výstup (RFC 5545): zalamování dlouhých řádků po oktetech
+bez rozdělení znaku UTF-8 a escapování textových hodnot.
+"""
+
+import pytest
+from app.services.calendar_service import MAX_LINE_OCTETS, _escape, _fold, render_calendar
+
+LONG_NAME = "Dovolená – Žofie Řeháčková-Šťastná, oddělení účtárny; příliš žluťoučký kůň úpěl ďábelské ódy"
+
+
+def _unfold(text: str) -> str:
+    return text.replace("\r\n ", "")
+
+
+#
+# ZALAMOVÁNÍ ŘÁDKŮ
+#
+def test_short_line_unchanged():
+    line = "SUMMARY:Dovolená – Jana"
+    assert _fold(line) == line
+
+@pytest.mark.parametrize("prefix", range(4))
+def test_fold_keeps_octet_limit_and_characters(prefix):
+    # Posun o 0–3 znaky: dvou- i tříbajtové znaky padnou přímo na hranici zalomení
+    line = "SUMMARY:" + "x" * prefix + LONG_NAME * 3
+    folded = _fold(line)
+    physical = folded.split("\r\n")
+    assert len(physical) > 1
+    assert all(len(part.encode()) <= MAX_LINE_OCTETS for part in physical)
+    assert all(part.startswith(" ") for part in physical[1:])
+    assert _unfold(folded) == line
+
+def test_fold_exactly_at_limit():
+    line = "X" * (MAX_LINE_OCTETS - 2) + "é"
+    assert len(line.encode()) == MAX_LINE_OCTETS
+    assert _fold(line) == line
+    longer = line + "é"
+    assert _fold(longer).split("\r\n")[0] == line
+    assert _unfold(_fold(longer)) == longer
+
+
+#
+# ESCAPOVÁNÍ TEXTU
+#
+def test_escape_special_characters():
+    assert _escape("a;b,c\nd") == "a\\;b\\,c\\nd"
+    assert _escape("c:\\cesta") == "c:\\\\cesta"
+    assert _escape("Řeháčková") == "Řeháčková"
+
+def test_escaped_backslash_before_separator():
+    # Zpětné lomítko se escapuje jako první, jinak by \; změnilo význam
+    assert _escape("\\;") == "\\\\\\;"
+
+
+#
+# CELÝ KALENDÁŘ
+#
+def test_render_calendar_folds_and_escapes_summary():
+    rows = [{
+        "id": 1, "start_date": "2030-03-04", "end_date": "2030-03-06",
+        "submitted_at": "1900000000", "decided_at": None,
+        "name": LONG_NAME, "email": "zofie@firma.cz",
+    }]
+    body = render_calendar("Dovolená – tým Účtárna, Brno", rows).decode()
+    assert body.endswith("\r\n")
+    assert all(len(line.encode()) <= MAX_LINE_OCTETS for line in body.split("\r\n"))
+
+    lines = _unfold(body).split("\r\n")
+    assert "X-WR-CALNAME:Dovolená – tým Účtárna\\, Brno" in lines
+    assert "SUMMARY:" + _escape("Dovolená – " + LONG_NAME) in lines
+    assert "DTEND;VALUE=DATE:20300307" in lines
@@ -0,0 +1,87 @@
+# tests/test_capacity_service.py
+"""
+Kapacita souběžných absencí: intervalový index, konfigurace limitů
+a kontrola při schvalování nad oběma backendy.
+"""
+
+from datetime import date, timedelta
+import pytest
+from app.core.config import settings
+from app.models.schemas import EmployeeCreateByAdmin
+from app.services import capacity_service, vacation_service
+from app.services.capacity_service import AbsenceIndex, parse_group_limits
+
+BASE = date(2030, 3, 4)
+
+
+def _counts(index, start, end):
+    days = {}
+    for seg_start, seg_end, count in index.segments(start, end):
+        current = seg_start
+        while current <= seg_end:
+            days[current] = count
+            current += timedelta(days=1)
+    return days
+
+@pytest.fixture(autouse=True)
+def _fresh_index(monkeypatch):
+    # Index je cache modulu a verze obou backendů začínají stejně
+    monkeypatch.setattr(settings, "EMAIL_ENABLED", False)
+    capacity_service.invalidate_index()
+    yield
+    capacity_service.invalidate_index()
+
+
+#
+# INTERVALOVÝ INDEX
+#
+def test_added_matches_rebuilt_index():
+    intervals = [(0, 4), (2, 2), (4, 9), (10, 12), (0, 12), (5, 5), (13, 20)]
+    index = AbsenceIndex()
+    seen = []
+    for first, last in intervals:
+        interval = (BASE + timedelta(days=first), BASE + timedelta(days=last))
+        index = index.added(*interval)
+        seen.append(interval)
+        assert _counts(index, BASE - timedelta(days=2), BASE + timedelta(days=25)) == \
+            _counts(AbsenceIndex(seen), BASE - timedelta(days=2), BASE + timedelta(days=25))
+
+def test_added_keeps_original_unchanged():
+    index = AbsenceIndex([(BASE, BASE + timedelta(days=3))])
+    before = _counts(index, BASE, BASE + timedelta(days=5))
+    index.added(BASE + timedelta(days=1), BASE + timedelta(days=5))
+    assert _counts(index, BASE, BASE + timedelta(days=5)) == before
+
+
+#
+# KONFIGURACE LIMITŮ
+#
+def test_parse_group_limits():
+    assert parse_group_limits("") == {}
+    assert parse_group_limits("employee:3, admin:1,") == {"employee": 3, "admin": 1}
+
+@pytest.mark.parametrize("raw", ["employee", "employee:x", ":3", "admin:-1"])
+def test_parse_group_limits_rejects_invalid(raw):
+    with pytest.raises(ValueError):
+        parse_group_limits(raw)
+
+
+#
+# KONTROLA PŘI SCHVALOVÁNÍ
+#
+def test_approval_over_capacity_keeps_request_pending(repos, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_ABSENCES", 1)
+    request_ids = []
+    for email in ("a@firma.cz", "b@firma.cz"):
+        user = repos.users.create_user(EmployeeCreateByAdmin(email=email, name=email[0], remaining_days=20), "hash", False, False)
+        request_ids.append(repos.vacations.create_vacation_request(
+            user['id'], BASE.isoformat(), (BASE + timedelta(days=2)).isoformat(), 3, "Pending", "1700000000"
+        )['id'])
+    repos.commit()
+
+    assert vacation_service.handle_vacation_approval(repos, request_ids[0], "Approved")
+    with pytest.raises(ValueError, match="kapacita"):
+        vacation_service.handle_vacation_approval(repos, request_ids[1], "Approved")
+    assert repos.vacations.get_vacation_request_by_id(request_ids[1])['status'] == "Pending"
+    # Zamítnutí kapacitu neřeší
+    assert vacation_service.handle_vacation_approval(repos, request_ids[1], "Rejected")
@@ -0,0 +1,169 @@
+# tests/test_idempotency.py
+"""
+Opakované odeslání formuláře: přehrání výsledku, souběžný duplikát
+čekající na první požadavek a vypršení položek.
+"""
+
+import asyncio
+from contextlib import nullcontext
+from types import SimpleNamespace
+import pytest
+from starlette.responses import RedirectResponse, Response
+from app.api import idempotency
+from app.api.idempotency import IdempotencyStore, idempotent
+
+ALICE = {"id": 1}
+BOB = {"id": 2}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Jen hodiny modulu: smyčka událostí dál běží podle skutečného času
+    clock = Clock()
+    monkeypatch.setattr(idempotency, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+@pytest.fixture
+def store(monkeypatch, clock):
+    store = IdempotencyStore(ttl=60, max_entries=100)
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+def _endpoint(calls, response=None, gate=None):
+    @idempotent("request_vacation")
+    async def submit(payload, idempotency_key=None):
+        calls.append(idempotency_key)
+        if gate is not None:
+            await gate.wait()
+        if isinstance(response, Exception):
+            raise response
+        return response or RedirectResponse(url=f"/employee/profile?call={len(calls)}", status_code=303)
+    return submit
+
+
+#
+# PŘEHRÁNÍ VÝSLEDKU
+#
+def test_same_key_replays_first_redirect(store):
+    calls = []
+    submit = _endpoint(calls)
+
+    async def scenario():
+        first = await submit(payload=ALICE, idempotency_key="k1")
+        again = await submit(payload=ALICE, idempotency_key="k1")
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert calls == ["k1"]
+    assert (again.status_code, again.headers["location"]) == (first.status_code, first.headers["location"])
+
+def test_key_is_scoped_to_user_and_token(store):
+    calls = []
+    submit = _endpoint(calls)
+
+    async def scenario():
+        await submit(payload=ALICE, idempotency_key="k1")
+        await submit(payload=BOB, idempotency_key="k1")
+        await submit(payload=ALICE, idempotency_key="k2")
+        # Bez tokenu se nic neukládá
+        await submit(payload=ALICE, idempotency_key=None)
+        await submit(payload=ALICE, idempotency_key=None)
+
+    asyncio.run(scenario())
+    assert calls == ["k1", "k1", "k2", None, None]
+
+@pytest.mark.parametrize("response", [Response("chyba", status_code=500), RuntimeError("chyba")])
+def test_failure_is_not_replayed(store, response):
+    calls = []
+    failing = _endpoint(calls, response=response)
+    working = _endpoint(calls)
+
+    async def scenario():
+        with pytest.raises(RuntimeError) if isinstance(response, Exception) else nullcontext():
+            await failing(payload=ALICE, idempotency_key="k1")
+        return await working(payload=ALICE, idempotency_key="k1")
+
+    retried = asyncio.run(scenario())
+    assert calls == ["k1", "k1"]
+    assert retried.headers["location"] == "/employee/profile?call=2"
+
+
+#
+# SOUBĚŽNÝ DUPLIKÁT
+#
+def test_in_flight_duplicate_waits_for_first_result(store):
+    calls = []
+
+    async def scenario():
+        gate = asyncio.Event()
+        submit = _endpoint(calls, gate=gate)
+        first = asyncio.create_task(submit(payload=ALICE, idempotency_key="k1"))
+        await asyncio.sleep(0)
+        duplicate = asyncio.create_task(submit(payload=ALICE, idempotency_key="k1"))
+        await asyncio.sleep(0)
+        assert not duplicate.done()
+        gate.set()
+        return await first, await duplicate
+
+    first, duplicate = asyncio.run(scenario())
+    assert calls == ["k1"]
+    assert duplicate.headers["location"] == first.headers["location"]
+
+def test_in_flight_duplicate_runs_itself_after_failure(store):
+    calls = []
+
+    async def scenario():
+        gate = asyncio.Event()
+        failing = _endpoint(calls, response=Response("chyba", status_code=500), gate=gate)
+        working = _endpoint(calls)
+        first = asyncio.create_task(failing(payload=ALICE, idempotency_key="k1"))
+        await asyncio.sleep(0)
+        duplicate = asyncio.create_task(working(payload=ALICE, idempotency_key="k1"))
+        await asyncio.sleep(0)
+        gate.set()
+        return await first, await duplicate
+
+    first, duplicate = asyncio.run(scenario())
+    assert calls == ["k1", "k1"]
+    assert first.status_code == 500
+    assert duplicate.headers["location"] == "/employee/profile?call=2"
+
+
+#
+# VYPRŠENÍ A LIMIT POLOŽEK
+#
+def test_entry_expires_after_ttl(store, clock):
+    calls = []
+    submit = _endpoint(calls)
+
+    async def scenario():
+        await submit(payload=ALICE, idempotency_key="k1")
+        clock.now += 59
+        await submit(payload=ALICE, idempotency_key="k1")
+        clock.now += 2
+        return await submit(payload=ALICE, idempotency_key="k1")
+
+    last = asyncio.run(scenario())
+    assert calls == ["k1", "k1"]
+    assert last.headers["location"] == "/employee/profile?call=2"
+    assert store.get(("request_vacation", 1, "k1")) is not None
+
+def test_oldest_entries_evicted_over_limit(clock):
+    store = IdempotencyStore(ttl=60, max_entries=2)
+
+    async def scenario():
+        for token in ("a", "b", "c"):
+            key = ("form", 1, token)
+            store.finish(key, store.start(key), (303, f"/{token}"))
+
+    asyncio.run(scenario())
+    assert store.get(("form", 1, "a")) is None
+    assert store.get(("form", 1, "b")) == (303, "/b")
+    assert store.get(("form", 1, "c")) == (303, "/c")
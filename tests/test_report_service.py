@@ -0,0 +1,163 @@
+# tests/test_report_service.py
+"""
+Agregace reportů nad sloupci (numpy) proti prosté smyčce po řádcích
+na pevných datech: víkendy, rozhodnutí v den podání, čekající žádosti, prázdná data.
+"""
+
+import math
+import statistics
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pytest
+from app.services import report_service
+from app.services.report_service import VacationColumns
+
+EPOCH = date(1970, 1, 1)
+TODAY = date(2030, 4, 10)
+
+
+def _ts(day: date, hour: int = 0) -> int:
+    return int(datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc).timestamp())
+
+# (zaměstnanec, od, do, stav, podáno, rozhodnuto)
+ROWS = [
+    # Jen víkend: žádný čerpaný den
+    (1, date(2030, 3, 9), date(2030, 3, 10), "Approved", _ts(date(2030, 3, 1), 8), _ts(date(2030, 3, 2), 9)),
+    # Přes konec měsíce i víkend
+    (1, date(2030, 3, 28), date(2030, 4, 2), "Approved", _ts(date(2030, 3, 1), 10), _ts(date(2030, 3, 5), 10)),
+    (2, date(2030, 4, 1), date(2030, 4, 1), "Approved", _ts(date(2030, 3, 20), 7), _ts(date(2030, 4, 3), 16)),
+    # Rozhodnuto v den podání
+    (2, date(2030, 5, 6), date(2030, 5, 8), "Rejected", _ts(date(2030, 3, 5), 8), _ts(date(2030, 3, 5), 11)),
+    (3, date(2030, 2, 25), date(2030, 3, 3), "Approved", _ts(date(2030, 2, 1), 12), _ts(date(2030, 2, 1), 12)),
+    # Stále čekající
+    (3, date(2030, 6, 3), date(2030, 6, 7), "Pending", _ts(date(2030, 4, 8), 9), None),
+    (1, date(2030, 7, 1), date(2030, 7, 1), "Pending", _ts(date(2030, 4, 10), 23), None),
+    # Rozhodnuto před zavedením decided_at: do fronty ani doby vyřízení nepatří
+    (2, date(2030, 1, 7), date(2030, 1, 9), "Approved", _ts(date(2029, 12, 1), 9), None),
+    # Záporná doba (posunuté hodiny) se počítá jako nula
+    (3, date(2030, 8, 5), date(2030, 8, 5), "Rejected", _ts(date(2030, 4, 2), 15), _ts(date(2030, 4, 2), 14)),
+]
+
+
+def _columns(rows):
+    names = ("employee_id", "start_date", "end_date", "status", "submitted_at", "decided_at")
+    raw = {name: [] for name in names}
+    for row in rows:
+        for name, value in zip(names, row):
+            raw[name].append(value.isoformat() if isinstance(value, date) else value)
+    return VacationColumns(raw)
+
+def _month(day: date) -> int:
+    return (day.year - 1970) * 12 + day.month - 1
+
+def _day_number(day: date) -> int:
+    return (day - EPOCH).days
+
+
+#
+# REFERENČNÍ VÝPOČTY PO ŘÁDCÍCH
+#
+def _reference_days_taken(rows):
+    counts = Counter()
+    for employee_id, start, end, status, _, _ in rows:
+        if status != "Approved":
+            continue
+        current = start
+        while current <= end:
+            if current.weekday() < 5:
+                counts[(employee_id, _month(current))] += 1
+            current += timedelta(days=1)
+    return dict(counts)
+
+def _reference_turnaround(rows):
+    per_month = {}
+    for _, _, _, _, submitted, decided in rows:
+        if decided is None:
+            continue
+        month = _month(datetime.fromtimestamp(decided, timezone.utc).date())
+        per_month.setdefault(month, []).append(max(decided - submitted, 0) / 3600)
+    result = {}
+    for month, hours in per_month.items():
+        hours.sort()
+        result[month] = {
+            "count": len(hours),
+            "mean": sum(hours) / len(hours),
+            "median": statistics.median(hours),
+            # Nejbližší pořadí: nejmenší hodnota, pod kterou leží aspoň 90 % měření
+            "p90": hours[math.ceil(len(hours) * 0.9) - 1],
+            "max": hours[-1],
+        }
+    return result
+
+def _reference_backlog(rows, today: int):
+    waiting = []
+    for _, _, _, status, submitted, decided in rows:
+        opened = submitted // 86400
+        if status == "Pending":
+            waiting.append((opened, None))
+        elif decided is not None:
+            waiting.append((opened, max(decided // 86400, opened)))
+    if not waiting:
+        return today, [0]
+    first_day = min(min(opened for opened, _ in waiting), today)
+    series = [
+        sum(1 for opened, closed in waiting if opened <= day and (closed is None or closed > day))
+        for day in range(first_day, today + 1)
+    ]
+    return first_day, series
+
+
+#
+# POROVNÁNÍ S REFERENCÍ
+#
+def _days_taken(rows):
+    employees, months, counts = report_service.days_taken_by_month(_columns(rows))
+    return {(int(e), int(m)): int(c) for e, m, c in zip(employees, months, counts)}
+
+def _turnaround(rows):
+    stats = report_service.turnaround_by_month(_columns(rows))
+    return {
+        int(month): {name: stats[name][i].item() for name in ("count", "mean", "median", "p90", "max")}
+        for i, month in enumerate(stats["month"])
+    }
+
+@pytest.mark.parametrize("rows", [ROWS, ROWS[:1], ROWS[3:5], []], ids=["all", "weekend_only", "same_day", "empty"])
+def test_days_taken_matches_reference(rows):
+    assert _days_taken(rows) == _reference_days_taken(rows)
+
+def test_days_taken_counts_working_days_only():
+    days = _days_taken(ROWS)
+    assert days[(1, _month(date(2030, 3, 1)))] == 2
+    assert days[(1, _month(date(2030, 4, 1)))] == 2
+    assert _days_taken(ROWS[:1]) == {}
+
+@pytest.mark.parametrize("rows", [ROWS, ROWS[3:5], ROWS[5:7], []], ids=["all", "same_day", "pending_only", "empty"])
+def test_turnaround_matches_reference(rows):
+    actual = _turnaround(rows)
+    expected = _reference_turnaround(rows)
+    assert actual.keys() == expected.keys()
+    for month, stats in expected.items():
+        assert actual[month] == pytest.approx(stats)
+
+def test_turnaround_p90_uses_nearest_rank():
+    submitted = _ts(date(2030, 3, 1))
+    rows = [(1, date(2030, 5, 6), date(2030, 5, 6), "Approved", submitted, submitted + hours * 3600)
+            for hours in (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 100)]
+    stats = _turnaround(rows)[_month(date(2030, 3, 1))]
+    assert stats["count"] == 11
+    assert stats["p90"] == 10
+    assert stats["median"] == 6
+    assert stats["max"] == 100
+
+@pytest.mark.parametrize("rows", [ROWS, ROWS[3:5], ROWS[5:7], ROWS[7:8], []], ids=["all", "same_day", "pending_only", "legacy_only", "empty"])
+def test_pending_backlog_matches_reference(rows):
+    today = _day_number(TODAY)
+    first_day, series = report_service.pending_backlog(_columns(rows), today)
+    assert (first_day, series.tolist()) == _reference_backlog(rows, today)
+
+def test_pending_backlog_same_day_decision_never_waits():
+    today = _day_number(TODAY)
+    first_day, series = report_service.pending_backlog(_columns(ROWS[3:5]), today)
+    assert first_day == _day_number(date(2030, 2, 1))
+    assert not np.any(series)
@@ -0,0 +1,514 @@
+# tests/test_repositories_contract.py
+"""
+Smlouva protokolu Repositories: každý test běží nad SQLite i paměťovým backendem
+a oba musí vracet stejné řádky ve stejném pořadí.
+"""
+
+from datetime import date, timedelta
+import sqlite3
+import pytest
+from app.core.config import settings
+from app.models import cache_sync
+from app.models.schemas import EmployeeCreateByAdmin, VacationRequest
+from app.repositories import archive_repo
+from app.repositories.memory_backend import MemoryRepositories, MemoryStore
+from app.repositories.sqlite_backend import SqliteRepositories
+from app.services import vacation_service
+
+
+def _user(repos, email, name, remaining_days=20, is_admin=False, is_super_admin=False, team_id=None):
+    user_data = EmployeeCreateByAdmin(email=email, name=name, remaining_days=remaining_days)
+    return repos.users.create_user(user_data, "hash", is_admin, is_super_admin, team_id)
+
+def _vacation(repos, employee_id, start, end, status="Pending", submitted_at="1700000000", total_days=1):
+    return repos.vacations.create_vacation_request(employee_id, start, end, total_days, status, submitted_at)
+
+def _day(offset):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+def _version(repos, scope):
+    return repos.cache_version(scope, refresh=True)
+
+def _row_version(repos, user_id):
+    return next(user['version'] for user in repos.users.get_all_users_for_admin_management() if user['id'] == user_id)
+
+
+#
+# UŽIVATELÉ: ČTENÍ A POŘADÍ
+#
+def test_create_and_get_user(repos):
+    created = _user(repos, "jana@firma.cz", "Jana Nováková", remaining_days=15)
+    assert created['email'] == "jana@firma.cz"
+    assert created['remaining_days'] == 15
+    assert created['is_admin'] == 0 and created['is_super_admin'] == 0
+
+    by_id = repos.users.get_user_by_id(created['id'])
+    by_email = repos.users.get_user_by_email("jana@firma.cz")
+    for user in (by_id, by_email):
+        assert user['id'] == created['id']
+        assert user['name'] == "Jana Nováková"
+        assert user['hashed_password'] == "hash"
+        assert user['team_id'] is None
+    assert repos.users.get_user_by_id(created['id'] + 100) is None
+    assert repos.users.get_user_by_email("nikdo@firma.cz") is None
+
+def test_admin_management_ordered_by_email(repos):
+    for email in ("c@firma.cz", "a@firma.cz", "b@firma.cz"):
+        _user(repos, email, email[0].upper())
+    users = repos.users.get_all_users_for_admin_management()
+    assert [user['email'] for user in users] == ["a@firma.cz", "b@firma.cz", "c@firma.cz"]
+    assert set(users[0]) == {"id", "name", "email", "is_admin", "is_super_admin", "remaining_days", "version", "team_id"}
+    assert list(repos.users.iter_users_for_admin_management()) == repos.users.get_all_users_for_admin_management()
+
+def test_get_all_employees_skips_admins_and_filters_teams(repos):
+    team = repos.teams.create_team("Vývoj")
+    _user(repos, "b@firma.cz", "B", team_id=team['id'])
+    _user(repos, "a@firma.cz", "A")
+    _user(repos, "admin@firma.cz", "Admin", is_admin=True, team_id=team['id'])
+    _user(repos, "super@firma.cz", "Super", is_super_admin=True)
+
+    assert [user['email'] for user in repos.users.get_all_employees()] == ["a@firma.cz", "b@firma.cz"]
+    assert [user['email'] for user in repos.users.get_all_employees([team['id']])] == ["b@firma.cz"]
+    assert repos.users.get_all_employees([]) == []
+
+
+#
+# UŽIVATELÉ: FULLTEXTOVÉ HLEDÁNÍ
+#
+def test_search_prefix_without_diacritics(repos):
+    _user(repos, "jan@firma.cz", "Jan Novák")
+    _user(repos, "petr@firma.cz", "Petr Svoboda")
+    assert [user['email'] for user in repos.users.search_users("nova")] == ["jan@firma.cz"]
+    assert [user['email'] for user in repos.users.search_users("JAN nov")] == ["jan@firma.cz"]
+    assert repos.users.search_users("jan svoboda") == []
+    assert repos.users.search_users("  ") == []
+
+def test_search_ranks_name_matches_before_email_matches(repos):
+    _user(repos, "novak.p@firma.cz", "Petr Dvořák")
+    _user(repos, "z@firma.cz", "Zdeněk Novák")
+    results = repos.users.search_users("novak")
+    assert [user['email'] for user in results] == ["z@firma.cz", "novak.p@firma.cz"]
+
+def test_search_ties_ordered_by_email_with_paging(repos):
+    for email in ("c@firma.cz", "a@firma.cz", "b@firma.cz"):
+        _user(repos, email, "Marie Horáková")
+    emails = [user['email'] for user in repos.users.search_users("marie")]
+    assert emails == ["a@firma.cz", "b@firma.cz", "c@firma.cz"]
+    assert [user['email'] for user in repos.users.search_users("marie", limit=1, offset=1)] == ["b@firma.cz"]
+
+def test_search_employees_only_and_team_scope(repos):
+    team = repos.teams.create_team("Podpora")
+    _user(repos, "a@firma.cz", "Eva Malá", team_id=team['id'])
+    _user(repos, "b@firma.cz", "Eva Velká")
+    _user(repos, "c@firma.cz", "Eva Správcová", is_admin=True, team_id=team['id'])
+
+    assert [user['email'] for user in repos.users.search_users("eva", employees_only=True)] == ["a@firma.cz", "b@firma.cz"]
+    assert [user['email'] for user in repos.users.search_users("eva", team_ids=[team['id']])] == ["a@firma.cz", "c@firma.cz"]
+    assert repos.users.search_users("eva", team_ids=[]) == []
+
+
+#
+# UŽIVATELÉ: ZÁPISY, COMPARE-AND-SWAP A VERZE CACHE
+#
+def test_remaining_days_never_negative(repos):
+    user = _user(repos, "a@firma.cz", "A", remaining_days=5)
+    before = _version(repos, cache_sync.USERS)
+
+    assert repos.users.update_user_remaining_days(user['id'], -3)
+    assert repos.users.get_user_by_id(user['id'])['remaining_days'] == 2
+    assert _version(repos, cache_sync.USERS) == before + 1
+
+    assert not repos.users.update_user_remaining_days(user['id'], -3)
+    assert repos.users.get_user_by_id(user['id'])['remaining_days'] == 2
+    assert not repos.users.update_user_remaining_days(user['id'] + 100, 1)
+    assert _version(repos, cache_sync.USERS) == before + 1
+
+def test_reset_balance_picture_and_team(repos):
+    team = repos.teams.create_team("Obchod")
+    user = _user(repos, "a@firma.cz", "A", remaining_days=5)
+    before = _version(repos, cache_sync.USERS)
+    approved_before = _version(repos, cache_sync.APPROVED_VACATIONS)
+
+    assert repos.users.reset_user_balance(user['id'], 25)
+    assert repos.users.update_profile_picture(user['id'], "media/a.webp")
+    assert _version(repos, cache_sync.APPROVED_VACATIONS) == approved_before
+    assert repos.users.update_user_team(user['id'], team['id'])
+    stored = repos.users.get_user_by_id(user['id'])
+    assert (stored['remaining_days'], stored['profile_picture_path'], stored['team_id']) == (25, "media/a.webp", team['id'])
+    assert _version(repos, cache_sync.USERS) == before + 3
+    # Změna týmu mění obsah týmových kalendářů
+    assert _version(repos, cache_sync.APPROVED_VACATIONS) == approved_before + 1
+
+    missing = user['id'] + 100
+    assert not repos.users.reset_user_balance(missing, 1)
+    assert not repos.users.update_profile_picture(missing, None)
+    assert not repos.users.update_user_team(missing, None)
+
+def test_update_roles_compare_and_swap(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    version = _row_version(repos, user['id'])
+    users_before = _version(repos, cache_sync.USERS)
+    approved_before = _version(repos, cache_sync.APPROVED_VACATIONS)
+
+    assert repos.users.update_user_roles(user['id'], True, False, expected_version=version)
+    assert repos.users.get_user_by_id(user['id'])['is_admin'] == 1
+    assert _row_version(repos, user['id']) == version + 1
+    assert _version(repos, cache_sync.USERS) == users_before + 1
+    assert _version(repos, cache_sync.APPROVED_VACATIONS) == approved_before + 1
+
+    # Zastaralá verze: změna se neprovede a verze cache zůstanou
+    assert not repos.users.update_user_roles(user['id'], False, False, expected_version=version)
+    assert repos.users.get_user_by_id(user['id'])['is_admin'] == 1
+    assert _version(repos, cache_sync.USERS) == users_before + 1
+
+def test_super_admin_is_never_admin(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    assert repos.users.update_user_roles(user['id'], True, True)
+    stored = repos.users.get_user_by_id(user['id'])
+    assert (stored['is_admin'], stored['is_super_admin']) == (0, 1)
+
+def test_delete_user_removes_vacations(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    other = _user(repos, "b@firma.cz", "B")
+    vacation = _vacation(repos, user['id'], _day(1), _day(2))
+    kept = _vacation(repos, other['id'], _day(1), _day(2))
+    before = {scope: _version(repos, scope) for scope in (cache_sync.USERS, cache_sync.VACATIONS, cache_sync.APPROVED_VACATIONS)}
+
+    assert repos.users.delete_user(user['id'])
+    assert repos.users.get_user_by_id(user['id']) is None
+    assert repos.vacations.get_vacation_request_by_id(vacation['id']) is None
+    assert repos.vacations.get_vacation_request_by_id(kept['id']) is not None
+    assert all(_version(repos, scope) == version + 1 for scope, version in before.items())
+
+
+#
+# DOVOLENÉ: ČTENÍ A POŘADÍ
+#
+def test_create_and_get_vacation(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    before = _version(repos, cache_sync.VACATIONS)
+    created = _vacation(repos, user['id'], "2030-01-07", "2030-01-09", total_days=3)
+    assert _version(repos, cache_sync.VACATIONS) == before + 1
+
+    stored = repos.vacations.get_vacation_request_by_id(created['id'])
+    expected = {
+        "id": created['id'], "employee_id": user['id'], "start_date": "2030-01-07", "end_date": "2030-01-09",
+        "total_days": 3, "status": "Pending", "submitted_at": "1700000000", "decided_at": None, "version": 0,
+    }
+    assert stored == expected
+    assert repos.vacations.get_vacation_request_by_id(created['id'] + 100) is None
+
+def test_active_requests_skip_rejected(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    pending = _vacation(repos, user['id'], _day(1), _day(1))
+    approved = _vacation(repos, user['id'], _day(3), _day(3), status="Approved")
+    _vacation(repos, user['id'], _day(5), _day(5), status="Rejected")
+    active = repos.vacations.get_active_vacation_requests(user['id'])
+    assert sorted(row['id'] for row in active) == [pending['id'], approved['id']]
+
+def test_history_newest_first_with_paging(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    ids = [_vacation(repos, user['id'], _day(i), _day(i), submitted_at=str(1700000000 + i))['id'] for i in range(5)]
+    history = repos.vacations.get_employee_vacation_history(user['id'])
+    assert [row['id'] for row in history] == ids[::-1]
+    page = repos.vacations.get_employee_vacation_history(user['id'], limit=2, offset=1)
+    assert [row['id'] for row in page] == [ids[3], ids[2]]
+    assert repos.vacations.get_employee_vacation_history(user['id'], limit=2, offset=10) == []
+
+def test_pending_oldest_first_with_team_scope(repos):
+    team = repos.teams.create_team("Vývoj")
+    member = _user(repos, "a@firma.cz", "Alena", team_id=team['id'])
+    outsider = _user(repos, "b@firma.cz", "Bohdan")
+    newer = _vacation(repos, member['id'], _day(1), _day(1), submitted_at="1700000300")
+    older = _vacation(repos, outsider['id'], _day(1), _day(1), submitted_at="1700000100")
+    _vacation(repos, member['id'], _day(2), _day(2), status="Approved", submitted_at="1700000000")
+
+    pending = repos.vacations.get_pending_requests()
+    assert [(row['id'], row['name']) for row in pending] == [(older['id'], "Bohdan"), (newer['id'], "Alena")]
+    assert [row['id'] for row in repos.vacations.get_pending_requests([team['id']])] == [newer['id']]
+    assert repos.vacations.get_pending_requests([]) == []
+
+def test_upcoming_approved_by_start_date(repos):
+    team = repos.teams.create_team("Vývoj")
+    member = _user(repos, "a@firma.cz", "Alena", team_id=team['id'])
+    outsider = _user(repos, "b@firma.cz", "Bohdan")
+    _vacation(repos, member['id'], _day(-10), _day(-5), status="Approved")
+    _vacation(repos, member['id'], _day(-2), _day(2), status="Approved")
+    _vacation(repos, outsider['id'], _day(5), _day(6), status="Approved")
+    _vacation(repos, member['id'], _day(1), _day(1), status="Pending")
+    _vacation(repos, member['id'], _day(10), _day(12), status="Approved")
+
+    def upcoming(**kwargs):
+        return [dict(row) for row in repos.vacations.get_upcoming_approved_vacations(**kwargs)]
+
+    assert upcoming() == [
+        {"start_date": _day(-2), "end_date": _day(2), "name": "Alena"},
+        {"start_date": _day(5), "end_date": _day(6), "name": "Bohdan"},
+        {"start_date": _day(10), "end_date": _day(12), "name": "Alena"},
+    ]
+    assert [row['start_date'] for row in upcoming(limit=2)] == [_day(-2), _day(5)]
+    assert [row['start_date'] for row in upcoming(team_ids=[team['id']])] == [_day(-2), _day(10)]
+    assert upcoming(team_ids=[]) == []
+
+def test_approved_intervals_carry_roles(repos):
+    employee = _user(repos, "a@firma.cz", "A")
+    admin = _user(repos, "b@firma.cz", "B", is_admin=True)
+    _vacation(repos, employee['id'], "2030-01-01", "2030-01-02", status="Approved")
+    _vacation(repos, admin['id'], "2030-02-01", "2030-02-02", status="Approved")
+    _vacation(repos, employee['id'], "2030-03-01", "2030-03-02")
+
+    intervals = sorted(repos.vacations.get_approved_intervals(), key=lambda row: row['start_date'])
+    assert intervals == [
+        {"start_date": "2030-01-01", "end_date": "2030-01-02", "employee_id": employee['id'], "is_admin": 0, "is_super_admin": 0},
+        {"start_date": "2030-02-01", "end_date": "2030-02-02", "employee_id": admin['id'], "is_admin": 1, "is_super_admin": 0},
+    ]
+
+def test_calendar_by_employee_and_team(repos):
+    team = repos.teams.create_team("Vývoj")
+    first = _user(repos, "a@firma.cz", "A", team_id=team['id'])
+    second = _user(repos, "b@firma.cz", "B", team_id=team['id'])
+    late = _vacation(repos, first['id'], "2030-05-01", "2030-05-02", status="Approved")
+    early = _vacation(repos, second['id'], "2030-01-01", "2030-01-02", status="Approved")
+    _vacation(repos, first['id'], "2030-03-01", "2030-03-02")
+
+    own = repos.vacations.get_calendar_vacations(employee_id=first['id'])
+    assert [(row['id'], row['email']) for row in own] == [(late['id'], "a@firma.cz")]
+    shared = repos.vacations.get_calendar_vacations(team_id=team['id'])
+    assert [row['id'] for row in shared] == [early['id'], late['id']]
+    assert set(shared[0]) == {"id", "employee_id", "start_date", "end_date", "submitted_at", "decided_at", "name", "email"}
+
+def test_report_columns(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    assert repos.vacations.get_report_columns()['employee_id'] == []
+    first = _vacation(repos, user['id'], "2030-01-01", "2030-01-02", submitted_at="1700000000")
+    _vacation(repos, user['id'], "2030-02-01", "2030-02-02", submitted_at="1700000500")
+    assert repos.vacations.update_request_status(first['id'], "Approved")
+
+    columns = repos.vacations.get_report_columns()
+    rows = sorted(zip(*(columns[name] for name in ("start_date", "status", "submitted_at", "decided_at"))))
+    assert [row[:3] for row in rows] == [("2030-01-01", "Approved", 1700000000), ("2030-02-01", "Pending", 1700000500)]
+    assert isinstance(rows[0][3], int) and rows[1][3] is None
+    assert columns['employee_id'] == [user['id'], user['id']]
+
+def test_report_columns_include_archive(conn):
+    repos = SqliteRepositories(conn)
+    user = _user(repos, "a@firma.cz", "A")
+    other = _user(repos, "b@firma.cz", "B")
+    archived = _vacation(repos, user['id'], "2023-01-02", "2023-01-03", submitted_at="1672000000")
+    assert repos.vacations.update_request_status(archived['id'], "Approved")
+    _vacation(repos, other['id'], "2023-02-01", "2023-02-01", status="Rejected", submitted_at="1672000000")
+    _vacation(repos, user['id'], "2030-01-01", "2030-01-02")
+    assert archive_repo.archive_closed_vacations(conn, date(2024, 1, 1)) == {2022: 2}
+
+    for backend in (repos, MemoryRepositories(MemoryStore.from_sqlite(conn))):
+        columns = backend.vacations.get_report_columns()
+        rows = sorted(zip(*(columns[name] for name in ("start_date", "status", "employee_id"))))
+        assert rows == [
+            ("2023-01-02", "Approved", user['id']),
+            ("2023-02-01", "Rejected", other['id']),
+            ("2030-01-01", "Pending", user['id']),
+        ]
+        decided = dict(zip(columns['start_date'], columns['decided_at']))
+        assert isinstance(decided["2023-01-02"], int)
+
+    # Smazaný zaměstnanec zmizí i z archivovaných řádků
+    memory = MemoryRepositories(MemoryStore.from_sqlite(conn))
+    for backend in (repos, memory):
+        backend.users.delete_user(other['id'])
+        assert other['id'] not in backend.vacations.get_report_columns()['employee_id']
+
+
+def test_delete_user_removes_archived_history(conn):
+    repos = SqliteRepositories(conn)
+    users = [_user(repos, f"{name}@firma.cz", name.upper()) for name in ("a", "b", "c")]
+    for user in users:
+        archived = _vacation(repos, user['id'], "2023-01-02", "2023-01-03", submitted_at="1672000000")
+        assert repos.vacations.update_request_status(archived['id'], "Approved")
+    assert archive_repo.archive_closed_vacations(conn, date(2024, 1, 1)) == {2022: 3}
+    first, second, third = (user['id'] for user in users)
+
+    assert repos.users.delete_user(first)
+    assert archive_repo.count_employee_archived(conn, 2022, first) == 0
+    assert archive_repo.count_employee_archived(conn, 2022, second) == 1
+
+    # Odvolané smazání uživatele jeho archiv nechá beze změny
+    with pytest.raises(RuntimeError):
+        with repos.transaction():
+            assert repos.users.delete_user(second)
+            raise RuntimeError("zrušeno")
+    assert repos.users.get_user_by_id(second) is not None
+    assert archive_repo.count_employee_archived(conn, 2022, second) == 1
+
+    # Uvnitř transakce se archiv maže až po jejím potvrzení
+    with repos.transaction():
+        assert repos.users.delete_user(third)
+        # ATTACH v otevřené transakci nejde, archiv se čte vlastním připojením
+        archive = sqlite3.connect(archive_repo.archive_path(2022))
+        assert archive.execute("SELECT COUNT(*) FROM vacations WHERE employee_id = ?", (third,)).fetchone()[0] == 1
+        archive.close()
+    assert repos.users.get_user_by_id(third) is None
+    assert archive_repo.count_employee_archived(conn, 2022, third) == 0
+    assert archive_repo.count_employee_archived(conn, 2022, second) == 1
+
+
+#
+# DOVOLENÉ: ZÁPISY, COMPARE-AND-SWAP A VERZE CACHE
+#
+def test_status_change_compare_and_swap(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    vacation = _vacation(repos, user['id'], _day(1), _day(1))
+    vacations_before = _version(repos, cache_sync.VACATIONS)
+    approved_before = _version(repos, cache_sync.APPROVED_VACATIONS)
+
+    assert not repos.vacations.update_request_status(vacation['id'], "Approved", expected_version=vacation['version'] + 1)
+    assert _version(repos, cache_sync.VACATIONS) == vacations_before
+
+    assert repos.vacations.update_request_status(vacation['id'], "Approved", expected_version=vacation['version'])
+    stored = repos.vacations.get_vacation_request_by_id(vacation['id'])
+    assert (stored['status'], stored['version']) == ("Approved", vacation['version'] + 1)
+    assert stored['decided_at'] is not None
+    assert _version(repos, cache_sync.VACATIONS) == vacations_before + 1
+    assert _version(repos, cache_sync.APPROVED_VACATIONS) == approved_before + 1
+
+    # Stejná verze podruhé (souběžné schválení) už neprojde
+    assert not repos.vacations.update_request_status(vacation['id'], "Rejected", expected_version=vacation['version'])
+
+def test_rejection_does_not_bump_approved(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    vacation = _vacation(repos, user['id'], _day(1), _day(1))
+    approved_before = _version(repos, cache_sync.APPROVED_VACATIONS)
+    assert repos.vacations.update_request_status(vacation['id'], "Rejected")
+    assert _version(repos, cache_sync.APPROVED_VACATIONS) == approved_before
+    assert not repos.vacations.update_request_status(vacation['id'] + 100, "Rejected")
+
+def test_edit_only_pending_with_compare_and_swap(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    vacation = _vacation(repos, user['id'], _day(1), _day(1))
+    before = _version(repos, cache_sync.VACATIONS)
+
+    assert not repos.vacations.update_vacation_request(vacation['id'], _day(2), _day(3), 2, expected_version=5)
+    assert repos.vacations.update_vacation_request(vacation['id'], _day(2), _day(3), 2, expected_version=0)
+    stored = repos.vacations.get_vacation_request_by_id(vacation['id'])
+    assert (stored['start_date'], stored['end_date'], stored['total_days'], stored['version']) == (_day(2), _day(3), 2, 1)
+    assert _version(repos, cache_sync.VACATIONS) == before + 1
+
+    assert repos.vacations.update_request_status(vacation['id'], "Approved")
+    assert not repos.vacations.update_vacation_request(vacation['id'], _day(4), _day(4), 1)
+
+def test_delete_only_pending(repos):
+    user = _user(repos, "a@firma.cz", "A")
+    pending = _vacation(repos, user['id'], _day(1), _day(1))
+    approved = _vacation(repos, user['id'], _day(3), _day(3), status="Approved")
+    before = _version(repos, cache_sync.VACATIONS)
+
+    assert repos.vacations.delete_vacation_request(pending['id'])
+    assert repos.vacations.get_vacation_request_by_id(pending['id']) is None
+    assert _version(repos, cache_sync.VACATIONS) > before
+    assert not repos.vacations.delete_vacation_request(approved['id'])
+    assert repos.vacations.get_vacation_request_by_id(approved['id']) is not None
+
+
+#
+# TÝMY
+#
+def test_teams_sorted_by_name_with_member_counts(repos):
+    beta = repos.teams.create_team("Beta")
+    alfa = repos.teams.create_team("Alfa")
+    assert repos.teams.create_team("Beta") is None
+    _user(repos, "a@firma.cz", "A", team_id=beta['id'])
+    _user(repos, "b@firma.cz", "B", team_id=beta['id'])
+
+    assert repos.teams.get_all_teams() == [
+        {"id": alfa['id'], "name": "Alfa", "members": 0},
+        {"id": beta['id'], "name": "Beta", "members": 2},
+    ]
+    assert repos.teams.get_team_by_id(beta['id']) == {"id": beta['id'], "name": "Beta"}
+    assert repos.teams.get_team_by_id(beta['id'] + 100) is None
+
+def test_admin_assignment(repos):
+    beta = repos.teams.create_team("Beta")
+    alfa = repos.teams.create_team("Alfa")
+    first = _user(repos, "z@firma.cz", "Zuzana", is_admin=True)
+    second = _user(repos, "a@firma.cz", "Adam", is_admin=True)
+
+    assert repos.teams.assign_admin(first['id'], beta['id'])
+    assert repos.teams.assign_admin(first['id'], alfa['id'])
+    assert not repos.teams.assign_admin(first['id'], alfa['id'])
+    assert repos.teams.assign_admin(second['id'], beta['id'])
+
+    assert [team['name'] for team in repos.teams.get_admin_teams(first['id'])] == ["Alfa", "Beta"]
+    assert [(row['team_id'], row['email']) for row in repos.teams.get_team_admins()] == sorted([
+        (beta['id'], "a@firma.cz"), (beta['id'], "z@firma.cz"), (alfa['id'], "z@firma.cz"),
+    ])
+
+    assert repos.teams.unassign_admin(first['id'], beta['id'])
+    assert not repos.teams.unassign_admin(first['id'], beta['id'])
+    assert [team['name'] for team in repos.teams.get_admin_teams(first['id'])] == ["Alfa"]
+
+    repos.users.delete_user(first['id'])
+    assert [row['admin_id'] for row in repos.teams.get_team_admins()] == [second['id']]
+
+
+#
+# TRANSAKCE
+#
+def test_commit_and_rollback_keep_committed_writes(repos):
+    # Repozitáře potvrzují každý zápis samy; commit/rollback bez rozpracované změny nic nedělá
+    repos.commit()
+    repos.rollback()
+    user = _user(repos, "a@firma.cz", "A")
+    repos.rollback()
+    assert repos.users.get_user_by_id(user['id']) is not None
+    repos.commit()
+    assert repos.users.get_user_by_email("a@firma.cz")['id'] == user['id']
+
+def test_transaction_commits_writes_together(repos):
+    user = _user(repos, "a@firma.cz", "A", remaining_days=10)
+    vacation = _vacation(repos, user['id'], _day(1), _day(1))
+    with repos.transaction():
+        assert repos.vacations.update_vacation_request(vacation['id'], _day(1), _day(2), 2)
+        with repos.transaction(immediate=True):
+            assert repos.users.update_user_remaining_days(user['id'], -1)
+    repos.rollback()
+    assert repos.vacations.get_vacation_request_by_id(vacation['id'])['total_days'] == 2
+    assert repos.users.get_user_by_id(user['id'])['remaining_days'] == 9
+
+def test_transaction_rolls_back_every_write_on_error(repos):
+    user = _user(repos, "a@firma.cz", "A", remaining_days=10)
+    vacation = _vacation(repos, user['id'], _day(1), _day(1))
+    before = _version(repos, cache_sync.VACATIONS)
+    with pytest.raises(ValueError):
+        with repos.transaction(immediate=True):
+            assert repos.vacations.update_vacation_request(vacation['id'], _day(1), _day(3), 3)
+            assert repos.users.update_user_remaining_days(user['id'], -2)
+            raise ValueError("zůstatek")
+
+    stored = repos.vacations.get_vacation_request_by_id(vacation['id'])
+    assert (stored['end_date'], stored['total_days'], stored['version']) == (_day(1), 1, 0)
+    assert repos.users.get_user_by_id(user['id'])['remaining_days'] == 10
+    assert _version(repos, cache_sync.VACATIONS) == before
+    # Po odvolaném bloku se zapisuje normálně
+    assert repos.vacations.update_vacation_request(vacation['id'], _day(1), _day(2), 2, expected_version=0)
+
+@pytest.mark.parametrize("failure", ["returns_false", "raises"])
+def test_submit_leaves_no_request_when_deduction_fails(repos, monkeypatch, failure):
+    monkeypatch.setattr(settings, "EMAIL_ENABLED", False)
+    user = _user(repos, "a@firma.cz", "A", remaining_days=10)
+
+    def failing_deduction(*args, **kwargs):
+        if failure == "raises":
+            raise RuntimeError("kniha pohybů")
+        return False
+
+    request_data = VacationRequest(start_date=date(2030, 3, 4), end_date=date(2030, 3, 6))
+    with monkeypatch.context() as patched:
+        patched.setattr(repos.users, "update_user_remaining_days", failing_deduction)
+        with pytest.raises(ValueError):
+            vacation_service.submit_new_vacation_request(repos, user['id'], request_data, 10)
+
+    assert repos.vacations.get_active_vacation_requests(user['id']) == []
+    assert repos.users.get_user_by_id(user['id'])['remaining_days'] == 10
+    # Neodvolaná žádost by kontrolu překryvu zablokovala
+    created = vacation_service.submit_new_vacation_request(repos, user['id'], request_data, 10)
+    assert repos.vacations.get_vacation_request_by_id(created['id'])['total_days'] == 3
+    assert repos.users.get_user_by_id(user['id'])['remaining_days'] == 7
@@ -0,0 +1,162 @@
+# tests/test_session_service.py
+"""
+Serverové relace: cache workeru (verze oblasti, ttl), odložené prodloužení
+a rozdíl mezi hromadným odvoláním a jedním odhlášením.
+"""
+
+from types import SimpleNamespace
+import pytest
+from app.core.config import settings
+from app.models import cache_sync, db
+from app.models.db import open_conn
+import app.repositories.session_repo as session_repo
+from app.services import session_service
+from app.services.session_service import SessionCache
+
+USER = {"id": 7, "email": "jana@firma.cz", "is_admin": 0, "is_super_admin": 0}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_900_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_service, "time", SimpleNamespace(time=clock.time, monotonic=clock.monotonic))
+    return clock
+
+def _session(session_id, user_id=7):
+    return {"id": session_id, "user_id": user_id, "email": "jana@firma.cz", "is_admin": 0,
+            "is_super_admin": 0, "created_at": 0, "last_seen": 0, "expires_at": 10 ** 10}
+
+
+#
+# CACHE RELACÍ
+#
+def test_version_change_clears_cache(clock):
+    cache = SessionCache(size=10, ttl=60)
+    assert cache.get("a", 1) is None
+    cache.put(_session("a"), 1)
+    assert cache.get("a", 1)['id'] == "a"
+    assert cache.get("a", 2) is None
+    # Položka načtená pod starou verzí se už neuloží
+    cache.put(_session("a"), 1)
+    assert cache.get("a", 2) is None
+
+def test_entries_expire_after_ttl(clock):
+    cache = SessionCache(size=10, ttl=15)
+    cache.get("a", 1)
+    cache.put(_session("a"), 1)
+    clock.now += 14
+    assert cache.get("a", 1) is not None
+    clock.now += 1
+    assert cache.get("a", 1) is None
+
+def test_least_recently_used_evicted(clock):
+    cache = SessionCache(size=2, ttl=60)
+    cache.prime([_session("b"), _session("a")], 1)
+    assert cache.get("a", 1) is not None
+    cache.put(_session("c"), 1)
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None and cache.get("c", 1) is not None
+
+def test_discard_user_keeps_other_users(clock):
+    cache = SessionCache(size=10, ttl=60)
+    cache.prime([_session("a", 7), _session("b", 8)], 1)
+    cache.discard_user(7)
+    assert cache.get("a", 1) is None
+    assert cache.get("b", 1) is not None
+
+
+#
+# OVĚŘENÍ A ODVOLÁNÍ NAD DATABÁZÍ
+#
+@pytest.fixture
+def sessions(db_path, monkeypatch, clock):
+    monkeypatch.setattr(settings, "SESSION_BACKEND", "server")
+    monkeypatch.setattr(settings, "SESSION_IDLE_MINUTES", 60)
+    monkeypatch.setattr(db, "DB_PATH", db_path)
+    monkeypatch.setattr(db, "_pool", None)
+    monkeypatch.setattr(session_service, "_cache", SessionCache(size=100, ttl=15))
+    # Zápis na pozadí jen ručně přes flush()
+    writer = session_service.TouchWriter(3600)
+    monkeypatch.setattr(session_service, "_writer", writer)
+    yield
+    writer._stop.set()
+    db.close_pool()
+
+def _stored(token):
+    with open_conn() as conn:
+        return session_repo.get_session(conn, session_service._session_id(token))
+
+def test_decode_created_token(sessions):
+    token = session_service.create_token(USER)
+    payload = session_service.decode_token(token)
+    assert (payload['sub'], payload['id'], payload['roles']) == ("jana@firma.cz", 7, ["employee"])
+    with pytest.raises(ValueError):
+        session_service.decode_token("neznamy-token")
+
+def test_last_seen_extended_only_through_writer(sessions, clock):
+    token = session_service.create_token(USER)
+    created = _stored(token)
+    clock.now += session_service.TOUCH_GRANULARITY_SECONDS - 1
+    session_service.decode_token(token)
+    assert session_service._writer._pending == {}
+
+    clock.now += 1
+    payload = session_service.decode_token(token)
+    assert payload['exp'] == int(clock.now) + 3600
+    # Do databáze až dávkou
+    assert _stored(token)['last_seen'] == created['last_seen']
+    session_service._writer.flush()
+    assert _stored(token)['last_seen'] == int(clock.now)
+    assert _stored(token)['expires_at'] == int(clock.now) + 3600
+
+def test_idle_session_expires(sessions, clock):
+    token = session_service.create_token(USER)
+    clock.now += 3601
+    with pytest.raises(ValueError):
+        session_service.decode_token(token)
+
+def test_single_logout_on_other_worker_applies_after_ttl(sessions, clock):
+    token = session_service.create_token(USER)
+    session_service.decode_token(token)
+    before = cache_sync.version(cache_sync.SESSIONS, refresh=True)
+
+    # Odhlášení v jiném workeru: smaže řádek, cache tohoto workeru nezná
+    with open_conn() as conn:
+        assert session_repo.delete_session(conn, session_service._session_id(token))
+    assert cache_sync.version(cache_sync.SESSIONS, refresh=True) == before
+    assert session_service.decode_token(token)['id'] == 7
+    clock.now += 15
+    with pytest.raises(ValueError):
+        session_service.decode_token(token)
+
+def test_single_logout_on_this_worker_applies_immediately(sessions):
+    token = session_service.create_token(USER)
+    session_service.decode_token(token)
+    session_service.revoke_token(token)
+    with pytest.raises(ValueError):
+        session_service.decode_token(token)
+
+def test_bulk_revocation_on_other_worker_applies_immediately(sessions):
+    token = session_service.create_token(USER)
+    other = session_service.create_token(dict(USER, id=8, email="petr@firma.cz"))
+    session_service.decode_token(token)
+    session_service.decode_token(other)
+    before = cache_sync.version(cache_sync.SESSIONS, refresh=True)
+
+    # Změna rolí v jiném workeru: verze oblasti vyprázdní cache všech workerů
+    with open_conn() as conn:
+        assert session_repo.delete_user_sessions(conn, 7) == 1
+    assert cache_sync.version(cache_sync.SESSIONS, refresh=True) == before + 1
+    with pytest.raises(ValueError):
+        session_service.decode_token(token)
+    assert session_service.decode_token(other)['id'] == 8